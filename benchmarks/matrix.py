@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+# HDTV - A ROOT-based spectrum analysis software
+#  Copyright (C) 2006-2019  The HDTV development team (see file AUTHORS)
+#
+# This file is part of HDTV.
+#
+# HDTV is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 2 of the License, or (at your
+# option) any later version.
+#
+# HDTV is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HDTV; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+
+"""
+Benchmarks of writing and transposing an 8k x 8k line-compressed matrix,
+serially (threads=1) and with one thread per CPU (threads=0).
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import ROOT
+
+import hdtv.rootext.mfile
+from hdtv.specreader import SpecReader
+
+NBINS = 8192
+
+
+class LCMatrixSuite:
+    params = [1, 0]
+    param_names = ["threads"]
+    timeout = 300
+
+    def setup(self, threads):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.tmpdir.name, "matrix.mtx")
+        # Counts falling off with energy, as in a coincidence matrix
+        rng = np.random.default_rng(0)
+        e = np.arange(NBINS)
+        counts = rng.poisson(2000.0 / (20 + e[:, np.newaxis] + e))
+        self.hist = ROOT.TH2I(
+            "m", "m", NBINS, -0.5, NBINS - 0.5, NBINS, -0.5, NBINS - 0.5
+        )
+        self.hist.SetContent(np.pad(counts.astype(np.float64), 1))
+        del counts
+        SpecReader.WriteMatrix(self.hist, self.fname, "lc")
+
+    def teardown(self, threads):
+        self.tmpdir.cleanup()
+
+    def time_write(self, threads):
+        SpecReader.WriteMatrix(
+            self.hist, os.path.join(self.tmpdir.name, "write.mtx"), "lc", threads
+        )
+
+    def time_transpose(self, threads):
+        tname = os.path.join(self.tmpdir.name, "matrix.tmtx")
+        ROOT.MatOp.Transpose(self.fname, tname, threads)
+        os.remove(tname)
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+# HDTV - A ROOT-based spectrum analysis software
+#  Copyright (C) 2006-2019  The HDTV development team (see file AUTHORS)
+#
+# This file is part of HDTV.
+#
+# HDTV is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 2 of the License, or (at your
+# option) any later version.
+#
+# HDTV is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HDTV; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+
+"""
+Benchmarks of the positions, markers and IDs of a session with 10000 fits
+(each with a region, two background and two peak markers).
+
+Compare two commits with
+    asv continuous --environment existing HEAD~1 HEAD
+"""
+
+import hdtv.cal
+import hdtv.util
+from hdtv.marker import Marker
+
+NFITS = 10000
+
+
+class PositionSuite:
+    def setup(self):
+        self.cal = hdtv.cal.MakeCalibration([0.5, 2.0])
+        self.positions = [
+            hdtv.util.Position(100.0 + 0.1 * i, False, self.cal)
+            for i in range(5 * NFITS)
+        ]
+
+    def time_create(self):
+        for i in range(5 * NFITS):
+            hdtv.util.Position(100.0 + 0.1 * i, False, self.cal)
+
+    def time_pos_cal(self):
+        # e.g. listing and redrawing all fits
+        for _ in range(10):
+            for p in self.positions:
+                p.pos_cal
+
+    def time_pos_cal_changed(self):
+        hdtv.util.Position.CalibrationChanged()
+        for p in self.positions:
+            p.pos_cal
+
+    def peakmem_create(self):
+        [hdtv.util.Position(100.0 + 0.1 * i, False, self.cal) for i in range(5 * NFITS)]
+
+
+class MarkerSuite:
+    def setup(self):
+        self.cal = hdtv.cal.MakeCalibration([0.5, 2.0])
+
+    def _Markers(self):
+        markers = list()
+        for i in range(NFITS):
+            region = Marker("X", 100.0 + i, cal=self.cal)
+            region.p2 = 120.0 + i
+            markers.append(region)
+            for offset in (-20.0, 30.0):
+                bg = Marker("X", 100.0 + i + offset, cal=self.cal)
+                bg.p2 = 110.0 + i + offset
+                markers.append(bg)
+            for offset in (5.0, 15.0):
+                markers.append(Marker("X", 100.0 + i + offset, cal=self.cal))
+        return markers
+
+    def time_create(self):
+        self._Markers()
+
+    def peakmem_create(self):
+        self._Markers()
+
+    def mem_markers(self):
+        return self._Markers()
+
+
+class IDSuite:
+    def setup(self):
+        self.ids = [hdtv.util.ID(i, j) for i in range(NFITS) for j in (None, 0, 1)]
+        self.string = ",".join(str(ID) for ID in self.ids)
+
+    def time_create(self):
+        [hdtv.util.ID(i, j) for i in range(NFITS) for j in (None, 0, 1)]
+
+    def time_set(self):
+        set(self.ids)
+
+    def time_sort(self):
+        sorted(reversed(self.ids))
+
+    def time_parse(self):
+        hdtv.util.ID.ParseIds(self.string, None, only_existent=False)
+
+    def peakmem_create(self):
+        [hdtv.util.ID(i, j) for i in range(NFITS) for j in (None, 0, 1)]
@@ -27,6 +27,7 @@ This is the main HDTV application.
 import sys
 import os
 import glob
+import importlib
 from pathlib import Path
 import argparse
 
@@ -104,6 +105,12 @@ class App:
 
         args = self.parse_args(hdtv_args)
 
+        if args.profile_startup:
+            import hdtv.profiling
+
+            self.import_timer = hdtv.profiling.ImportTimer()
+            self.import_timer.Install()
+
         if args.rebuildusr is not None:
             import hdtv.rootext.dlmgr
 
@@ -120,8 +127,18 @@ class App:
         if args.rebuildusr or args.rebuildsys:
             sys.exit(0)
 
+        if args.map:
+            sys.exit(self.run_map(args))
+        if args.map_job:
+            args.headless = True
+
         check_root_version()
 
+        if args.headless:
+            import ROOT
+
+            ROOT.gROOT.SetBatch(True)
+
         # Import core modules
         import hdtv.cmdline
         import hdtv.session
@@ -129,27 +146,18 @@ class App:
 
         hdtv.cmdline.SetHistory(self.datapath / "hdtv_history")
         hdtv.cmdline.SetInteractiveDict(locals())
-        spectra = hdtv.session.Session()
+        spectra = hdtv.session.Session(headless=args.headless)
         import __main__
 
         __main__.spectra = spectra
 
-        # Import core plugins
-        import hdtv.plugins.textInterface
-        import hdtv.plugins.ls
-        import hdtv.plugins.run
-        import hdtv.plugins.specInterface
-        import hdtv.plugins.fitInterface
-        import hdtv.plugins.calInterface
-        import hdtv.plugins.matInterface
-        import hdtv.plugins.rootInterface
-        import hdtv.plugins.config
-        import hdtv.plugins.fitlist
-        import hdtv.plugins.fittex
-        import hdtv.plugins.fitmap
-        import hdtv.plugins.dblookup
-        import hdtv.plugins.peakfinder
-        import hdtv.plugins.printing
+        # Import core plugins, and register stubs for those which are only
+        # imported on first use
+        import hdtv.plugins
+
+        for plugin in hdtv.plugins.core_plugins:
+            importlib.import_module(plugin)
+        hdtv.plugins.RegisterLazyPlugins()
 
         hdtv.ui.msg("HDTV - Nuclear Spectrum Analysis Tool")
 
@@ -172,11 +180,18 @@ class App:
             except IOError as msg:
                 hdtv.ui.error("Error reading %s: %s" % (startup_hdtv, msg))
 
+        if args.profile_startup:
+            self.report_startup_profile()
+
+        if args.map_job:
+            sys.exit(self.run_map_job(args))
+
         self.run_batchfile(args)
         self.run_commands(args)
 
         hdtv.cmdline.MainLoop()
-        hdtv.plugins.rootInterface.r.rootfile = None
+        if "hdtv.plugins.rootInterface" in sys.modules:
+            hdtv.plugins.rootInterface.r.rootfile = None
         hdtv.cmdline.command_tree.SetDefaultLevel(1)
 
     def parse_args(self, args):
@@ -210,8 +225,127 @@ class App:
             dest="rebuildsys",
             help="Rebuild ROOT-loadable libraries for all users",
         )
+        parser.add_argument(
+            "--headless",
+            action="store_true",
+            help="Run without a window or X server (e.g. for batch jobs)",
+        )
+        parser.add_argument(
+            "--map",
+            nargs="+",
+            metavar=("BATCHFILE", "FILE"),
+            help="Execute BATCHFILE for each FILE in parallel headless sessions "
+            "and merge the written fit lists and tables",
+        )
+        parser.add_argument(
+            "--map-jobs",
+            type=int,
+            dest="map_jobs",
+            help="Number of parallel sessions for --map (default: number of CPUs)",
+        )
+        parser.add_argument(
+            "--map-chunk",
+            type=int,
+            default=1,
+            dest="map_chunk",
+            help="Number of files per process for --map (default: 1)",
+        )
+        parser.add_argument(
+            "--map-output",
+            default="hdtv-map",
+            dest="map_output",
+            help="Output directory for --map (default: hdtv-map)",
+        )
+        # Internal: a single --map job
+        parser.add_argument(
+            "--map-job", nargs="+", dest="map_job", help=argparse.SUPPRESS
+        )
+        parser.add_argument(
+            "--profile-startup",
+            action="store_true",
+            dest="profile_startup",
+            help="Report import and library load times during startup",
+        )
         return parser.parse_args(args)
 
+    def report_startup_profile(self):
+        """Print the import and library load times measured during startup"""
+        import hdtv.ui
+        import hdtv.util
+
+        self.import_timer.Uninstall()
+        data = [
+            {
+                "module": name,
+                "cumulative": "%.1f ms" % (1e3 * cumulative),
+                "self": "%.1f ms" % (1e3 * selftime),
+            }
+            for (name, cumulative, selftime) in self.import_timer.Report()
+        ]
+        table = hdtv.util.Table(
+            data, keys=["module", "cumulative", "self"], sortBy=None
+        )
+        hdtv.ui.msg(html=str(table))
+
+        dlmgr = sys.modules.get("hdtv.rootext.dlmgr")
+        if dlmgr is not None and dlmgr.load_times:
+            data = [
+                {"library": name, "time": "%.1f ms" % (1e3 * t)}
+                for (name, t) in dlmgr.load_times.items()
+            ]
+            table = hdtv.util.Table(data, keys=["library", "time"], sortBy=None)
+            hdtv.ui.msg(html=str(table))
+
+        hdtv.ui.msg("Startup took %.2f s" % self.import_timer.Total())
+
+    def run_map(self, args):
+        """Execute batchfile for many files in parallel (--map)"""
+        import hdtv.batch
+        import hdtv.ui
+
+        if len(args.map) < 2:
+            hdtv.ui.error("--map needs a batch file and at least one input file")
+            return 2
+        (script, files) = (args.map[0], args.map[1:])
+        try:
+            jobs = hdtv.batch.Map(
+                script,
+                files,
+                args.map_output,
+                jobs=args.map_jobs,
+                chunk=args.map_chunk,
+            )
+        except IOError as msg:
+            hdtv.ui.error("Error reading %s: %s" % (script, msg))
+            return 2
+        hdtv.ui.msg(html=str(hdtv.batch.Summary(jobs)))
+        for fname in hdtv.batch.MergeOutputs(jobs, args.map_output):
+            hdtv.ui.msg("Merged %s" % fname)
+        return 0 if all(job.returncode == 0 for job in jobs) else 1
+
+    def run_map_job(self, args):
+        """
+        Execute a single --map job, one script per input file, each in a
+        cleared session; stop and fail at the first error
+        """
+        import hdtv.cmdline
+        import __main__
+
+        command_line = hdtv.cmdline.command_line
+        command_line.fStopOnError = True
+        try:
+            for script in args.map_job:
+                # Spectra, fits and calibrations of one file must not leak
+                # into the results of the next one
+                __main__.spectra.ClearCut()
+                __main__.spectra.Clear()
+                command_line.ExecCmdfile(script)
+                if not command_line.fKeepRunning:
+                    break
+        finally:
+            command_line.Exit()
+        return 1 if command_line.fErrors else 0
+
     def run_commands(self, args):
         """Execute commands given on command line"""
         import hdtv.cmdline
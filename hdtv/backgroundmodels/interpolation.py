@@ -28,10 +28,11 @@ class BackgroundModelInterpolation(BackgroundModel):
     Interpolation background model
     """
 
+    fValidParStatus = {"nparams": [int]}
+
     def __init__(self):
         super(BackgroundModelInterpolation, self).__init__()
         self.fParStatus = {"nparams": 3}
-        self.fValidParStatus = {"nparams": [int]}
 
         self.ResetParamStatus()
         self.name = "interpolation"
@@ -28,10 +28,11 @@ class BackgroundModelPolynomial(BackgroundModel):
     Polynomial background model
     """
 
+    fValidParStatus = {"nparams": [int, "free"]}
+
     def __init__(self):
         super(BackgroundModelPolynomial, self).__init__()
         self.fParStatus = {"nparams": 2}
-        self.fValidParStatus = {"nparams": [int, "free"]}
 
         self.ResetParamStatus()
         self.name = "polynomial"
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+
+# HDTV - A ROOT-based spectrum analysis software
+#  Copyright (C) 2006-2019  The HDTV development team (see file AUTHORS)
+#
+# This file is part of HDTV.
+#
+# HDTV is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 2 of the License, or (at your
+# option) any later version.
+#
+# HDTV is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HDTV; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+
+"""
+Run a batch file template over many input files in parallel
+
+Each job is a separate headless hdtv process working in its own directory
+below the output directory. The template is instantiated once for each
+input file of the job, substituting
+
+    $file   absolute path of the input file
+    $name   file name
+    $stem   file name without extension
+    $dir    directory of the input file
+    $index  number of the input file (counting from 0)
+
+The files of a job share one process, but the session is cleared (spectra,
+fits, cuts and calibrations) before each file.
+
+Output files written by the jobs (with relative paths) are merged into the
+output directory: fit lists (xml) by collecting their fits, tables (txt,
+dat, csv, tsv) by concatenating them with a single header.
+"""
+
+import os
+import sys
+import time
+import string
+import subprocess
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+import hdtv.ui
+import hdtv.util
+
+table_extensions = (".txt", ".dat", ".csv", ".tsv")
+
+
+class Job(object):
+    """
+    A set of input files processed by a single hdtv process
+    """
+
+    def __init__(self, number, files, first, workdir):
+        self.number = number
+        self.files = files
+        # index of files[0]
+        self.first = first
+        self.workdir = os.path.abspath(workdir)
+        # one script per input file
+        self.scripts = [
+            os.path.join(self.workdir, "file-%04d.hdtv" % (first + i))
+            for i in range(len(files))
+        ]
+        self.log = os.path.join(self.workdir, "hdtv.log")
+        self.returncode = None
+        self.time = None
+
+
+def Instantiate(template, fname, index, scriptdir):
+    """
+    Substitute the file variables in the script template
+    """
+    fname = os.path.abspath(fname)
+    name = os.path.basename(fname)
+    variables = {
+        "file": fname,
+        "name": name,
+        "stem": os.path.splitext(name)[0],
+        "dir": os.path.dirname(fname),
+        "index": str(index),
+        "scriptdir": scriptdir,
+    }
+    return string.Template(template).safe_substitute(variables)
+
+
+def WorkerCommand(scripts):
+    """
+    Command line of a headless hdtv process executing scripts, each in a
+    cleared session, which stops at the first error
+    """
+    return [sys.executable, "-m", "hdtv.app", "--map-job"] + scripts
+
+
+def _WorkerEnv():
+    # Workers must use the same hdtv (e.g. when run from a source tree)
+    env = dict(os.environ)
+    topdir = os.path.dirname(os.path.dirname(os.path.abspath(hdtv.__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(
+        [topdir] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+    return env
+
+
+def _RunJob(job, env):
+    start = time.perf_counter()
+    with open(job.log, "w") as log:
+        job.returncode = subprocess.call(
+            WorkerCommand(job.scripts),
+            cwd=job.workdir,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    job.time = time.perf_counter() - start
+    return job
+
+
+def Map(script, files, outdir, jobs=None, chunk=1):
+    """
+    Run the batch file template script for all files in a pool of jobs
+    processes, chunk files per process. Returns the list of Jobs.
+    """
+    if not files:
+        raise ValueError("No input files given")
+    with open(script) as f:
+        template = f.read()
+    scriptdir = os.path.dirname(os.path.abspath(script))
+    # The jobs run in their own directories, so all paths must be absolute
+    outdir = os.path.abspath(outdir)
+    chunk = max(1, chunk)
+    jobs = jobs or os.cpu_count() or 1
+
+    tasks = []
+    for (number, first) in enumerate(range(0, len(files), chunk)):
+        job = Job(
+            number,
+            files[first : first + chunk],
+            first,
+            os.path.join(outdir, "jobs", "%04d" % number),
+        )
+        os.makedirs(job.workdir, exist_ok=True)
+        for (i, (fname, script)) in enumerate(zip(job.files, job.scripts)):
+            with open(script, "w") as f:
+                f.write(Instantiate(template, fname, first + i, scriptdir))
+                f.write("\n")
+        tasks.append(job)
+
+    hdtv.ui.msg(
+        "Running %s on %d file(s) in %d job(s) (%d in parallel)"
+        % (script, len(files), len(tasks), min(jobs, len(tasks)))
+    )
+    env = _WorkerEnv()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for job in pool.map(lambda job: _RunJob(job, env), tasks):
+            if job.returncode != 0:
+                hdtv.ui.warning(
+                    "Job %d failed (exit code %d), see %s"
+                    % (job.number, job.returncode, job.log)
+                )
+    return tasks
+
+
+def Summary(jobs):
+    """
+    Table of the jobs with their files, exit codes and logs
+    """
+    data = [
+        {
+            "job": job.number,
+            "files": ", ".join(os.path.basename(f) for f in job.files),
+            "status": "ok" if job.returncode == 0 else "failed (%d)" % job.returncode,
+            "time": "%.1f s" % job.time,
+            "log": job.log,
+        }
+        for job in jobs
+    ]
+    return hdtv.util.Table(data, keys=["job", "files", "status", "time", "log"])
+
+
+def MergeOutputs(jobs, outdir):
+    """
+    Merge output files with the same relative path from all (successful)
+    jobs into outdir. Returns the list of merged files.
+    """
+    outputs = dict()
+    for job in jobs:
+        if job.returncode != 0:
+            continue
+        for (dirpath, dirnames, filenames) in os.walk(job.workdir):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                fname = os.path.join(dirpath, filename)
+                if fname in job.scripts or fname == job.log:
+                    continue
+                relpath = os.path.relpath(fname, job.workdir)
+                outputs.setdefault(relpath, []).append(fname)
+
+    merged = []
+    for (relpath, fnames) in sorted(outputs.items()):
+        target = os.path.join(outdir, relpath)
+        ext = os.path.splitext(relpath)[1].lower()
+        if ext == ".xml":
+            merge = MergeFitlists
+        elif ext in table_extensions:
+            merge = MergeTables
+        else:
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            merge(fnames, target)
+        except (ET.ParseError, UnicodeDecodeError) as msg:
+            hdtv.ui.warning("Cannot merge %s: %s" % (relpath, msg))
+            continue
+        merged.append(target)
+    return merged
+
+
+def MergeFitlists(fnames, target):
+    """
+    Merge fit lists into one, keeping the fits in order
+    """
+    root = None
+    for fname in fnames:
+        other = ET.parse(fname).getroot()
+        if root is None:
+            root = other
+        else:
+            if other.get("version") != root.get("version"):
+                hdtv.ui.warning(
+                    "Fit list %s has version %s, expected %s"
+                    % (fname, other.get("version"), root.get("version"))
+                )
+            root.extend(list(other))
+    ET.ElementTree(root).write(target)
+
+
+def _IsData(line):
+    fields = line.replace(",", " ").split()
+    if not fields:
+        return False
+    try:
+        float(fields[0])
+    except ValueError:
+        return False
+    return True
+
+
+def MergeTables(fnames, target):
+    """
+    Concatenate tables. The header (the lines before the first line
+    starting with a number) is only kept from the first table.
+    """
+    header = None
+    with open(target, "w") as out:
+        for fname in fnames:
+            with open(fname) as f:
+                lines = f.readlines()
+            n = 0
+            while n < len(lines) and not _IsData(lines[n]):
+                n += 1
+            if header is None:
+                header = lines[:n]
+                out.writelines(lines)
+            elif lines[:n] == header:
+                out.writelines(lines[n:])
+            else:
+                out.writelines(lines)
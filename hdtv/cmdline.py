@@ -40,6 +40,10 @@ from enum import Enum, auto
 import re
 import glob
 import asyncio
+import importlib
+import io
+import cProfile
+import pstats
 
 from prompt_toolkit.shortcuts import PromptSession, CompleteStyle, clear
 from prompt_toolkit.completion import Completer, Completion
@@ -50,6 +54,7 @@ from prompt_toolkit.formatted_text import HTML
 
 import hdtv.util
 import hdtv.options
+import hdtv.profiling
 import __main__
 
 import ROOT
@@ -94,6 +99,44 @@ class HDTVOptionParser(argparse.ArgumentParser):
             raise HDTVCommandError(message)
 
 
+class HDTVLazyPlugin(object):
+    """
+    A plugin that is only imported when one of its commands (or options) is
+    used for the first time. Until then, the command tree only contains
+    stub nodes for its commands.
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.nodes = []
+
+    def Load(self):
+        """
+        Remove the command stubs and import the plugin
+        """
+        nodes, self.nodes = self.nodes, []
+        for node in nodes:
+            node.lazy = None
+            # Remove stub nodes which did not get any real children
+            while (
+                node.parent is not None
+                and not node.HasChildren()
+                and node.command is None
+                and node.lazy is None
+            ):
+                node.parent.RemoveChild(node)
+                node = node.parent
+
+        if self.module not in sys.modules:
+            hdtv.ui.debug("Loading plugin " + self.module)
+            try:
+                importlib.import_module(self.module)
+            except ImportError as err:
+                raise HDTVCommandError(
+                    "Failed to load plugin %s: %s" % (self.module, err)
+                )
+
+
 class HDTVCommandTreeNode(object):
     def __init__(self, parent, title, level):
         self.parent = parent
@@ -101,6 +144,7 @@ class HDTVCommandTreeNode(object):
         self.level = level
         self.command = None
         self.params = None
+        self.lazy = None
         self.childs = []
         self.parent.childs.append(self)
 
@@ -175,6 +219,7 @@ class HDTVCommandTree(HDTVCommandTreeNode):
         self.parent = None
         self.command = None
         self.options = None
+        self.lazy = None
         self.default_level = 1
 
     def SplitCmdline(self, s):
@@ -232,6 +277,7 @@ class HDTVCommandTree(HDTVCommandTreeNode):
         #  creating nodes on the way if necessary
         if len(path) > 1:
             for elem in path[:-1]:
+                self._LoadLazyChild(node, elem)
                 next = None
                 for child in node.childs:
                     if child.title == elem:
@@ -245,6 +291,7 @@ class HDTVCommandTree(HDTVCommandTreeNode):
 
         # Check to see if the node we are trying to add already exists; if it
         # does and we are not allowed to overwrite it, raise an error
+        self._LoadLazyChild(node, path[-1])
         if not overwrite:
             if path[-1] in [n.title for n in node.childs]:
                 raise RuntimeError("Refusing to overwrite already existing command")
@@ -254,6 +301,45 @@ class HDTVCommandTree(HDTVCommandTreeNode):
         node.command = command
         node.options = opt
 
+    def AddLazyPlugin(self, module, commands, level=None):
+        """
+        Registers command stubs for a plugin, which is imported when one of
+        the stubs is used. commands is a list of command titles or a dict
+        mapping command titles to their level. The stubs should have the
+        same levels as the real commands, so that abbreviations resolve in
+        the same way.
+        """
+        if level is None:
+            level = self.default_level
+        if not isinstance(commands, dict):
+            commands = {title: level for title in commands}
+
+        plugin = HDTVLazyPlugin(module)
+        for (title, stublevel) in commands.items():
+            node = self
+            for elem in title.split():
+                next = None
+                for child in node.childs:
+                    if child.title == elem:
+                        next = child
+                        next.level = min(next.level, stublevel)
+                        break
+                if not next:
+                    next = HDTVCommandTreeNode(node, elem, stublevel)
+                node = next
+            node.lazy = plugin
+            plugin.nodes.append(node)
+        return plugin
+
+    def _LoadLazyChild(self, node, title):
+        """
+        Loads the plugin of the stub node title below node, if any
+        """
+        for child in node.childs:
+            if child.title == title and child.lazy is not None:
+                child.lazy.Load()
+                return
+
     def FindNode(self, path, use_levels=True):
         """
         Finds the command node given by path, which should be a list
@@ -264,6 +350,7 @@ class HDTVCommandTree(HDTVCommandTreeNode):
         ambiguities (node with lower level take precedence).
         """
         # Go down as far as possible in path
+        fullpath = list(path)
         node = self
         while path:
             elem = path.pop(0)
@@ -274,6 +361,11 @@ class HDTVCommandTree(HDTVCommandTreeNode):
                 path.insert(0, elem)
                 break
             node = next_elem
+            # Load plugin behind a command stub and start over
+            if node.lazy is not None:
+                node.lazy.Load()
+                path[:] = fullpath
+                return self.FindNode(path, use_levels)
 
         return (node, path)
 
@@ -287,45 +379,61 @@ class HDTVCommandTree(HDTVCommandTreeNode):
             for path in fragments:
                 if not command_line.fKeepRunning:
                     break
-                parser = None
-                try:
-                    (node, args) = self.FindNode(path)
-                    while node and not node.command:
-                        node = node.PrimaryChild()
-
-                    if not node or not node.command:
-                        raise HDTVCommandError("Command not recognized")
-
-                    try:
-                        parser = node.options["parser"]
-                    except KeyError:
-                        parser = None
-
-                    # Parse the commands arguments
-                    if parser:
-                        args = parser.parse_args(args)
-
-                    # Execute the command
-                    node.command(args)
-                except HDTVCommandAbort as msg:
-                    if str(msg):
-                        hdtv.ui.error(str(msg))
-                except (HDTVCommandParserError) as msg:
-                    hdtv.ui.error(str(msg))
-                    if parser:
-                        parser.print_usage()
-                except (HDTVCommandError, BaseException) as msg:
-                    hdtv.ui.error(str(msg))
-                    hdtv.ui.debug(traceback.format_exc())
+                self.ExecPath(path)
         except ValueError as msg:
             hdtv.ui.error(str(msg))
+            command_line._Failed()
         except BaseException as msg:
             hdtv.ui.error(str(msg))
             hdtv.ui.debug(traceback.format_exc())
+            command_line._Failed()
         finally:
             if viewport_locked:
                 __main__.spectra.viewport.UnlockUpdate()
 
+    def ExecPath(self, path):
+        """
+        Execute a single command, given as list of fragments
+        """
+        parser = None
+        try:
+            (node, args) = self.FindNode(path)
+            while node and not node.command:
+                node = node.PrimaryChild()
+
+            if not node or not node.command:
+                raise HDTVCommandError("Command not recognized")
+
+            try:
+                parser = node.options["parser"]
+            except KeyError:
+                parser = None
+
+            # Parse the commands arguments
+            if parser:
+                args = parser.parse_args(args)
+
+            # Execute the command
+            if command_timer.mode == "off":
+                node.command(args)
+            else:
+                with command_timer.Measure(node.FullTitle()):
+                    node.command(args)
+        except HDTVCommandAbort as msg:
+            # Aborts without a message (e.g. after --help) are no failures
+            if str(msg):
+                hdtv.ui.error(str(msg))
+                command_line._Failed()
+        except (HDTVCommandParserError) as msg:
+            hdtv.ui.error(str(msg))
+            if parser:
+                parser.print_usage()
+            command_line._Failed()
+        except (HDTVCommandError, BaseException) as msg:
+            hdtv.ui.error(str(msg))
+            hdtv.ui.debug(traceback.format_exc())
+            command_line._Failed()
+
     def RemoveCommand(self, title):
         """
         Removes the command node specified by the string title.
@@ -478,6 +586,9 @@ class CommandLine(object):
 
         self.session = None
         self.fKeepRunning = True
+        # Number of failed commands; batch jobs may stop at the first one
+        self.fErrors = 0
+        self.fStopOnError = False
         self.exit_handlers = []
 
         if os.sep == "\\":
@@ -609,6 +720,8 @@ class CommandLine(object):
             file.read()
         except IOError as msg:
             hdtv.ui.error("%s" % msg)
+            self._Failed()
+            return
         for line in file.lines:
             hdtv.ui.msg("file> " + line)
             self.DoLine(line)
@@ -624,6 +737,27 @@ class CommandLine(object):
             for filename in glob.glob(path):
                 self.ExecCmdfile(filename)
 
+    def ProfileCmd(self, args):
+        """
+        Execute a command with the profiler and show its hotspots
+        """
+        if not args.command:
+            raise HDTVCommandError("No command given")
+        profiler = cProfile.Profile()
+        profiler.runcall(self.command_tree.ExecPath, args.command)
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.strip_dirs().sort_stats(args.sort).print_stats(args.limit)
+        hdtv.ui.msg(stream.getvalue().strip("\n"))
+
+    def TimingSummary(self):
+        """
+        Print the accumulated command timing (option cli.timing=summary)
+        """
+        if command_timer.mode == "summary" and command_timer.records:
+            hdtv.ui.msg("Command timing:")
+            hdtv.ui.msg(html=str(command_timer.Summary()))
+
     def ExecShell(self, cmd):
         subprocess.call(cmd, shell=True)
 
@@ -656,11 +790,18 @@ class CommandLine(object):
             hdtv.ui.warning("Aborted")
         except HDTVCommandError as msg:
             hdtv.ui.error("%s" % str(msg))
+            self._Failed()
         except SystemExit:
             self.Exit()
         except Exception:
             hdtv.ui.error("Unhandled exception:")
             traceback.print_exc()
+            self._Failed()
+
+    def _Failed(self):
+        self.fErrors += 1
+        if self.fStopOnError:
+            self.fKeepRunning = False
 
     def MainLoop(self):
         # self.fPyMode = False
@@ -770,6 +911,8 @@ class HDTVCompleter(Completer):
 
 command_tree = HDTVCommandTree()
 command_line = CommandLine(command_tree)
+command_timer = hdtv.profiling.CommandTimer()
+command_line.exit_handlers.append(command_line.TimingSummary)
 
 
 def SetInteractiveDict(d):
@@ -778,6 +921,7 @@ def SetInteractiveDict(d):
 
 RegisterInteractive = command_line.RegisterInteractive
 AddCommand = command_tree.AddCommand
+AddLazyPlugin = command_tree.AddLazyPlugin
 ExecCommand = command_tree.ExecCommand
 RemoveCommand = command_tree.RemoveCommand
 SetHistory = command_line.SetHistory
@@ -804,3 +948,41 @@ parser.add_argument(
     "batchfile", nargs="+", type=str, default=None, help="Path of a batch file"
 )
 AddCommand(prog, command_line.ExecCmdfileCmd, level=2, parser=parser, fileargs=True)
+
+
+def _SetTiming(opt):
+    command_timer.mode = opt.Get()
+
+
+hdtv.options.RegisterOption(
+    "cli.timing",
+    hdtv.options.Option(
+        default="off",
+        parse=hdtv.options.parse_choices(hdtv.profiling.CommandTimer.modes),
+        changeCallback=_SetTiming,
+    ),
+)
+
+prog = "profile"
+description = (
+    "Execute a command with the Python profiler and show the functions "
+    "that took the most time. (For the timing of all commands, see the "
+    "option cli.timing.)"
+)
+parser = HDTVOptionParser(prog=prog, description=description)
+parser.add_argument(
+    "-n",
+    "--limit",
+    type=int,
+    default=20,
+    help="number of functions to show (default: %(default)s)",
+)
+parser.add_argument(
+    "-s",
+    "--sort",
+    choices=["cumulative", "tottime", "calls"],
+    default="cumulative",
+    help="sort order (default: %(default)s)",
+)
+parser.add_argument("command", nargs=argparse.REMAINDER, help="command to profile")
+AddCommand(prog, command_line.ProfileCmd, level=2, parser=parser)
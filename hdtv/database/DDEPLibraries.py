@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
 # DDEP database, Decay Data Evaluation Project
 
+import glob
 import json
+import shutil
+import time
 import hdtv.util
+import hdtv.options
+import hdtv.database.cache
 
 try:
     import urllib.request
@@ -13,28 +18,42 @@ import hdtv.ui
 from uncertainties import ufloat
 from hdtv.database.common import *
 
+# Downloaded lara files are stored unchanged in the cache directory, so a
+# directory of lara files (e.g. from another machine) can be imported by
+# simply copying the files.
+cachedir = os.path.join(hdtv.database.cache.cachedir, "ddep")
 
-def SearchNuclide(nuclide):
-    """
-    Opens table of nuclides with peak energies, gives back the peak energies of the nuclide and its intensities.
-    """
+url = "http://www.nucleide.org/DDEP_WG/Nuclides/"
+
+opt_offline = hdtv.options.Option(default=False, parse=hdtv.options.parse_bool)
+hdtv.options.RegisterOption("database.ddep.offline", opt_offline)
+
+# Expiry of cached lara files in days, 0 means never
+opt_expiry = hdtv.options.Option(default=365.0, parse=lambda x: float(x))
+hdtv.options.RegisterOption("database.ddep.expiry", opt_expiry)
+
+# In-memory index of parsed nuclides
+_records = dict()
 
-    out = {"nuclide": nuclide, "transitions": []}
 
+def LaraName(nuclide):
+    """
+    Name of the lara file of nuclide
+    """
     if nuclide == "Ra-226":
         nuclide = "Ra-226D"
+    return str(nuclide) + ".lara.txt"
 
-    try:
-        with urllib.request.urlopen(
-            "http://www.nucleide.org/DDEP_WG/Nuclides/" + str(nuclide) + ".lara.txt"
-        ) as resource:
-            data = resource.read().decode("utf-8")
-    except:
-        raise hdtv.cmdline.HDTVCommandError(
-            "Error looking up nuclide {}".format(nuclide)
-        )
 
-    for line in data.split("\r\n"):
+def ParseLara(data, nuclide):
+    """
+    Parses the content of a lara file, gives back the peak energies of the
+    nuclide and its intensities.
+    """
+
+    out = {"nuclide": nuclide, "transitions": []}
+
+    for line in data.splitlines():
         sep = line.split(" ; ")
 
         if str(sep[0]) == "Half-life (s)":
@@ -62,3 +81,124 @@ def SearchNuclide(nuclide):
             pass
 
     return out
+
+
+def _ReadCache(nuclide):
+    """
+    Returns (data, expired) of the cached lara file, or (None, True)
+    """
+    fname = os.path.join(cachedir, LaraName(nuclide))
+    try:
+        with open(fname, encoding="utf-8") as f:
+            data = f.read()
+        age = time.time() - os.path.getmtime(fname)
+    except OSError:
+        return (None, True)
+    expiry = opt_expiry.Get()
+    return (data, expiry > 0 and age > expiry * 86400.0)
+
+
+def _WriteCache(nuclide, data):
+    fname = os.path.join(cachedir, LaraName(nuclide))
+    try:
+        os.makedirs(cachedir, exist_ok=True)
+        with open(fname + ".tmp", "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(fname + ".tmp", fname)
+    except OSError as err:
+        hdtv.ui.debug("Could not write DDEP cache %s: %s" % (fname, err))
+
+
+def _Download(nuclide):
+    with urllib.request.urlopen(url + LaraName(nuclide)) as resource:
+        return resource.read().decode("utf-8")
+
+
+def Fetch(nuclide, force=False):
+    """
+    Returns the content of the lara file of nuclide, from the cache if
+    possible. Expired files are downloaded again (unless in offline mode);
+    if that fails, the expired file is used.
+    """
+    (data, expired) = _ReadCache(nuclide)
+    if data is not None and not (expired or force):
+        return data
+    if opt_offline.Get():
+        if data is not None:
+            return data
+        raise hdtv.cmdline.HDTVCommandError(
+            "Nuclide {} is not in the DDEP cache (offline mode)".format(nuclide)
+        )
+
+    try:
+        downloaded = _Download(nuclide)
+    except:
+        if data is not None:
+            hdtv.ui.warning(
+                "Could not update nuclide {}, using cached data".format(nuclide)
+            )
+            return data
+        raise hdtv.cmdline.HDTVCommandError(
+            "Error looking up nuclide {}".format(nuclide)
+        )
+    _WriteCache(nuclide, downloaded)
+    return downloaded
+
+
+def SearchNuclide(nuclide):
+    """
+    Opens table of nuclides with peak energies, gives back the peak energies of the nuclide and its intensities.
+    """
+    if nuclide not in _records:
+        _records[nuclide] = ParseLara(Fetch(nuclide), nuclide)
+    data = _records[nuclide]
+    return dict(data, transitions=[dict(t) for t in data["transitions"]])
+
+
+def Prefetch(nuclides, force=False):
+    """
+    Downloads the lara files of nuclides into the cache
+    """
+    for nuclide in nuclides:
+        _records.pop(nuclide, None)
+        Fetch(nuclide, force=force)
+
+
+def ImportDirectory(path):
+    """
+    Copies all lara files in path into the cache. Returns the names of the
+    imported nuclides.
+    """
+    suffix = ".lara.txt"
+    imported = list()
+    for fname in sorted(glob.glob(os.path.join(glob.escape(path), "*" + suffix))):
+        name = os.path.basename(fname)[: -len(suffix)]
+        os.makedirs(cachedir, exist_ok=True)
+        shutil.copyfile(fname, os.path.join(cachedir, os.path.basename(fname)))
+        # Cache stores Ra-226 as Ra-226D (see LaraName)
+        if name == "Ra-226D":
+            name = "Ra-226"
+        _records.pop(name, None)
+        imported.append(name)
+    return imported
+
+
+def CachedNuclides():
+    """
+    Returns the names of all nuclides in the cache
+    """
+    suffix = ".lara.txt"
+    names = list()
+    for fname in sorted(glob.glob(os.path.join(glob.escape(cachedir), "*" + suffix))):
+        name = os.path.basename(fname)[: -len(suffix)]
+        names.append("Ra-226" if name == "Ra-226D" else name)
+    return names
+
+
+def ClearCache():
+    """
+    Removes all cached lara files
+    """
+    _records.clear()
+    for fname in glob.glob(os.path.join(glob.escape(cachedir), "*.lara.txt")):
+        os.remove(fname)
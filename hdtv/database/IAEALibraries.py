@@ -1,35 +1,115 @@
 # -*- coding: utf-8 -*-
 # IAEA database, International Atomic Energy Agency
 
+import bisect
+import copy
 import json
 import hdtv.util
 import hdtv.ui
 from uncertainties import ufloat
 from hdtv.database.common import *
 
-# TODO: integrate this in a class?
+
+class _IAEAIndex(object):
+    """
+    In-memory index of IAEA.json
+
+    The json file is only read on first use. Nuclides are indexed by name,
+    and all transitions of all nuclides are kept sorted by energy for
+    energy-window queries.
+    """
+
+    def __init__(self, fname=None):
+        self.fname = fname
+        self._nuclides = None
+        self._energies = None
+        self._transitions = None
+
+    def _load(self):
+        if self._nuclides is not None:
+            return
+        fname = self.fname or os.path.join(hdtv.datadir, "IAEA.json")
+        with open(fname) as f:
+            alldata = json.load(f)
+
+        nuclides = dict()
+        transitions = list()
+        for data in alldata:
+            # Use ufloat to represent values with uncertainties
+            data["transitions"] = [
+                {
+                    "energy": ufloat(t["energy"], t["energy_uncertainty"]),
+                    "intensity": ufloat(t["intensity"], t["intensity_uncertainty"]),
+                }
+                for t in data["transitions"]
+            ]
+            data["halflife"] = ufloat(data["halflife"], data["halflife_uncertainty"])
+            del data["halflife_uncertainty"]
+            nuclides[data["nuclide"]] = data
+            transitions.extend(
+                (t["energy"].nominal_value, data["nuclide"], t)
+                for t in data["transitions"]
+            )
+
+        transitions.sort(key=lambda t: t[0])
+        self._energies = [t[0] for t in transitions]
+        self._transitions = [(t[1], t[2]) for t in transitions]
+        self._nuclides = nuclides
+
+    def __contains__(self, nuclide):
+        self._load()
+        return nuclide in self._nuclides
+
+    def get(self, nuclide):
+        """
+        Return the data of a nuclide. The returned dict and its list of
+        transitions are copies, so callers may modify them.
+        """
+        self._load()
+        try:
+            data = self._nuclides[nuclide]
+        except KeyError:
+            errorText = "There is no nuclide called " + nuclide + " in the table."
+            raise hdtv.cmdline.HDTVCommandError(errorText)
+        data = copy.copy(data)
+        data["transitions"] = [copy.copy(t) for t in data["transitions"]]
+        return data
+
+    def window(self, emin, emax):
+        """
+        Return all transitions with emin <= energy <= emax, sorted by energy
+        """
+        self._load()
+        lo = bisect.bisect_left(self._energies, emin)
+        hi = bisect.bisect_right(self._energies, emax)
+        result = list()
+        for (nuclide, transition) in self._transitions[lo:hi]:
+            transition = copy.copy(transition)
+            transition["nuclide"] = nuclide
+            result.append(transition)
+        return result
+
+
+_index = _IAEAIndex()
 
 
 def SearchNuclide(nuclide):
-    # Get all data as dict from json file
-    alldata = json.loads(open(os.path.join(hdtv.datadir, "IAEA.json")).read())
-
-    # Select nuclide
-    data = next(x for x in alldata if x["nuclide"] == nuclide)
-    if not data:
-        errorText = "There is no nuclide called " + nuclide + " in the table."
-        raise hdtv.cmdline.HDTVCommandError(errorText)
-
-    # Use ufloat to represent values with uncertainties
-    transitions = [
-        {
-            "energy": ufloat(t["energy"], t["energy_uncertainty"]),
-            "intensity": ufloat(t["intensity"], t["intensity_uncertainty"]),
-        }
-        for t in data["transitions"]
-    ]
-    data["transitions"] = transitions
-    data["halflife"] = ufloat(data["halflife"], data["halflife_uncertainty"])
-    del data["halflife_uncertainty"]
-
-    return data
+    """
+    Return halflife, reference and transitions of a nuclide
+    """
+    return _index.get(nuclide)
+
+
+def SearchNuclides(nuclides):
+    """
+    Return a list with the data of each nuclide (see SearchNuclide)
+    """
+    return [_index.get(nuclide) for nuclide in nuclides]
+
+
+def SearchEnergy(energy, fuzziness=1.0):
+    """
+    Return the transitions of all nuclides within energy +- fuzziness. Each
+    transition carries the name of its nuclide in the "nuclide" key.
+    """
+    return _index.window(energy - fuzziness, energy + fuzziness)
@@ -5,6 +5,7 @@
 from uncertainties import ufloat, ufloat_fromstr
 
 from hdtv.database.common import *
+from hdtv.database.common import _MakeUfloat, _ParseUfloat, _ReadCSV
 import hdtv.cmdline
 import hdtv.ui
 
@@ -62,7 +63,33 @@ class PGAAGamma(Gamma):
         return text
 
 
-class PGAAlib_IKI2000(GammaLib):
+class _PGAALib(GammaLib):
+    """
+    Common base of the PGAA libraries: data is read from the (cached)
+    columnar form of the csv file, gammas are created on first access.
+    """
+
+    def _parse(self, csvfile):
+        raise NotImplementedError
+
+    def open(self):
+
+        if self.opened:
+            return True
+
+        self._setColumns(hdtv.database.cache.LoadColumns(self.csvfile, self._parse))
+
+        # The first gamma of the comparator nuclide normalizes k0 (see PGAAGamma)
+        (Z, A) = self.k0_comp
+        for pos in self._findExact("z", Z):
+            if self._columns["a"][pos] == A:
+                self._entry(pos)
+                break
+
+        self.opened = True
+
+
+class PGAAlib_IKI2000(_PGAALib):
     """
     PGAA library of the Institute of Isotopes, Hungarian Academy of Sciences, Budapest
     """
@@ -106,52 +133,32 @@ class PGAAlib_IKI2000(GammaLib):
         self._has_header = has_header
         self.k0_comp = k0_comp
 
-    def open(self):
-
-        if self.opened:
-            return True
-
-        try:
-            datfile = open(self.csvfile, "r", encoding="utf-8")
-        except TypeError:
-            datfile = open(self.csvfile, "rb")
-
-        reader = csv.reader(datfile)
-
-        if self._has_header:
-            next(reader)
-
-        try:
-            for line in reader:
-                Z = int(line[0])
-                A = int(line[1])
-                energy = ufloat(float(line[2]), float(line[3]))
-                sigma = ufloat(float(line[4]), float(line[5]))
-                intensity = ufloat(float(line[6]), 0) / 100.0
-                try:
-                    halflife = ufloat(float(line[7]), 0)
-                except ValueError:
-                    halflife = None
-                gamma = PGAAGamma(
-                    Nuclides(Z, A)[0],
-                    energy,
-                    sigma=sigma,
-                    intensity=intensity,
-                    halflife=halflife,
-                    k0_comp=self.k0_comp,
-                )
-                self.append(gamma)
-        except csv.Error as e:
-            raise HDTVCommandAbort(
-                "file %s, line %d: %s" % (self.csvfile, reader.line_num, e)
-            )
-        else:
-            self.opened = True
-        finally:
-            datfile.close()
+    def _parse(self, csvfile):
+        keys = ("z", "a", "energy", "energy_err", "sigma", "sigma_err")
+        columns = {key: list() for key in keys + ("intensity", "halflife")}
+        for line in _ReadCSV(csvfile, self._has_header):
+            for (key, value) in zip(keys, line):
+                columns[key].append(int(value) if key in ("z", "a") else float(value))
+            columns["intensity"].append(float(line[6]) / 100.0)
+            try:
+                columns["halflife"].append(float(line[7]))
+            except ValueError:
+                columns["halflife"].append(math.nan)
+        return columns
+
+    def _makeEntry(self, pos):
+        col = {key: value[pos].item() for (key, value) in self._columns.items()}
+        return PGAAGamma(
+            Nuclides(col["z"], col["a"])[0],
+            ufloat(col["energy"], col["energy_err"]),
+            sigma=ufloat(col["sigma"], col["sigma_err"]),
+            intensity=ufloat(col["intensity"], 0),
+            halflife=_MakeUfloat(col["halflife"], 0),
+            k0_comp=self.k0_comp,
+        )
 
 
-class PromptGammas(GammaLib):
+class PromptGammas(_PGAALib):
     """
     Extensive IAEA Prompt-Gamma library
     """
@@ -182,35 +189,26 @@ class PromptGammas(GammaLib):
         self._has_header = has_header
         self.k0_comp = k0_comp
 
-    def open(self):
-
-        if self.opened:
-            return True
-
-        try:
-            datfile = open(self.csvfile, "r", encoding="utf-8")
-        except TypeError:
-            datfile = open(self.csvfile, "rb")
-
-        reader = csv.reader(datfile)
-
-        if self._has_header:
-            next(reader)
-
-        try:
-            for line in reader:
-                A = int(line[0])
-                Z = int(line[1])
-                energy = ufloat_fromstr(line[2])
-                sigma = ufloat_fromstr(line[3])
-                k0 = ufloat_fromstr(line[4])
-                gamma = PGAAGamma(
-                    Nuclides(Z, A)[0], energy, sigma=sigma, k0=k0, k0_comp=self.k0_comp
-                )
-                self.append(gamma)
-        except csv.Error as e:
-            hdtv.ui.error("file %s, line %d: %s" % (self.csvfile, reader.line_num, e))
-        else:
-            self.opened = True
-        finally:
-            datfile.close()
+    def _parse(self, csvfile):
+        columns = {"a": list(), "z": list()}
+        for key in ("energy", "sigma", "k0"):
+            columns[key] = list()
+            columns[key + "_err"] = list()
+        for line in _ReadCSV(csvfile, self._has_header):
+            columns["a"].append(int(line[0]))
+            columns["z"].append(int(line[1]))
+            for (key, string) in zip(("energy", "sigma", "k0"), line[2:5]):
+                (value, error) = _ParseUfloat(string)
+                columns[key].append(value)
+                columns[key + "_err"].append(error)
+        return columns
+
+    def _makeEntry(self, pos):
+        col = {key: value[pos].item() for (key, value) in self._columns.items()}
+        return PGAAGamma(
+            Nuclides(col["z"], col["a"])[0],
+            ufloat(col["energy"], col["energy_err"]),
+            sigma=_MakeUfloat(col["sigma"], col["sigma_err"]),
+            k0=_MakeUfloat(col["k0"], col["k0_err"]),
+            k0_comp=self.k0_comp,
+        )
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+# HDTV - A ROOT-based spectrum analysis software
+#  Copyright (C) 2006-2009  The HDTV development team (see file AUTHORS)
+#
+# This file is part of HDTV.
+#
+# HDTV is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 2 of the License, or (at your
+# option) any later version.
+#
+# HDTV is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HDTV; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+
+"""
+Precompiled columnar cache for the bundled databases
+
+Parsing the text databases (and the uncertainties therein) is slow, so the
+parsed data is stored as NumPy arrays (one per column) in a .npz file. The
+cache file name contains a checksum of the source file, so a cache becomes
+invalid as soon as the source changes. Precompiled caches are looked up
+next to the source file first and in the user cache directory second; new
+caches are always written to the user cache directory.
+"""
+
+import glob
+import hashlib
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+import hdtv.ui
+
+# Increase if the layout of the cached columns changes
+CACHE_VERSION = 1
+
+cachedir = os.path.join(
+    os.getenv("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "hdtv",
+    "database",
+)
+
+
+def Checksum(fname):
+    """
+    SHA1 checksum of a file
+    """
+    sha1 = hashlib.sha1()
+    with open(fname, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def CacheName(srcfile):
+    """
+    Name of the cache file for srcfile
+    """
+    return "%s-%d-%s.npz" % (
+        os.path.basename(srcfile),
+        CACHE_VERSION,
+        Checksum(srcfile),
+    )
+
+
+def LoadColumns(srcfile, parse):
+    """
+    Return the columns of srcfile as dict of NumPy arrays.
+
+    parse(srcfile) is only called if there is no valid cache. It must return
+    a dict of equally long sequences (missing float values should be nan).
+    """
+    name = CacheName(srcfile)
+    for path in (os.path.dirname(srcfile), cachedir):
+        fname = os.path.join(path, name)
+        if not os.path.isfile(fname):
+            continue
+        try:
+            with np.load(fname, allow_pickle=False) as data:
+                return {key: data[key] for key in data.files}
+        except (OSError, ValueError, zipfile.BadZipFile) as err:
+            hdtv.ui.debug("Ignoring invalid database cache %s: %s" % (fname, err))
+
+    columns = {key: np.asarray(value) for (key, value) in parse(srcfile).items()}
+    WriteColumns(os.path.join(cachedir, name), columns)
+    return columns
+
+
+def WriteColumns(fname, columns):
+    """
+    Atomically write columns to fname and remove stale caches of the same
+    source. Failure to write the cache is not an error.
+    """
+    dirname = os.path.dirname(fname)
+    try:
+        os.makedirs(dirname, exist_ok=True)
+        (fd, tmpname) = tempfile.mkstemp(dir=dirname, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **columns)
+            os.replace(tmpname, fname)
+        except BaseException:
+            os.remove(tmpname)
+            raise
+    except OSError as err:
+        hdtv.ui.debug("Could not write database cache %s: %s" % (fname, err))
+        return
+
+    stem = os.path.basename(fname).rsplit("-", 2)[0]
+    for stale in glob.glob(os.path.join(dirname, glob.escape(stem) + "-*.npz")):
+        if stale != fname and os.path.basename(stale).rsplit("-", 2)[0] == stem:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+def ClearCache():
+    """
+    Remove all cached database files from the user cache directory
+    """
+    for fname in glob.glob(os.path.join(cachedir, "*.npz")):
+        os.remove(fname)
@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
+import bisect
 import csv
+import math
 import os
-from uncertainties import ufloat_fromstr
+import numpy as np
+from uncertainties import ufloat, ufloat_fromstr
 import hdtv.cmdline
 import hdtv.ui
+import hdtv.database.cache
 
 
 class _Element(object):
@@ -42,39 +46,86 @@ class _Element(object):
         return text
 
 
-class _Elements(list):
+def _ParseUfloat(string):
     """
-    Read and hold complete elements list
+    Parse value with uncertainty (e.g. "1.0078(4)") to a (value, error)
+    tuple, (nan, nan) if the string is empty or invalid
     """
+    try:
+        value = ufloat_fromstr(string.strip())
+    except ValueError:
+        return (math.nan, math.nan)
+    return (value.nominal_value, value.std_dev)
 
-    def __init__(self, csvfile=os.path.join(hdtv.datadir, "elements.dat")):
 
-        super(_Elements, self).__init__()
+def _MakeUfloat(value, error):
+    """
+    Inverse of _ParseUfloat: None for nan values
+    """
+    if math.isnan(value):
+        return None
+    return ufloat(value, error)
 
-        tmp = list()
 
+def _ReadCSV(csvfile, has_header=True):
+    """
+    Iterate over the lines of a csv file, skipping the header. Raises
+    HDTVCommandAbort if the file is malformed, so that a truncated database
+    is neither used nor cached.
+    """
+    with open(csvfile, "r", encoding="utf-8") as datfile:
+        reader = csv.reader(datfile)
         try:
-            try:
-                datfile = open(csvfile, "r", encoding="utf-8")
-            except TypeError:
-                datfile = open(csvfile, "rb")
-            reader = csv.reader(datfile)
-            next(reader)  # Skip header
-
+            if has_header:
+                next(reader)  # Skip header
             for line in reader:
-                Z = int(line[0])
-                Symbol = line[1].strip()
-                Name = line[2].strip()
-                try:
-                    Mass = ufloat_fromstr(line[3].strip())
-                except ValueError:
-                    Mass = None
-                element = _Element(Z, Symbol, Name, Mass)
-                tmp.append(element)
+                yield line
         except csv.Error as err:
-            hdtv.ui.error("file %s, line %d: %s" % (csvfile, reader.line_num, err))
-        finally:
-            datfile.close()
+            raise hdtv.cmdline.HDTVCommandAbort(
+                "file %s, line %d: %s" % (csvfile, reader.line_num, err)
+            )
+
+
+class _Elements(list):
+    """
+    Read and hold complete elements list
+
+    The list is read from the (cached) data file on first access.
+    """
+
+    def __init__(self, csvfile=os.path.join(hdtv.datadir, "elements.dat")):
+
+        super(_Elements, self).__init__()
+        self.csvfile = csvfile
+        self._loaded = False
+
+    @staticmethod
+    def _parse(csvfile):
+        columns = {"z": [], "symbol": [], "name": [], "m": [], "m_err": []}
+        for line in _ReadCSV(csvfile):
+            columns["z"].append(int(line[0]))
+            columns["symbol"].append(line[1].strip())
+            columns["name"].append(line[2].strip())
+            (m, m_err) = _ParseUfloat(line[3])
+            columns["m"].append(m)
+            columns["m_err"].append(m_err)
+        return columns
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+
+        columns = hdtv.database.cache.LoadColumns(self.csvfile, self._parse)
+        tmp = list()
+        for (Z, Symbol, Name, M, M_err) in zip(
+            columns["z"].tolist(),
+            columns["symbol"].tolist(),
+            columns["name"].tolist(),
+            columns["m"].tolist(),
+            columns["m_err"].tolist(),
+        ):
+            tmp.append(_Element(Z, Symbol, Name, _MakeUfloat(M, M_err)))
 
         # Now store elements finally
         maxZ = max(tmp, key=lambda x: x.z)  # Get highest Z
@@ -84,8 +135,18 @@ class _Elements(list):
         for e in tmp:
             self[e.z] = e
 
+    def __iter__(self):
+        self._load()
+        return super(_Elements, self).__iter__()
+
+    def __len__(self):
+        self._load()
+        return super(_Elements, self).__len__()
+
     def __call__(self, Z=None, symbol=None, name=None):
 
+        self._load()
+
         if symbol:
             for z in self:
                 try:
@@ -118,6 +179,8 @@ class _Elements(list):
         return super(_Elements, self).__setitem__(index, value)
 
     def __getitem__(self, index):
+        self._load()
+
         if index == 0:
             return None
 
@@ -171,43 +234,70 @@ class _Nuclide(_Element):
 
 
 class _Nuclides(object):
-    def __init__(self, csvfile=os.path.join(hdtv.datadir, "nuclides.dat")):
+    """
+    Read and hold complete nuclide list
 
-        self._storage = dict()
-        try:
-            try:
-                datfile = open(csvfile, "r", encoding="utf-8")
-            except TypeError:
-                datfile = open(csvfile, "rb")
-            reader = csv.reader(datfile)
-            next(reader)  # Skip header
+    The list is read from the (cached) data file on first access.
+    """
 
-            for line in reader:
-                Z = int(line[0].strip())
-                element = Elements(Z)
-                A = int(line[1].strip())
-                if line[2].strip():
-                    abd = ufloat_fromstr(line[2].strip()) / 100.0
-                else:
-                    abd = None
-                if line[3].strip():
-                    M = ufloat_fromstr(line[3].strip())
-                else:
-                    M = None
-                if line[4].strip():
-                    sigma = ufloat_fromstr(line[4].strip())
-                else:
-                    sigma = None
-
-                if Z not in self._storage:
-                    self._storage[Z] = dict()
-                self._storage[Z][A] = _Nuclide(
-                    element, A, abundance=abd, sigma=sigma, M=M
+    def __init__(self, csvfile=os.path.join(hdtv.datadir, "nuclides.dat")):
+
+        self.csvfile = csvfile
+        self._data = None
+
+    @staticmethod
+    def _parse(csvfile):
+        columns = {"z": [], "a": []}
+        for key in ("abundance", "m", "sigma"):
+            columns[key] = []
+            columns[key + "_err"] = []
+        for line in _ReadCSV(csvfile):
+            columns["z"].append(int(line[0].strip()))
+            columns["a"].append(int(line[1].strip()))
+            for (key, string) in zip(("abundance", "m", "sigma"), line[2:5]):
+                (value, error) = _ParseUfloat(string)
+                columns[key].append(value)
+                columns[key + "_err"].append(error)
+        return columns
+
+    def _get_storage(self):
+        if self._data is not None:
+            return self._data
+
+        self._data = dict()
+        columns = hdtv.database.cache.LoadColumns(self.csvfile, self._parse)
+        for (Z, A, abd, abd_err, M, M_err, sigma, sigma_err) in zip(
+            *[
+                columns[key].tolist()
+                for key in (
+                    "z",
+                    "a",
+                    "abundance",
+                    "abundance_err",
+                    "m",
+                    "m_err",
+                    "sigma",
+                    "sigma_err",
                 )
-        except csv.Error as e:
-            hdtv.ui.error("file %s, line %d: %s" % (csvfile, reader.line_num, e))
-        finally:
-            datfile.close()
+            ]
+        ):
+            element = Elements(Z)
+            abd = _MakeUfloat(abd, abd_err)
+            if abd is not None:
+                abd = abd / 100.0
+
+            if Z not in self._data:
+                self._data[Z] = dict()
+            self._data[Z][A] = _Nuclide(
+                element,
+                A,
+                abundance=abd,
+                sigma=_MakeUfloat(sigma, sigma_err),
+                M=_MakeUfloat(M, M_err),
+            )
+        return self._data
+
+    _storage = property(_get_storage)
 
     def __call__(self, Z=None, A=None, symbol=None, name=None):
         """
@@ -370,6 +460,150 @@ class GammaLib(list):
         list.__init__(self)
         self.fuzziness = fuzziness  # Fuzzyness for energy identification
         self.opened = False
+        self._columns = dict()
+        self._clearIndex()
+
+    def _setColumns(self, columns):
+        """
+        Fill library from columnar data (dict of NumPy arrays). The entries
+        are only created when they are accessed for the first time.
+        """
+        self._columns = dict(columns)
+        size = len(next(iter(self._columns.values()), []))
+        list.extend(self, [None] * size)
+        self._clearIndex()
+
+    def _makeEntry(self, pos):
+        """
+        Create library entry from row pos of the columnar data
+        """
+        raise NotImplementedError
+
+    def _entry(self, pos):
+        entry = list.__getitem__(self, pos)
+        if entry is None:
+            entry = self._makeEntry(pos)
+            list.__setitem__(self, pos, entry)
+        return entry
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._entry(pos) for pos in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return self._entry(index)
+
+    def __iter__(self):
+        for pos in range(len(self)):
+            yield self._entry(pos)
+
+    def _getColumn(self, key):
+        """
+        Column of the columnar data for key, or None if not available
+        """
+        if key in self._columns:
+            return self._columns[key]
+        if key == "symbol" and "z" in self._columns:
+            z = self._columns["z"].tolist()
+            symbols = {Z: Elements(Z).symbol for Z in set(z)}
+            self._columns[key] = np.array([symbols[Z] for Z in z])
+            return self._columns[key]
+        if key == "nuclide" and "a" in self._columns:
+            a = self._columns["a"].tolist()
+            symbols = self._getColumn("symbol")
+            if symbols is None:
+                return None
+            self._columns[key] = np.array(
+                ["%d-%s" % (A, symbol) for (A, symbol) in zip(a, symbols.tolist())]
+            )
+            return self._columns[key]
+        return None
+
+    def _clearIndex(self):
+        """
+        Drop all lookup indices, they are rebuilt on demand
+        """
+        self._indexSize = len(self)
+        self._sortedIndex = dict()
+        self._hashIndex = dict()
+
+    def _checkIndex(self):
+        """
+        Invalidate indices if the library has changed since they were built
+        """
+        if self._indexSize != len(self):
+            self._clearIndex()
+
+    def _getSortedIndex(self, key):
+        """
+        Sorted index for float fields: a tuple of the sorted (nominal)
+        values and the corresponding positions in the library. Entries
+        without a value for this field are not indexed.
+        """
+        self._checkIndex()
+        try:
+            return self._sortedIndex[key]
+        except KeyError:
+            pass
+        column = self._getColumn(key)
+        if column is not None and column.dtype.kind == "f":
+            positions = np.flatnonzero(~np.isnan(column))
+            order = np.argsort(column[positions], kind="stable")
+            index = (column[positions][order].tolist(), positions[order].tolist())
+        else:
+            pairs = list()
+            for (pos, entry) in enumerate(self):
+                value = getattr(entry, key, None)
+                value = getattr(value, "nominal_value", value)
+                if value is None:
+                    continue
+                pairs.append((float(value), pos))
+            pairs.sort()
+            index = ([p[0] for p in pairs], [p[1] for p in pairs])
+        self._sortedIndex[key] = index
+        return index
+
+    def _getHashIndex(self, key):
+        """
+        Hash index for integer and string fields (strings are lowercase):
+        a dict from value to list of positions in the library.
+        """
+        self._checkIndex()
+        try:
+            return self._hashIndex[key]
+        except KeyError:
+            pass
+        column = self._getColumn(key)
+        if column is not None:
+            values = column.tolist()
+        elif key == "nuclide":
+            values = [entry.nuclide.ID for entry in self]
+        else:
+            values = [getattr(entry, key, None) for entry in self]
+        index = dict()
+        for (pos, value) in enumerate(values):
+            if isinstance(value, str):
+                value = value.lower()
+            index.setdefault(value, list()).append(pos)
+        self._hashIndex[key] = index
+        return index
+
+    def _findRange(self, key, low, high):
+        """
+        Positions of all entries with low <= key <= high
+        """
+        (values, positions) = self._getSortedIndex(key)
+        first = bisect.bisect_left(values, low)
+        last = bisect.bisect_right(values, high)
+        return positions[first:last]
+
+    def _findExact(self, key, value):
+        """
+        Positions of all entries with key == value
+        """
+        if isinstance(value, str):
+            value = value.lower()
+        return self._getHashIndex(key).get(value, [])
 
     def find(self, fuzziness=None, sort_key=None, sort_reverse=False, **args):
         """
@@ -381,7 +615,12 @@ class GammaLib(list):
 
          * sort_key: key to sort
          * sort_reverse: sort_reverse
+         * nuclide: nuclide ID (e.g. "56-Fe")
          * "key: value" : key value pairs to find
+
+        Lookups use sorted indices for float fields and hash indices
+        for integer and string fields. Unless sorted, results are returned
+        in library order.
         """
         if not self.opened:
             self.open()
@@ -396,9 +635,12 @@ class GammaLib(list):
             fields_lower[key.lower()] = conv
 
         for (key, value) in list(args.items()):
-            conv = fields_lower[key.lower()]
             if value is None:
                 continue
+            if key.lower() == "nuclide":
+                args_lower["nuclide"] = value
+                continue
+            conv = fields_lower[key.lower()]
             args_lower[key.lower()] = conv(value)
 
         # Prepare find args
@@ -411,28 +653,33 @@ class GammaLib(list):
             except KeyError:
                 pass
 
-        # Do the search
-        results = self[:]
-
-        if fuzziness is None:
-            fuzziness = self.fuzziness
+        nuclide = args_lower.get("nuclide")
+        if nuclide is not None:
+            fargs["nuclide"] = str(getattr(nuclide, "ID", nuclide))
 
         if not fargs:
             return []
 
+        # Do the search
+        matches = None
         for (key, value) in list(fargs.items()):
             if value is None:
                 continue
-            if isinstance(value, int):
-                results = [x for x in results if getattr(x, key) == value]
-            elif isinstance(value, str):  # Do lowercase comparison for strings
-                results = [
-                    x for x in results if getattr(x, key).lower() == value.lower()
-                ]
+            if isinstance(value, (int, str)):
+                positions = self._findExact(key, value)
             else:  # Do fuzzy compare
-                results = [
-                    x for x in results if abs(getattr(x, key) - value) <= fuzziness
-                ]
+                positions = self._findRange(key, value - fuzziness, value + fuzziness)
+            if matches is None:
+                matches = set(positions)
+            else:
+                matches.intersection_update(positions)
+            if not matches:
+                break
+
+        if matches is None:
+            results = self[:]
+        else:
+            results = [self[pos] for pos in sorted(matches)]
 
         # Sort
         try:
@@ -19,12 +19,26 @@
 # along with HDTV; if not, write to the Free Software Foundation,
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
 
+import bisect
+
 import hdtv.cal
 import hdtv.color
 import hdtv.ui
 
 
 class Drawable(object):
+    # Subclasses which are created in large numbers (e.g. peaks) can do
+    # without an instance dict by defining __slots__ themselves
+    __slots__ = (
+        "viewport",
+        "displayObj",
+        "_active",
+        "_cal",
+        "_activeColor",
+        "_passiveColor",
+        "_ID",
+    )
+
     def __init__(self, color=None, cal=None):
         self.viewport = None
         # displayObj will be created when calling Draw
@@ -147,6 +161,101 @@ class Drawable(object):
             self.displayObj.Hide()
 
 
+class IDIndex(object):
+    """
+    Set of IDs, which is kept sorted for ordered access and navigation.
+    Membership tests are hashed, insertion and removal take O(log n)
+    comparisons.
+
+    IDs are not totally ordered (an ID without minor neither compares
+    smaller nor larger than one of the same major with a minor), so the
+    index is sorted by explicit keys, in which a missing major or minor
+    comes first.
+    """
+
+    def __init__(self, ids=()):
+        self._set = set(ids)
+        self._sorted = sorted(self._set, key=self._Key)
+        self._keys = [self._Key(ID) for ID in self._sorted]
+
+    @staticmethod
+    def _Key(ID):
+        return (
+            -1 if ID.major is None else ID.major,
+            -1 if ID.minor is None else ID.minor,
+        )
+
+    def __contains__(self, ID):
+        return ID in self._set
+
+    def __len__(self):
+        return len(self._set)
+
+    def __iter__(self):
+        # iterate over a copy, so the index may be changed meanwhile
+        return iter(list(self._sorted))
+
+    def __getitem__(self, index):
+        return self._sorted[index]
+
+    def add(self, ID):
+        if ID not in self._set:
+            self._set.add(ID)
+            key = self._Key(ID)
+            i = bisect.bisect_right(self._keys, key)
+            self._keys.insert(i, key)
+            self._sorted.insert(i, ID)
+
+    def discard(self, ID):
+        if ID in self._set:
+            i = self.index(ID)
+            del self._sorted[i]
+            del self._keys[i]
+            self._set.remove(ID)
+
+    def clear(self):
+        self._set.clear()
+        del self._sorted[:]
+        del self._keys[:]
+
+    def index(self, ID):
+        """
+        Position of ID in the sorted IDs; raises ValueError if ID is not
+        contained
+        """
+        if ID not in self._set:
+            raise ValueError("%s not in index" % ID)
+        # Different IDs may have the same key (e.g. 1 and 1.0), so look for
+        # the exact one from there
+        return self._sorted.index(ID, bisect.bisect_left(self._keys, self._Key(ID)))
+
+    def sorted(self):
+        """
+        Returns a sorted list of the IDs
+        """
+        return list(self._sorted)
+
+    def range(self, start, stop):
+        """
+        Returns a sorted list of the IDs with start <= ID <= stop
+        """
+        lo = bisect.bisect_left(self._keys, self._Key(start))
+        hi = bisect.bisect_right(self._keys, self._Key(stop))
+        return [ID for ID in self._sorted[lo:hi] if start <= ID <= stop]
+
+    def next(self, ID):
+        """
+        ID following ID (cyclic); raises ValueError if ID is not contained
+        """
+        return self._sorted[(self.index(ID) + 1) % len(self._sorted)]
+
+    def prev(self, ID):
+        """
+        ID preceding ID (cyclic); raises ValueError if ID is not contained
+        """
+        return self._sorted[self.index(ID) - 1]
+
+
 class DrawableManager(object):
     """
     This class provides some handy functions to manage a collection of
@@ -157,7 +266,13 @@ class DrawableManager(object):
         self.viewport = viewport
         # dictionary to store the drawable objects
         self.dict = dict()
-        self.visible = set()
+        # sorted indices of the IDs in dict and of the visible ones
+        self.sortedIDs = IDIndex()
+        self.visible = IDIndex()
+        # number of IDs for each major, and a lower bound of the first
+        # free major
+        self._majors = dict()
+        self._freeMajor = 0
         self.activeID = None
         # This should keep track of ID for nextID, prevID
         self._iteratorID = self.activeID
@@ -169,8 +284,7 @@ class DrawableManager(object):
     @property
     def ids(self):
         # return sorted list of ids
-        ids = sorted(self.dict.keys())
-        return ids
+        return self.sortedIDs.sorted()
 
     # active property
     def _set_active(self, state):
@@ -188,7 +302,7 @@ class DrawableManager(object):
         """
         Activates the object with ID
         """
-        if ID is not None and ID not in self.ids:
+        if ID is not None and ID not in self.dict:
             raise KeyError
         if self.viewport:
             self.viewport.LockUpdate()
@@ -242,6 +356,9 @@ class DrawableManager(object):
         if ID is None:
             ID = self.GetFreeID()
         self._iteratorID = ID
+        if ID not in self.dict:
+            self.sortedIDs.add(ID)
+            self._majors[ID.major] = self._majors.get(ID.major, 0) + 1
         self.dict[ID] = obj
         obj.ID = ID
         if self.viewport:
@@ -261,29 +378,38 @@ class DrawableManager(object):
         self.visible.discard(ID)
         try:
             obj = self.dict.pop(ID)
-            obj.ID = None
-            return obj
         except KeyError:
             hdtv.ui.warning("ID %s not found." % ID)
+            return
+        self.sortedIDs.discard(ID)
+        self._majors[ID.major] -= 1
+        if self._majors[ID.major] == 0:
+            del self._majors[ID.major]
+            if isinstance(ID.major, int):
+                self._freeMajor = min(self._freeMajor, ID.major)
+        obj.ID = None
+        return obj
 
     def Clear(self):
         """
         Clear dict and reset everything
         """
         self.activeID = None
-        self._iterator = self.activeID
+        self._iteratorID = self.activeID
         self.visible.clear()
+        self.sortedIDs.clear()
         self.dict.clear()
+        self._majors.clear()
+        self._freeMajor = 0
 
     def GetFreeID(self):
         """
         Finds the first free index
         """
-        ids = [i.major for i in self.ids]
-        ID = 0
-        while ID in ids:
-            ID += 1
-        return hdtv.util.ID(major=ID)
+        # All majors below _freeMajor are in use, so this is amortized O(1)
+        while self._freeMajor in self._majors:
+            self._freeMajor += 1
+        return hdtv.util.ID(major=self._freeMajor)
 
     def Draw(self, viewport):
         """
@@ -455,32 +581,16 @@ class DrawableManager(object):
         return self._lastID(onlyVisible=True)
 
     def _firstID(self, onlyVisible=False):
-        if onlyVisible:
-            ids = list(self.visible)
-        else:
-            ids = list(self.dict.keys())
-        ids.sort()
-
-        try:
-            firstID = min(ids)
-        except ValueError:
-            firstID = self.activeID
+        ids = self.visible if onlyVisible else self.sortedIDs
+        firstID = ids[0] if ids else self.activeID
 
         self._iteratorID = firstID
         hdtv.ui.debug("hdtv.drawable.DrawableManager: firstID=" + str(firstID), level=6)
         return firstID
 
     def _lastID(self, onlyVisible=False):
-        if onlyVisible:
-            ids = list(self.visible)
-        else:
-            ids = list(self.dict.keys())
-        ids.sort()
-
-        try:
-            lastID = max(ids)
-        except ValueError:
-            lastID = self.activeID
+        ids = self.visible if onlyVisible else self.sortedIDs
+        lastID = ids[-1] if ids else self.activeID
 
         self._iteratorID = lastID
         hdtv.ui.debug("hdtv.drawable.DrawableManager: lastID=" + str(lastID), level=6)
@@ -490,16 +600,9 @@ class DrawableManager(object):
         """
         Get next ID after _iteratorID
         """
+        ids = self.visible if onlyVisible else self.sortedIDs
         try:
-            if onlyVisible:
-                ids = list(self.visible)
-            else:
-                ids = list(self.dict.keys())
-
-            ids.sort()
-            nextIndex = (ids.index(self._iteratorID) + 1) % len(ids)
-            nextID = ids[nextIndex]
-
+            nextID = ids.next(self._iteratorID)
         except ValueError:
             nextID = self.activeID if self.activeID is not None else self.firstID
 
@@ -511,15 +614,9 @@ class DrawableManager(object):
         """
         Get previous ID before _iteratorID
         """
+        ids = self.visible if onlyVisible else self.sortedIDs
         try:
-            if onlyVisible:
-                ids = list(self.visible)
-            else:
-                ids = list(self.dict.keys())
-
-            ids.sort()
-            prevIndex = (ids.index(self._iteratorID) - 1) % len(ids)
-            prevID = ids[prevIndex]
+            prevID = ids.prev(self._iteratorID)
         except ValueError:
             prevID = self.activeID if self.activeID is not None else self.lastID
 
@@ -537,9 +634,8 @@ class DrawableManager(object):
         if nb > len(self.dict):
             self.ShowAll()
             return
-        ids = self.ids
-        index = ids.index(self.nextID)
-        ids = ids[index : index + nb]
+        index = self.sortedIDs.index(self.nextID)
+        ids = self.sortedIDs[index : index + nb]
         self.ShowObjects(ids, clear=True)
         return ids
 
@@ -553,9 +649,8 @@ class DrawableManager(object):
         if nb > len(self.dict):
             self.ShowAll()
             return
-        ids = self.ids
-        index = ids.index(self.prevID)
-        ids = ids[index : index + nb]
+        index = self.sortedIDs.index(self.prevID)
+        ids = self.sortedIDs[index : index + nb]
         self.ShowObjects(ids, clear=True)
         return ids
 
@@ -565,8 +660,7 @@ class DrawableManager(object):
         """
         if nb > len(self.dict):
             return self.ShowAll()
-        ids = self.ids
-        ids = ids[:nb]
+        ids = self.sortedIDs[:nb]
         self.ShowObjects(ids, clear=True)
         return ids
 
@@ -577,7 +671,6 @@ class DrawableManager(object):
         if nb > len(self.dict):
             self.ShowAll()
             return
-        ids = self.ids
-        ids = ids[len(ids) - nb :]
+        ids = self.sortedIDs[len(self.sortedIDs) - nb :]
         self.ShowObjects(ids, clear=True)
         return ids
@@ -83,6 +83,23 @@ class View1D(object):
         self.i = 0.1
 
 
+class NullViewport(View1D):
+    """
+    Viewport of headless sessions. It evaluates to False, so that
+    drawables treat it like no viewport at all and do not create
+    display objects, while unconditional calls are noops.
+    """
+
+    def __bool__(self):
+        return False
+
+
+class NullViewer(Viewer):
+    def __init__(self, *args, **kwargs):
+        super(NullViewer, self).__init__(*args, **kwargs)
+        self.fView = NullViewport()
+
+
 class DisplayObj(object):
     Draw = _noop
     Hide = _noop
@@ -117,11 +134,28 @@ class YMarker(Marker):
 
 
 class DisplayFunc(DisplayBlock):
-    pass
+    # Keeps the function, so that it can still be printed
+    def __init__(self, func=None, *args, **kwargs):
+        super(DisplayFunc, self).__init__()
+        self.func = func
+
+    def GetFunc(self):
+        return self.func
+
+    def Eval(self, x):
+        return self.func.Eval(x)
+
+    def GetMinCh(self):
+        return self.func.GetXmin()
+
+    def GetMaxCh(self):
+        return self.func.GetXmax()
 
 
 class DisplaySpec(DisplayBlock):
+    HistChanged = _noop
     SetHist = _noop
+    SetSharedHist = _noop
     SetID = _noop
 
 
@@ -21,14 +21,47 @@
 
 import array
 import string
-from math import sqrt
-from uncertainties import ufloat
+from uncertainties import ufloat, correlated_values
+import numpy as np
 
 from hdtv.util import TxtFile, Pairs
 import hdtv.ui
 from ROOT import TF1, TF2, TGraphErrors, TVirtualFitter
 
 
+class EfficiencyGrid(object):
+    """
+    Efficiency and its error, evaluated once on a logarithmic energy grid
+    and linearly interpolated for arbitrary energies.
+    """
+
+    def __init__(self, eff, emin, emax, npoints=1000):
+        self.emin = emin
+        self.emax = emax
+        self.energies = np.geomspace(emin, emax, npoints)
+        try:
+            self.values, self.errors = eff.evaluate(self.energies)
+            self.hasErrors = True
+        except ValueError:
+            # No covariance matrix available
+            self.values = eff.values(self.energies)
+            self.errors = np.zeros_like(self.values)
+            self.hasErrors = False
+
+    def covers(self, emin, emax):
+        return self.emin <= emin and emax <= self.emax
+
+    def __call__(self, E):
+        """
+        Interpolated efficiencies and errors for an array of energies
+        """
+        E = np.asarray(E, dtype=float)
+        return (
+            np.interp(E, self.energies, self.values),
+            np.interp(E, self.energies, self.errors),
+        )
+
+
 class _Efficiency(object):
     def __init__(self, num_pars=0, pars=None, norm=True):
         pars = pars or []
@@ -38,8 +71,9 @@ class _Efficiency(object):
         self.fCov = [
             [None for j in range(self._numPars)] for i in range(self._numPars)
         ]  # Simple matrix replacement
-        self._dEff_dP = list()
         self.TGraph = TGraphErrors()
+        self._grid = None
+        self._gridKey = None
 
         # Normalization factors
         self._doNorm = norm
@@ -57,7 +91,6 @@ class _Efficiency(object):
         self.TF1.SetParName(0, "N")  # Normalization
 
         for i in range(0, num_pars):
-            self._dEff_dP.append(None)
             if num_pars <= len(string.ascii_lowercase):
                 self.TF1.SetParName(i + 1, string.ascii_lowercase[i])
 
@@ -87,7 +120,8 @@ class _Efficiency(object):
         value = self.value(E)
         try:
             error = self.error(E)
-        except TypeError:
+        except (TypeError, ValueError):
+            # No covariance matrix available
             error = None
         return ufloat(value, error)
 
@@ -251,28 +285,152 @@ class _Efficiency(object):
         """
         Calculate error using the covariance matrix via:
 
-          delta_Eff = sqrt((dEff_dP[0], dEff_dP[1], ... dEff_dP[num_pars]) x cov x (dEff_dP[0], dEff_dP[1], ... dEff_dP[num_pars]))
+          delta_Eff = sqrt(J x cov x J^T)
 
+        with J the jacobian dEff/dP, exactly as evaluate() does for an
+        array of energies.
         """
         try:
             value = E.nominal_value
         except AttributeError:
             value = E
 
-        if not self.fCov or (len(self.fCov) != self._numPars):
+        return float(self.evaluate(float(value))[1])
+
+    def _getCovariance(self):
+        """
+        Covariance matrix as NumPy array, one row/column for each parameter
+        of the underlying TF1
+        """
+        if not self.fCov or len(self.fCov) != self._numPars:
             raise ValueError("Incorrect size of covariance matrix")
+        cov = np.zeros((self._numPars, self._numPars))
+        for i, row in enumerate(self.fCov):
+            if len(row) != self._numPars:
+                raise ValueError("Incorrect size of covariance matrix")
+            for j, val in enumerate(row):
+                if val is None:
+                    raise ValueError("Covariance matrix not set")
+                cov[i, j] = val
+        return cov
+
+    def _setCovariance(self, cov):
+        cov = np.asarray(cov, dtype=float)
+        if cov.shape != (self._numPars, self._numPars):
+            raise ValueError("Incorrect size of covariance matrix")
+        self.fCov = cov.tolist()
 
-        res = 0.0
+    covariance = property(_getCovariance, _setCovariance)
 
-        # Do matrix multiplication
-        for i in range(0, self._numPars):
-            tmp = 0.0
-            for j in range(0, self._numPars):
-                tmp += self._dEff_dP[j](value, self.parameter) * self.fCov[i][j]
+    def _getArrayParameter(self):
+        """
+        All parameters of the underlying TF1 as NumPy array
+        """
+        return np.array([self.TF1.GetParameter(i) for i in range(self.TF1.GetNpar())])
+
+    @staticmethod
+    def _asEnergyArray(E):
+        """
+        Convert energy (or list of energies, possibly ufloats) to float array
+        """
+        try:
+            return np.asarray(E, dtype=float)
+        except TypeError:
+            return np.array(
+                [getattr(e, "nominal_value", e) for e in np.ravel(E)], dtype=float
+            ).reshape(np.shape(E))
+
+    def _evalArray(self, E, pars):
+        """
+        Evaluate efficiency function for an array of energies
+        """
+        raise NotImplementedError
 
-            res += self._dEff_dP[i](value, self.parameter) * tmp
+    def _jacobianArray(self, E, pars):
+        """
+        Derivatives of the efficiency function with respect to all TF1
+        parameters, shape (number of parameters, number of energies)
+        """
+        raise NotImplementedError
+
+    def values(self, E):
+        """
+        Evaluate efficiency for a whole array of energies at once
+        """
+        E = self._asEnergyArray(E)
+        return self._evalArray(E, self._getArrayParameter())
+
+    def errors(self, E):
+        """
+        Calculate errors for a whole array of energies at once, using
+        the covariance matrix via:
 
-        return sqrt(res)
+          delta_Eff = sqrt(diag(J x cov x J^T))
+
+        with J the jacobian dEff/dP for each energy.
+        """
+        return self.evaluate(E)[1]
+
+    def evaluate(self, E, full_cov=False):
+        """
+        Evaluate efficiency and its uncertainty for an array of energies.
+
+        Returns the array of efficiencies and either the array of errors or,
+        if 'full_cov' is set, the full (correlated) covariance matrix of the
+        efficiencies J x cov x J^T.
+        """
+        E = self._asEnergyArray(E)
+        shape = E.shape
+        E = np.atleast_1d(E).ravel()
+        pars = self._getArrayParameter()
+        values = self._evalArray(E, pars)
+        jac = self._jacobianArray(E, pars)
+        if full_cov:
+            return values.reshape(shape), jac.T @ self.covariance @ jac
+        var = np.einsum("ij,ik,kj->j", jac, self.covariance, jac)
+        return values.reshape(shape), np.sqrt(var).reshape(shape)
+
+    def correlated(self, E):
+        """
+        Return efficiencies for an array of energies as list of correlated
+        ufloats
+        """
+        values, cov = self.evaluate(E, full_cov=True)
+        return correlated_values(np.atleast_1d(values), cov)
+
+    def cached(self, E, npoints=1000):
+        """
+        Evaluate efficiency and its error for an array of energies using
+        an interpolation grid. The grid is cached and only rebuilt if the
+        parameters or the covariance matrix change or if the energies are
+        not covered by it.
+        """
+        E = np.asarray(self._asEnergyArray(E), dtype=float)
+        if E.size == 0:
+            return np.zeros_like(E), np.zeros_like(E)
+        key = (tuple(self._getArrayParameter()), repr(self.fCov), npoints)
+        emin, emax = E.min(), E.max()
+        if (
+            self._grid is None
+            or self._gridKey != key
+            or not self._grid.covers(emin, emax)
+        ):
+            if self._grid is not None and self._gridKey == key:
+                # Extend existing range
+                emin = min(emin, self._grid.emin)
+                emax = max(emax, self._grid.emax)
+            if emin <= 0.0:
+                raise ValueError("Efficiency is only defined for positive energies")
+            self._grid = EfficiencyGrid(self, 0.9 * emin, 1.1 * emax, npoints)
+            self._gridKey = key
+        return self._grid(E)
+
+    @property
+    def grid(self):
+        """
+        Currently cached interpolation grid (or None)
+        """
+        return self._grid
 
     def loadPar(self, parfile):
         """
@@ -286,6 +444,7 @@ class _Efficiency(object):
         for line in file.lines:
             vals.append(float(line))
 
+        vals = self._upgradePar(vals)
         if len(vals) != self._numPars:
             raise RuntimeError("Incorrect number of parameters found in file")
 
@@ -304,16 +463,28 @@ class _Efficiency(object):
         file.read()
 
         for line in file.lines:
-            val_row = [float(s) for s in line.split()]
-            if len(val_row) != self._numPars:
-                raise RuntimeError("Incorrect format of parameter error file")
-            vals.append(val_row)
+            vals.append([float(s) for s in line.split()])
 
-        if len(vals) != self._numPars:
+        vals = self._upgradeCov(vals)
+        if len(vals) != self._numPars or any(
+            len(val_row) != self._numPars for val_row in vals
+        ):
             raise RuntimeError("Incorrect format of parameter error file")
 
         self.fCov = vals
 
+    def _upgradePar(self, vals):
+        """
+        Convert parameters saved by older versions (if necessary)
+        """
+        return vals
+
+    def _upgradeCov(self, vals):
+        """
+        Convert covariance matrix saved by older versions (if necessary)
+        """
+        return vals
+
     def load(self, parfile, covfile=None):
         """
         Read parameter and covariance matrix from file
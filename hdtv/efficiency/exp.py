@@ -21,7 +21,7 @@
 
 from .efficiency import _Efficiency
 from ROOT import TF1
-import math
+import numpy as np
 
 
 class ExpEff(_Efficiency):
@@ -40,31 +40,20 @@ class ExpEff(_Efficiency):
 
         _Efficiency.__init__(self, num_pars=5, pars=pars, norm=norm)
 
-        # List of derivatives
-        self._dEff_dP = [None, None, None, None, None]
-        self._dEff_dP[0] = lambda E, fPars: self.norm * (
-            fPars[1] * math.exp((-1.0) * fPars[2] * E)
-            + fPars[3] * math.exp((-1.0) * fPars[4] * E)
-        )  # dEff/dN
-        self._dEff_dP[1] = (
-            lambda E, fPars: self.norm * fPars[0] * math.exp((-1.0) * fPars[2] * E)
-        )  # dEff/da
-        self._dEff_dP[2] = (
-            lambda E, fPars: self.norm
-            * (-1.0)
-            * fPars[0]
-            * fPars[1]
-            * E
-            * math.exp((-1.0) * fPars[2] * E)
-        )  # dEff/db
-        self._dEff_dP[3] = (
-            lambda E, fPars: self.norm * fPars[0] * math.exp((-1.0) * fPars[4] * E)
-        )  # dEff/dc
-        self._dEff_dP[4] = (
-            lambda E, fPars: self.norm
-            * (-1.0)
-            * fPars[0]
-            * fPars[3]
-            * E
-            * math.exp((-1.0) * fPars[4] * E)
-        )  # dEff/dd
+    def _evalArray(self, E, pars):
+        return pars[0] * (
+            pars[1] * np.exp(-pars[2] * E) + pars[3] * np.exp(-pars[4] * E)
+        )
+
+    def _jacobianArray(self, E, pars):
+        exp1 = np.exp(-pars[2] * E)
+        exp2 = np.exp(-pars[4] * E)
+        return np.array(
+            [
+                pars[1] * exp1 + pars[3] * exp2,  # dEff/dN
+                pars[0] * exp1,  # dEff/da
+                -pars[0] * pars[1] * E * exp1,  # dEff/db
+                pars[0] * exp2,  # dEff/dc
+                -pars[0] * pars[3] * E * exp2,  # dEff/dd
+            ]
+        )
@@ -19,11 +19,12 @@
 # along with HDTV; if not, write to the Free Software Foundation,
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
 
-from math import pow
+import numpy as np
 from uncertainties.umath import log, exp
 from .efficiency import _Efficiency
 from ROOT import TF1, TF2
 from hdtv.util import Pairs
+import hdtv.ui
 
 
 class PolyEff(_Efficiency):
@@ -49,19 +50,30 @@ class PolyEff(_Efficiency):
         TFString += ")"
 
         self.TF1 = TF1(self.id, TFString, 0, 0)
-        _Efficiency.__init__(self, num_pars=degree + 1, pars=pars, norm=norm)
-
-        # Builing derivatives dEff/dParameter[x]
-
-        # See
-        # http://stackoverflow.com/questions/2295290/what-do-lambda-function-closures-capture-in-python#2295372
-        # http://code.activestate.com/recipes/502271/
-        # for this strange constructor
-        def dEff_dP(i):
-            return lambda logE, fPars: self.norm * pow(logE, i)
-
-        for i in range(0, degree + 1):
-            self._dEff_dP[i] = dEff_dP(i)
+        _Efficiency.__init__(self, num_pars=degree + 2, pars=pars, norm=norm)
+
+    def _upgradePar(self, vals):
+        # Older versions did not save the highest coefficient
+        if len(vals) == self._numPars - 1:
+            hdtv.ui.warning(
+                "Efficiency parameters lack the highest coefficient (saved by "
+                "an older version of hdtv), setting it to 0"
+            )
+            vals = list(vals) + [0.0]
+        return vals
+
+    def _upgradeCov(self, vals):
+        # Older versions did not save the highest coefficient
+        if len(vals) == self._numPars - 1 and all(
+            len(row) == self._numPars - 1 for row in vals
+        ):
+            hdtv.ui.warning(
+                "Efficiency covariance matrix lacks the highest coefficient "
+                "(saved by an older version of hdtv), setting it to 0"
+            )
+            vals = [list(row) + [0.0] for row in vals]
+            vals.append([0.0] * self._numPars)
+        return vals
 
     def _set_fitInput(self, fitPairs):
 
@@ -109,19 +121,42 @@ class PolyEff(_Efficiency):
 
         return self.norm * exp(self.TF1.Eval(log(value), 0.0, 0.0, 0.0))
 
-    def error(self, E):
-
-        # TODO: this need checking
-        try:
-            value = E.value
-        except AttributeError:
-            value = E
-
-        ln_err = _Efficiency.error(self, log(value))
-        ln_eff = self.TF1.Eval(log(value), 0.0, 0.0, 0.0)
-        tmp1 = self.norm * exp(ln_eff + ln_err)
-        tmp2 = self.norm * exp(ln_eff - ln_err)
-
-        error = abs(tmp1 - tmp2) / 2.0
-
-        return self.norm * error
+    def _evalArray(self, E, pars):
+        # TF1 is a polynomial in ln(E): [0] * ([1] + [2]*x + [3]*x^2 + ...)
+        return self.norm * np.exp(pars[0] * np.polyval(pars[:0:-1], np.log(E)))
+
+    def _lnJacobianArray(self, logE, pars):
+        """
+        Derivatives of the logarithmic efficiency (i.e. the TF1) with
+        respect to all TF1 parameters
+        """
+        powers = np.power.outer(logE, np.arange(len(pars) - 1)).T
+        return np.vstack([np.polyval(pars[:0:-1], logE), pars[0] * powers])
+
+    def evaluate(self, E, full_cov=False):
+        """
+        Evaluate efficiency and its uncertainty for an array of energies.
+
+        The error is propagated on the logarithmic scale the fit works on
+        and transformed back as (exp(ln_eff + ln_err) - exp(ln_eff - ln_err)) / 2.
+        The full covariance matrix keeps the correlations of the logarithmic
+        efficiencies, scaled such that its diagonal matches these errors.
+        """
+        E = self._asEnergyArray(E)
+        shape = E.shape
+        E = np.atleast_1d(E).ravel()
+        pars = self._getArrayParameter()
+        values = self._evalArray(E, pars)
+        jac = self._lnJacobianArray(np.log(E), pars)
+        if full_cov:
+            ln_cov = jac.T @ self.covariance @ jac
+            ln_err = np.sqrt(np.diagonal(ln_cov))
+        else:
+            ln_err = np.sqrt(np.einsum("ij,ik,kj->j", jac, self.covariance, jac))
+        errors = values * np.sinh(ln_err)
+        if not full_cov:
+            return values.reshape(shape), errors.reshape(shape)
+        # errors / ln_err, with the linear limit for ln_err -> 0
+        nonzero = ln_err > 0.0
+        scale = np.where(nonzero, errors / np.where(nonzero, ln_err, 1.0), values)
+        return values.reshape(shape), ln_cov * np.outer(scale, scale)
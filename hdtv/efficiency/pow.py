@@ -21,7 +21,7 @@
 
 from .efficiency import _Efficiency
 from ROOT import TF1
-import math
+import numpy as np
 
 
 class PowEff(_Efficiency):
@@ -40,19 +40,16 @@ class PowEff(_Efficiency):
 
         _Efficiency.__init__(self, num_pars=4, pars=pars, norm=norm)
 
-        # List of derivatives
-        self._dEff_dP = [None, None, None, None, None]
-        self._dEff_dP[0] = lambda E, fPars: self.norm * fPars[1] + fPars[2] * pow(
-            E, -fPars[3]
-        )  # dEff/dN
-        self._dEff_dP[1] = lambda E, fPars: self.norm * fPars[0]  # dEff/da
-        self._dEff_dP[2] = (
-            lambda E, fPars: self.norm * fPars[0] * pow(E, -fPars[3])
-        )  # dEff/db
-        self._dEff_dP[3] = (
-            lambda E, fPars: self.norm
-            * fPars[0]
-            * fPars[2]
-            * (-fPars[3])
-            * pow(E, (-fPars[3] - 1))
-        )  # dEff/dc
+    def _evalArray(self, E, pars):
+        return pars[0] * (pars[1] + pars[2] * np.power(E, -pars[3]))
+
+    def _jacobianArray(self, E, pars):
+        powterm = np.power(E, -pars[3])
+        return np.array(
+            [
+                pars[1] + pars[2] * powterm,  # dEff/dN
+                np.full_like(E, pars[0]),  # dEff/da
+                pars[0] * powterm,  # dEff/db
+                -pars[0] * pars[2] * np.log(E) * powterm,  # dEff/dc
+            ]
+        )
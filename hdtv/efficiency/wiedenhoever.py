@@ -21,7 +21,7 @@
 
 from .efficiency import _Efficiency
 from ROOT import TF1
-import math
+import numpy as np
 
 
 class WiedenhoeverEff(_Efficiency):
@@ -42,38 +42,22 @@ class WiedenhoeverEff(_Efficiency):
 
         _Efficiency.__init__(self, num_pars=5, pars=pars, norm=norm)
 
-        # List of derivatives
-        self._dEff_dP = [None, None, None, None, None]
-        self._dEff_dP[0] = (
-            lambda E, fPars: self.norm * self.value(E) / fPars[0]
-        )  # dEff/da
-        self._dEff_dP[1] = (
-            lambda E, fPars: self.norm
-            * (-self.value(E))
-            * math.log(E - fPars[2] + fPars[3] * math.exp(-fPars[4] * E))
-        )  # dEff/db
-        self._dEff_dP[2] = (
-            lambda E, fPars: self.norm
-            * self.value(E)
-            * fPars[1]
-            / (E - fPars[2] + fPars[3] * math.exp(-fPars[4] * E))
-        )  # dEff/dc
-        self._dEff_dP[3] = (
-            lambda E, fPars: self.norm
-            * (-self.value(E))
-            * fPars[1]
-            / (E - fPars[2] + fPars[3] * math.exp(-fPars[4] * E))
-            * math.exp(-fPars[4] * E)
-        )  # dEff/dd
-        self._dEff_dP[4] = (
-            lambda E, fPars: self.norm
-            * self.value(E)
-            * (
-                1 / fPars[4]
-                + fPars[1]
-                / (E - fPars[2] + fPars[3] * math.exp(-fPars[4] * E))
-                * fPars[3]
-                * math.exp(-fPars[4] * E)
-                * E
-            )
-        )  # dEff/de
+    def _evalArray(self, E, pars):
+        base = E - pars[2] + pars[3] * np.exp(-pars[4] * E)
+        return pars[0] * pars[4] * np.power(base, -pars[1])
+
+    def _jacobianArray(self, E, pars):
+        expterm = np.exp(-pars[4] * E)
+        base = E - pars[2] + pars[3] * expterm
+        powterm = np.power(base, -pars[1])
+        eff = pars[0] * pars[4] * powterm
+        return np.array(
+            [
+                pars[4] * powterm,  # dEff/dN
+                -eff * np.log(base),  # dEff/da
+                eff * pars[1] / base,  # dEff/db
+                -eff * pars[1] / base * expterm,  # dEff/dc
+                pars[0] * powterm
+                + eff * pars[1] / base * pars[3] * expterm * E,  # dEff/dd
+            ]
+        )
@@ -21,7 +21,7 @@
 
 from .efficiency import _Efficiency
 from ROOT import TF1
-import math
+import numpy as np
 
 
 class WunderEff(_Efficiency):
@@ -41,38 +41,18 @@ class WunderEff(_Efficiency):
 
         _Efficiency.__init__(self, num_pars=5, pars=pars, norm=norm)
 
-        # List of derivatives
-        self._dEff_dP = [None, None, None, None, None]
-        self._dEff_dP[0] = (
-            lambda E, fPars: self.norm
-            * (fPars[1] * E + fPars[2] / E)
-            * math.exp(fPars[3] * E + fPars[4] / E)
-        )  # dEff/dN
-        self._dEff_dP[0] = (
-            lambda E, fPars: self.norm
-            * fPars[0]
-            * E
-            * math.exp(fPars[3] * E + fPars[4] / E)
-        )  # dEff/da
-        self._dEff_dP[1] = (
-            lambda E, fPars: self.norm
-            * fPars[0]
-            * 1.0
-            / E
-            * math.exp(fPars[3] * E + fPars[4] / E)
-        )  # dEff/db
-        self._dEff_dP[2] = (
-            lambda E, fPars: self.norm
-            * fPars[0]
-            * (fPars[1] * E + fPars[2] / E)
-            * E
-            * math.exp(fPars[3] * E + fPars[4] / E)
-        )  # dEff/dc
-        self._dEff_dP[3] = (
-            lambda E, fPars: self.norm
-            * fPars[0]
-            * (fPars[1] * E + fPars[1] / E)
-            * 1.0
-            / E
-            * math.exp(fPars[3] * E + fPars[4] / E)
-        )  # dEff/dd
+    def _evalArray(self, E, pars):
+        return pars[0] * (pars[1] * E + pars[2] / E) * np.exp(pars[3] * E + pars[4] / E)
+
+    def _jacobianArray(self, E, pars):
+        expterm = np.exp(pars[3] * E + pars[4] / E)
+        eff = pars[0] * (pars[1] * E + pars[2] / E) * expterm
+        return np.array(
+            [
+                (pars[1] * E + pars[2] / E) * expterm,  # dEff/dN
+                pars[0] * E * expterm,  # dEff/da
+                pars[0] / E * expterm,  # dEff/db
+                eff * E,  # dEff/dc
+                eff / E,  # dEff/dd
+            ]
+        )
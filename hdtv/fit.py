@@ -75,6 +75,8 @@ class Fit(Drawable):
         self._spec = None
         self.active = False
         self.integral = None
+        # C++ fitter and display functions released, see Release()
+        self._released = False
 
     # ID property
     def _get_ID(self):
@@ -508,6 +510,26 @@ class Fit(Drawable):
         self.cal = spec.cal
         self.color = spec.color
         self.FixMarkerInUncal()
+        region = sorted(
+            [self.regionMarkers[0].p1.pos_uncal, self.regionMarkers[0].p2.pos_uncal]
+        )
+        self._RestoreFunctions()
+        if self.peaks:
+            # create non-existant integral
+            if not self.integral:
+                self.integral = hdtv.integral.Integrate(
+                    self.spec, self.fitter.bgFitter, region
+                )
+        if not spec.viewport:
+            # nothing will be drawn
+            self.Release()
+
+    def _RestoreFunctions(self, bgFunc=False):
+        """
+        Restore the C++ fitter and the display functions from the fit results.
+        With bgFunc, the function of a pure background fit is restored, too.
+        """
+        self._released = False
         if len(self.bgMarkers) > 0 and not self.bgMarkers.IsPending():
             backgrounds = Pairs()
             for m in self.bgMarkers:
@@ -515,11 +537,14 @@ class Fit(Drawable):
             self.fitter.RestoreBackground(
                 backgrounds=backgrounds, params=self.bgParams, chisquare=self.bgChi
             )
-        region = sorted(
-            [self.regionMarkers[0].p1.pos_uncal, self.regionMarkers[0].p2.pos_uncal]
-        )
-        print(self.bgParams)
+            if bgFunc and not self.peaks:
+                func = self.fitter.bgFitter.GetFunc()
+                self.dispBgFunc = ROOT.HDTV.Display.DisplayFunc(func, self.color)
+                self.dispBgFunc.SetCal(self.cal)
         if self.peaks:
+            region = sorted(
+                [self.regionMarkers[0].p1.pos_uncal, self.regionMarkers[0].p2.pos_uncal]
+            )
             self.fitter.RestorePeaks(
                 cal=self.cal,
                 region=region,
@@ -545,11 +570,22 @@ class Fit(Drawable):
                 )
                 self.peaks[i].displayObj.SetCal(self.cal)
 
-            # create non-existant integral
-            if not self.integral:
-                self.integral = hdtv.integral.Integrate(
-                    self.spec, self.fitter.bgFitter, region
-                )
+    def Release(self):
+        """
+        Release the C++ fitter and the display functions (which own the
+        TF1s) of a finished fit that is not displayed. The results (peaks,
+        background parameters, chi², integrals) are kept, and the functions
+        are restored from them when the fit is drawn again.
+        """
+        if not (self.dispPeakFunc or self.dispBgFunc):
+            return
+        self.dispPeakFunc = None
+        self.dispBgFunc = None
+        for peak in self.peaks:
+            peak.displayObj = None
+        self.fitter.peakFitter = None
+        self.fitter.bgFitter = None
+        self._released = True
 
     def Draw(self, viewport):
         """
@@ -560,6 +596,8 @@ class Fit(Drawable):
             # python objects can only be drawn on a single viewport
             raise RuntimeError("Object can only be drawn on a single viewport")
         self.viewport = viewport
+        if self._released and self.viewport:
+            self._RestoreFunctions(bgFunc=True)
         # Lock updates
         if self.viewport:
             self.viewport.LockUpdate()
@@ -588,13 +626,16 @@ class Fit(Drawable):
         if self.spec is None:
             return
         # repeat the fits
-        if self.dispPeakFunc:
+        released = self._released
+        if self.dispPeakFunc or (released and self.peaks):
             # this includes the background fit
             self.FitPeakFunc(self.spec)
-        elif self.dispBgFunc:
+        elif self.dispBgFunc or (released and self.bgParams):
             # maybe there was only a background fit
             self.FitBgFunc(self.spec)
         if not self.viewport:
+            if released:
+                self.Release()
             return
         self.viewport.LockUpdate()
         # draw fit func, if available
@@ -627,6 +668,7 @@ class Fit(Drawable):
             self.dispPeakFunc = None
             self.peaks = []
             self.chi = None
+            self._released = False
 
     def ShowAsWorkFit(self):
         if not self.viewport:
@@ -709,6 +751,10 @@ class Fit(Drawable):
     def Show(self):
         if not self.viewport:
             return
+        if self._released:
+            # restores and draws the functions, and calls Show() again
+            self.Draw(self.viewport)
+            return
         if self.active:
             if self.ID is None:
                 self.ShowAsWorkFit()
@@ -731,6 +777,9 @@ class Fit(Drawable):
         for peak in self.peaks:
             peak.Hide()
         self.viewport.UnlockUpdate()
+        if self.ID is not None:
+            # stored fit, restored by Show()
+            self.Release()
 
     def __copy__(self):
         """
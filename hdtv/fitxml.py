@@ -19,6 +19,7 @@
 # along with HDTV; if not, write to the Free Software Foundation,
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
 
+import os
 import xml.etree.ElementTree as ET
 from uncertainties import ufloat
 
@@ -53,7 +54,8 @@ class FitXml(object):
     #### creating of xml #####################################################
     def WriteFitlist(self, file_object, sid=None):
         """
-        Write Fitlist to file
+        Write Fitlist to file (opened in binary mode), one fit at a time.
+        Returns the list of the written <fit> elements.
         """
         if sid is None:
             sid = self.spectra.activeID
@@ -61,10 +63,61 @@ class FitXml(object):
             fits = self.spectra.dict[sid].dict
         except KeyError:
             raise HDTVCommandError("No spectrum with id %s loaded." % sid)
-        root = self.CreateXml(fits)
-        # save to file
-        tree = ET.ElementTree(root)
-        tree.write(file_object)
+        file_object.write(('<hdtv version="%s">' % VERSION).encode())
+        data = self.WriteFits(
+            file_object, sorted(fits.values(), key=lambda fit: fit.ID)
+        )
+        file_object.write(b"\n</hdtv>\n")
+        return data
+
+    def WriteFits(self, file_object, fits):
+        """
+        Write the <fit> elements for fits, formatted as children of the
+        root element. Returns the list of the written elements.
+        """
+        data = list()
+        for fit in fits:
+            fitData = self.Fit2Bytes(fit)
+            file_object.write(b"\n  ")
+            file_object.write(fitData)
+            data.append(fitData)
+        return data
+
+    def Fit2Bytes(self, fit):
+        """
+        Serialized <fit> element, as written to the fit list
+        """
+        fitElement = self.Fit2Xml(fit)
+        self._indent(fitElement, level=1)
+        fitElement.tail = None
+        return ET.tostring(fitElement)
+
+    def AppendFitlist(self, file_object, fits):
+        """
+        Append fits to an existing fit list (opened with mode "r+b"),
+        without rewriting the fits which are already in it. Returns the
+        list of the written <fit> elements.
+        """
+        (root, children) = self._IterParse(file_object)
+        if not root.tag == "hdtv" or root.get("version") != self.version:
+            raise HDTVCommandError(
+                "Can only append to fit lists of version %s" % self.version
+            )
+        # Find the end tag of the root element
+        file_object.seek(0, os.SEEK_END)
+        size = file_object.tell()
+        file_object.seek(max(0, size - 1024))
+        tail = file_object.read()
+        pos = tail.rfind(b"</hdtv>")
+        if pos < 0:
+            raise HDTVCommandError("Cannot find the end of the fit list")
+        while pos > 0 and tail[pos - 1 : pos].isspace():
+            pos -= 1
+        file_object.seek(size - len(tail) + pos)
+        file_object.truncate()
+        data = self.WriteFits(file_object, fits)
+        file_object.write(b"\n</hdtv>\n")
+        return data
 
     def CreateXml(self, fits):
         """
@@ -297,6 +350,45 @@ class FitXml(object):
         error = float(errorElement.text)
         return ufloat(value, error, tag=free)
 
+    def _IterParse(self, file_object):
+        """
+        Parses file_object incrementally. Returns the root element and a
+        generator of its children, which yields each child as soon as it is
+        parsed completely, and removes it from the tree afterwards.
+        """
+        events = ET.iterparse(file_object, events=("start", "end"))
+        (event, root) = next(events)
+
+        def children():
+            depth = 1
+            for (event, elem) in events:
+                if event == "start":
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth == 1:
+                    yield elem
+                    root.remove(elem)
+
+        return (root, children())
+
+    def _Children(self, root):
+        """
+        Like the children generator of _IterParse, for a completely parsed
+        tree
+        """
+        for elem in list(root):
+            yield elem
+            root.remove(elem)
+
+    def ParseFitlist(self, file_object):
+        """
+        Parses file_object completely, without restoring any fits. As this
+        does not touch the session, it may be done in another thread.
+        Returns the root element, to be passed to ReadFitlist.
+        """
+        return ET.parse(file_object).getroot()
+
     def ReadFitlist(
         self,
         file_object,
@@ -305,16 +397,20 @@ class FitXml(object):
         refit=False,
         interactive=True,
         fname=None,
+        root=None,
     ):
         """
         Reads fitlist from xml files
+
+        If root (see ParseFitlist) is given, the fits are restored from it
+        and file_object is not read.
         """
 
         if self.spectra.viewport:
             self.spectra.viewport.LockUpdate()
         if sid is None:
             sid = self.spectra.activeID
-        if sid not in self.spectra.ids:
+        if sid not in self.spectra.dict:
             raise HDTVCommandError("No spectrum with id %s loaded." % sid)
         count = 0
         try:
@@ -322,19 +418,29 @@ class FitXml(object):
         except AttributeError:
             fname = "fitlist"
         try:
-            tree = ET.parse(file_object)
-            root = tree.getroot()
+            if root is None:
+                # The fits are restored while the file is parsed
+                (root, children) = self._IterParse(file_object)
+            else:
+                children = self._Children(root)
             if not root.tag == "hdtv" or root.get("version") is None:
                 e = "this is not a valid hdtv file"
                 raise SyntaxError(e)
             # current version
             if root.get("version") == self.version:
                 count, fits = self.RestoreFromXml(
-                    root, sid, calibrate=calibrate, refit=refit, interactive=interactive
+                    children,
+                    sid,
+                    calibrate=calibrate,
+                    refit=refit,
+                    interactive=interactive,
                 )
             else:
                 # old versions
                 oldversion = root.get("version")
+                if oldversion == "1.0" or oldversion.startswith("0"):
+                    # These are not organized by fits, read the whole tree
+                    root.extend(list(children))
                 hdtv.ui.warning(
                     "The XML version of this file (%s) is outdated." % oldversion
                 )
@@ -343,28 +449,28 @@ class FitXml(object):
                         "But this version should be fully compatible with the new version."
                     )
                     count, fits = self.RestoreFromXml_v1_4(
-                        root, sid, calibrate=calibrate, refit=refit
+                        children, sid, calibrate=calibrate, refit=refit
                     )
                 if oldversion == "1.3":
                     hdtv.ui.msg(
                         "But this version should be fully compatible with the new version."
                     )
                     count, fits = self.RestoreFromXml_v1_3(
-                        root, sid, calibrate=calibrate, refit=refit
+                        children, sid, calibrate=calibrate, refit=refit
                     )
                 if oldversion == "1.2":
                     hdtv.ui.msg(
                         "But this version should be fully compatible with the new version."
                     )
                     count, fits = self.RestoreFromXml_v1_2(
-                        root, sid, calibrate=calibrate, refit=refit
+                        children, sid, calibrate=calibrate, refit=refit
                     )
                 if oldversion == "1.1":
                     hdtv.ui.msg(
                         "But this version should be fully compatible with the new version."
                     )
                     count, fits = self.RestoreFromXml_v1_1(
-                        root, sid, calibrate=calibrate, refit=refit
+                        children, sid, calibrate=calibrate, refit=refit
                     )
                 if oldversion == "1.0":
                     hdtv.ui.msg("Restoring only fits belonging to spectrum %s" % sid)
@@ -422,6 +528,9 @@ class FitXml(object):
         Changes to version 1.3:
         Information about the integral over the fit region (and bg, if
         available) are supplied. No big change!
+
+        Instead of the root element, an iterable of its children may be
+        given, so that fits can be restored while the file is parsed.
         """
 
         spec = self.spectra.dict[sid]
@@ -429,7 +538,9 @@ class FitXml(object):
         do_fit = ""
         fits = list()
         spec_name_last = ""
-        for fitElement in root.findall("fit"):
+        for fitElement in root:
+            if fitElement.tag != "fit":
+                continue
             if calibrate:
                 spectrum = fitElement.find("spectrum")
                 spec_name = spectrum.get("name")
@@ -465,14 +576,14 @@ class FitXml(object):
                         do_fit = input(question)
                     if do_fit in ["Y", "y", "", "A", "a"]:
                         fit.FitPeakFunc(spec)
-            # finish this fit
+            # finish this fit and add it to the spectrum
             fits.append(fit)
-        # add fits to spectrum
-        for fit in fits:
-            ID = spec.Insert(fit)
+            spec.Insert(fit)
             count += 1
             if sid not in self.spectra.visible:
                 fit.Hide()
+            if count % 1000 == 0:
+                hdtv.ui.info("%d fits restored ..." % count)
         return count, fits
 
     def RestoreFromXml_v1_3(
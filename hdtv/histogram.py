@@ -26,6 +26,7 @@ import numpy as np
 
 import ROOT
 import hdtv.color
+import hdtv.util
 import hdtv.rootext.mfile
 import hdtv.rootext.calibration
 import hdtv.rootext.display
@@ -83,7 +84,7 @@ class Histogram(Drawable):
     def _set_hist(self, hist):
         self._hist = hist
         if self.displayObj:
-            self.displayObj.SetHist(self._hist)
+            self.displayObj.SetSharedHist(self._hist)
 
     def _get_hist(self):
         return self._hist
@@ -167,7 +168,7 @@ class Histogram(Drawable):
 
         # update display
         if self.displayObj:
-            self.displayObj.SetHist(self._hist)
+            self.displayObj.HistChanged()
         self.typeStr = "spectrum, modified (sum)"
 
     def Minus(self, spec):
@@ -197,7 +198,7 @@ class Histogram(Drawable):
 
         # update display
         if self.displayObj:
-            self.displayObj.SetHist(self._hist)
+            self.displayObj.HistChanged()
         self.typeStr = "spectrum, modified (difference)"
 
     def Multiply(self, factor):
@@ -207,7 +208,7 @@ class Histogram(Drawable):
         self._hist.Scale(factor)
         # update display
         if self.displayObj:
-            self.displayObj.SetHist(self._hist)
+            self.displayObj.HistChanged()
         self.typeStr = "spectrum, modified (multiplied)"
 
     def Rebin(self, ngroup, calibrate=True):
@@ -219,12 +220,13 @@ class Histogram(Drawable):
         self._hist.GetXaxis().SetLimits(0, bins / ngroup)
         # update display
         if self.displayObj:
-            self.displayObj.SetHist(self._hist)
+            self.displayObj.HistChanged()
         # update calibration
         if calibrate:
             if not self.cal:
                 self.cal.SetCal(0.0, 1.0)
             self.cal.Rebin(ngroup)
+            hdtv.util.Position.CalibrationChanged()
             self.displayObj.SetCal(self.cal)
             hdtv.ui.info("Calibration updated for rebinned spectrum")
         self.typeStr = f"spectrum, modified (rebinned, ngroup={ngroup})"
@@ -297,11 +299,12 @@ class Histogram(Drawable):
                 self.cal.SetCal(0, binsize)
         else:
             self.cal.SetCal(binsize / 2, binsize)
+        hdtv.util.Position.CalibrationChanged()
         # update display
         if self.displayObj:
-            self.displayObj.SetHist(self._hist)
-        # update calibration
-        self.displayObj.SetCal(self.cal)
+            self.displayObj.SetSharedHist(self._hist)
+            # update calibration
+            self.displayObj.SetCal(self.cal)
         hdtv.ui.info(f"Rebinned to calibration unit (binsize={binsize}).")
 
     def Poisson(self):
@@ -314,7 +317,7 @@ class Histogram(Drawable):
             varied = np.random.poisson(counts)
             self._hist.SetBinContent(i, varied)
         if self.displayObj:
-            self.displayObj.SetHist(self._hist)
+            self.displayObj.HistChanged()
 
     def Draw(self, viewport):
         """
@@ -326,6 +329,9 @@ class Histogram(Drawable):
             # Spectrum() objects can only be drawn on a single viewport
             raise RuntimeError("Spectrum can only be drawn on a single viewport")
         self.viewport = viewport
+        if not viewport:
+            # headless
+            return
         # Lock updates
         self.viewport.LockUpdate()
         # Show spectrum
@@ -334,7 +340,9 @@ class Histogram(Drawable):
                 color = self._activeColor
             else:
                 color = self._passiveColor
-            self.displayObj = ROOT.HDTV.Display.DisplaySpec(self._hist, color)
+            # The display shares self._hist; call HistChanged() after
+            # modifying it in place
+            self.displayObj = ROOT.HDTV.Display.DisplaySpec(self._hist, color, True)
             self.displayObj.SetNorm(self.norm)
             self.displayObj.Draw(self.viewport)
             # add calibration
@@ -359,6 +367,22 @@ class Histogram(Drawable):
             return False
         return True
 
+    def GetArrays(self):
+        """
+        Returns the bin contents and errors (or None, if the errors are
+        not stored explicitly), including under- and overflow bins
+        """
+        n = self._hist.GetNbinsX() + 2
+        contents = np.fromiter(
+            (self._hist.GetBinContent(i) for i in range(n)), np.float64, n
+        )
+        if self._hist.GetSumw2N() == 0:
+            return (contents, None)
+        errors = np.fromiter(
+            (self._hist.GetBinError(i) for i in range(n)), np.float64, n
+        )
+        return (contents, errors)
+
     def SetHistWithPrimitiveBinning(self, hist, caldegree=4, silent=False):
         log = hdtv.ui.debug if silent else hdtv.ui.info
         if HasPrimitiveBinning(hist):
@@ -462,6 +486,85 @@ class FileHistogram(Histogram):
         self.hist = hist
 
 
+class SnapshotHistogram(Histogram):
+    """
+    Spectrum restored from a session snapshot
+
+    The ROOT histogram is only created from the bin contents (usually
+    memory-mapped from the snapshot) when it is first used.
+    """
+
+    def __init__(
+        self,
+        name,
+        contents,
+        errors,
+        xmin,
+        xmax,
+        filename=None,
+        fmt=None,
+        color=hdtv.color.default,
+        cal=None,
+    ):
+        self._name = name
+        self.filename = filename
+        self.fmt = fmt
+        Histogram.__init__(self, None, color, cal if cal is not None else [])
+        self._lazy = (contents, errors, xmin, xmax)
+        self.typeStr = "spectrum, restored from snapshot"
+
+    # The ROOT histogram is created on first access
+    def _get_roothist(self):
+        if self._lazy is not None:
+            (contents, errors, xmin, xmax) = self._lazy
+            self._lazy = None
+            hist = ROOT.TH1D(self._name, self._name, len(contents) - 2, xmin, xmax)
+            hist.SetContent(np.ascontiguousarray(contents, dtype=np.float64))
+            if errors is not None:
+                hist.SetError(np.ascontiguousarray(errors, dtype=np.float64))
+            self._roothist = hist
+        return self._roothist
+
+    def _set_roothist(self, hist):
+        self._lazy = None
+        self._roothist = hist
+
+    _hist = property(_get_roothist, _set_roothist)
+
+    # name property
+    def _get_name(self):
+        if self._lazy is not None:
+            return self._name
+        return Histogram._get_name(self)
+
+    def _set_name(self, name):
+        self._name = name
+        Histogram._set_name(self, name)
+
+    name = property(_get_name, _set_name)
+
+    @property
+    def info(self):
+        s = super(SnapshotHistogram, self).info
+        if self.filename:
+            s += "Filename: %s\n" % self.filename
+        return s
+
+    def GetArrays(self):
+        if self._lazy is not None:
+            return self._lazy[:2]
+        return Histogram.GetArrays(self)
+
+    def Refresh(self):
+        """
+        Reload the spectrum from disk, if it was read from a file
+        """
+        if self.filename:
+            FileHistogram.Refresh(self)
+        else:
+            Histogram.Refresh(self)
+
+
 class CutHistogram(Histogram):
     def __init__(self, hist, axis, gates, color=hdtv.color.default, cal=None):
         Histogram.__init__(self, hist, color, cal)
@@ -650,6 +753,82 @@ class RHisto2D(Histo2D):
         return hist
 
 
+class SymHisto2D(Histo2D):
+    """
+    Symmetric matrix for projection, of which only one triangle is kept in
+    memory (see SymMatrix). It is converted from a square ROOT TH2 or read
+    from an mfile matrix, e.g. in one of the triangular formats.
+    """
+
+    def __init__(self, source):
+        if isinstance(source, str):
+            # check if file exists
+            try:
+                os.stat(source)
+            except OSError as error:
+                hdtv.ui.error(str(error))
+                raise
+            self.vmatrix = SpecReader.GetSymMatrix(source)
+            self.filename = source
+            self._name = os.path.basename(source)
+        else:
+            self.vmatrix = ROOT.SymMatrix(source)
+            if self.vmatrix.Failed():
+                raise RuntimeError("%s is not a square matrix" % source.GetName())
+            self.filename = None
+            self._name = source.GetName()
+
+        name = self._name + "_prx"
+        rhist = self.vmatrix.Projection(name, name)
+        ROOT.SetOwnership(rhist, True)
+        self._xproj = Histogram(rhist)
+        self._xproj.typeStr = "Projection"
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def xproj(self):
+        return self._xproj
+
+    def ExecuteCut(self, regionMarkers, bgMarkers, axis):
+        # The matrix is symmetric, so the cut axis does not matter
+
+        if len(regionMarkers) < 1:
+            raise RuntimeError("Need at least one gate for cut")
+
+        if axis == "0":
+            axis = "x"
+
+        if axis not in ("x", "y"):
+            raise ValueError("Bad value for axis parameter")
+
+        matrix = self.vmatrix
+        matrix.ResetRegions()
+
+        for r in regionMarkers:
+            b1 = matrix.FindCutBin(r.p1.pos_uncal)
+            b2 = matrix.FindCutBin(r.p2.pos_uncal)
+            matrix.AddCutRegion(b1, b2)
+
+        for b in bgMarkers:
+            b1 = matrix.FindCutBin(b.p1.pos_uncal)
+            b2 = matrix.FindCutBin(b.p2.pos_uncal)
+            matrix.AddBgRegion(b1, b2)
+
+        name = self._name + "_cut"
+        rhist = matrix.Cut(name, name)
+        # Ensure proper garbage collection for ROOT histogram objects
+        ROOT.SetOwnership(rhist, True)
+
+        hist = CutHistogram(rhist, axis, regionMarkers)
+        hist.typeStr = "cut"
+        # Both axes have the calibration of the projection
+        hist._cal = self._xproj.cal
+        return hist
+
+
 class MHisto2D(Histo2D):
     """
     MFile-backed matrix for projection
@@ -798,3 +977,14 @@ class MHisto2D(Histo2D):
                 if errno != ROOT.MatOp.ERR_SUCCESS:
                     raise RuntimeError("Transpose: " + ROOT.MatOp.GetErrorString(errno))
                 hdtv.ui.info("Generated transpose: %s" % trans_fname)
+
+
+def OpenMatrix(fname, sym):
+    """
+    Open an mfile matrix for projection. Symmetric matrices in a triangular
+    format are kept in memory (SymHisto2D), as their lines only hold one
+    half of the matrix; all other matrices are cut on disk (MHisto2D).
+    """
+    if sym and SpecReader.GetFileType(fname) in SpecReader.triangular:
+        return SymHisto2D(fname)
+    return MHisto2D(fname, sym)
@@ -39,6 +39,8 @@ class Marker(Drawable):
     position is None.
     """
 
+    __slots__ = ("_dashed", "fixedInCal", "xytype", "connecttop", "_p1", "_p2")
+
     def __init__(self, xytype, p1, color=hdtv.color.zoom, cal=None, connecttop=False):
         self._activeColor = color
         self._cal = cal
@@ -116,6 +118,9 @@ class Marker(Drawable):
             # Marker can only be drawn to a single viewport
             raise RuntimeError("Marker cannot be realized on multiple viewports")
         self.viewport = viewport
+        if not viewport:
+            # headless
+            return
         # adjust the position values for the creation of the makers
         # on the C++ side all values must be uncalibrated
         p1 = self.p1.pos_uncal
@@ -112,7 +112,7 @@ class Matrix(DrawableManager):
         return ID
 
     def ActivateObject(self, ID):
-        if ID is not None and ID not in self.ids:
+        if ID is not None and ID not in self.dict:
             raise KeyError
         # housekeeping for old active cut
         if self.activeID is not None:
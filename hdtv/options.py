@@ -83,9 +83,35 @@ class Option(object):
         return self.ToStr(self.value)
 
 
+# Functions to call before accessing options with a given prefix, see
+# RegisterLoader
+_loaders = []
+
+
 class _OptionManager(dict):
     """Manages a set of options"""
 
+    def RegisterLoader(self, prefix, load):
+        """
+        Calls load() (e.g. to import a plugin) before the first access to an
+        unknown option whose name starts with prefix
+        """
+        _loaders.append((prefix, load))
+
+    def _Load(self, varname=None):
+        """
+        Runs the loaders for varname, or all loaders if varname is None
+        """
+        for (prefix, load) in list(_loaders):
+            if varname is None or varname.startswith(prefix):
+                _loaders.remove((prefix, load))
+                load()
+
+    def _Lookup(self, varname):
+        if varname not in self.__dict__:
+            self._Load(varname)
+        return self.__dict__[varname]
+
     def RegisterOption(self, varname, value):
         """
         Adds a configuration variable
@@ -99,19 +125,19 @@ class _OptionManager(dict):
         """
         Sets the variable specified by varname. Raises a KeyError if it does not exist.
         """
-        self.__dict__[varname].ParseAndSet(rawValue)
+        self._Lookup(varname).ParseAndSet(rawValue)
 
     def Get(self, varname):
         """
         Gets the value of the variable varname. Raises a KeyError if it does not exist.
         """
-        return self.__dict__[varname].Get()
+        return self._Lookup(varname).Get()
 
     def Reset(self, varname):
         """
         Resets value of variable varname to default. Raises KeyError if it does not exist.
         """
-        self.__dict__[varname].Reset()
+        self._Lookup(varname).Reset()
 
     def ResetAll(self):
         """
@@ -125,13 +151,14 @@ class _OptionManager(dict):
         Shows the value of the variable varname
         """
         return "<b>{}</b>: {}".format(
-            escape(varname), escape(str(self.__dict__[varname]))
+            escape(varname), escape(str(self._Lookup(varname)))
         )
 
     def Str(self):
         """
         Returns all options as a string
         """
+        self._Load()
         string = ""
         for (k, v) in sorted(self.__dict__.items()):
             string += "<b>{}</b>: {}\n".format(escape(k), escape(str(v)))
@@ -163,6 +190,7 @@ def parse_choices(choices):
 OptionManager = _OptionManager()
 
 RegisterOption = OptionManager.RegisterOption
+RegisterLoader = OptionManager.RegisterLoader
 Set = OptionManager.Set
 Get = OptionManager.Get
 Reset = OptionManager.Reset
@@ -39,6 +39,8 @@ class EEPeak(Drawable):
     Peak object for the ee fitter
     """
 
+    __slots__ = ("pos", "amp", "sigma1", "sigma2", "eta", "gamma", "vol", "extras")
+
     def __init__(self, pos, amp, sigma1, sigma2, eta, gamma, vol, color=None, cal=None):
         super(EEPeak, self).__init__(color, cal)
         self.pos = pos
@@ -166,6 +168,23 @@ class PeakModelEE(PeakModel):
     Peak model for electron-electron scattering
     """
 
+    # The valid states do not change and are shared by all instances.
+    # Note that volume is not a true fit parameter, but calculated from
+    # the other parameters after the fit
+    fValidParStatus = {
+        "pos": [float, "free", "hold"],
+        "amp": [float, "free", "hold"],
+        "sigma1": [float, "free", "equal"],
+        "sigma2": [float, "free", "equal"],
+        "eta": [float, "free", "equal"],
+        "gamma": [float, "free", "equal"],
+        "vol": ["calculated"],
+    }
+    fValidOptStatus = {
+        "integrate": [False, True],
+        "likelihood": ["normal", "poisson"],
+    }
+
     def __init__(self):
         super(PeakModelEE, self).__init__()
         self.fParStatus = {
@@ -177,25 +196,10 @@ class PeakModelEE(PeakModel):
             "gamma": None,
             "vol": None,
         }
-        # Note that volume is not a true fit parameter, but calculated from
-        # the other parameters after the fit
-        self.fValidParStatus = {
-            "pos": [float, "free", "hold"],
-            "amp": [float, "free", "hold"],
-            "sigma1": [float, "free", "equal"],
-            "sigma2": [float, "free", "equal"],
-            "eta": [float, "free", "equal"],
-            "gamma": [float, "free", "equal"],
-            "vol": ["calculated"],
-        }
         self.fOptStatus = {
             "integrate": False,
             "likelihood": "normal",
         }
-        self.fValidOptStatus = {
-            "integrate": [False, True],
-            "likelihood": ["normal", "poisson"],
-        }
 
         self.ResetParamStatus()
         self.name = "ee"
@@ -38,6 +38,8 @@ class TheuerkaufPeak(Drawable):
     Peak object for the Theuerkauf (classic TV) fitter
     """
 
+    __slots__ = ("pos", "vol", "width", "tl", "tr", "sh", "sw", "extras")
+
     def __init__(self, pos, vol, width, tl, tr, sh, sw, color=None, cal=None):
         super(TheuerkaufPeak, self).__init__(color, cal)
         # values are uncalibrated!
@@ -170,6 +172,21 @@ class PeakModelTheuerkauf(PeakModel):
     Theuerkauf peak model - "classical" model used by tv
     """
 
+    # The valid states do not change and are shared by all instances
+    fValidParStatus = {
+        "pos": [float, "free", "hold"],
+        "vol": [float, "free", "hold"],
+        "width": [float, "free", "equal"],
+        "tl": [float, "free", "equal", "none"],
+        "tr": [float, "free", "equal", "none"],
+        "sh": [float, "free", "equal", "none"],
+        "sw": [float, "free", "equal", "hold"],
+    }
+    fValidOptStatus = {
+        "integrate": [False, True],
+        "likelihood": ["normal", "poisson"],
+    }
+
     def __init__(self):
         super(PeakModelTheuerkauf, self).__init__()
         self.fParStatus = {
@@ -181,23 +198,10 @@ class PeakModelTheuerkauf(PeakModel):
             "sh": None,
             "sw": None,
         }
-        self.fValidParStatus = {
-            "pos": [float, "free", "hold"],
-            "vol": [float, "free", "hold"],
-            "width": [float, "free", "equal"],
-            "tl": [float, "free", "equal", "none"],
-            "tr": [float, "free", "equal", "none"],
-            "sh": [float, "free", "equal", "none"],
-            "sw": [float, "free", "equal", "hold"],
-        }
         self.fOptStatus = {
             "integrate": False,
             "likelihood": "normal",
         }
-        self.fValidOptStatus = {
-            "integrate": [False, True],
-            "likelihood": ["normal", "poisson"],
-        }
 
         self.ResetParamStatus()
         self.Peak = TheuerkaufPeak
@@ -46,6 +46,37 @@ def SearchNuclide(nuclide, database):
     return data
 
 
+def SearchNuclides(nuclides, database):
+    """
+    Searches for information about several nuclides at once.
+    """
+    if database == "IAEA":
+        return IAEALibraries.SearchNuclides(nuclides)
+    return [SearchNuclide(nuclide, database) for nuclide in nuclides]
+
+
+def SearchEnergy(energy, fuzziness):
+    """
+    Searches the transitions of all nuclides in the IAEA database within
+    energy +- fuzziness.
+    """
+    return IAEALibraries.SearchEnergy(energy, fuzziness)
+
+
+def TableOfTransitions(transitions):
+    """
+    Creates a table of transitions of several nuclides.
+    """
+    table = hdtv.util.Table(
+        data=transitions,
+        keys=["energy", "intensity", "nuclide"],
+        sortBy=None,
+        ignoreEmptyCols=False,
+    )
+
+    hdtv.ui.msg(html=str(table))
+
+
 def TableOfNuclide(data):
     """
     Creates a table of the given data.
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+# HDTV - A ROOT-based spectrum analysis software
+#  Copyright (C) 2006-2019  The HDTV development team (see file AUTHORS)
+#
+# This file is part of HDTV.
+#
+# HDTV is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 2 of the License, or (at your
+# option) any later version.
+#
+# HDTV is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HDTV; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+
+"""
+Manifest of the core plugins
+
+Plugins in core_plugins are imported at startup. Plugins in lazy_plugins
+are imported on first use of one of their commands (given with their
+level) or options (given by prefix); until then, only command stubs are
+registered.
+"""
+
+core_plugins = [
+    "hdtv.plugins.textInterface",
+    "hdtv.plugins.ls",
+    "hdtv.plugins.run",
+    "hdtv.plugins.specInterface",
+    "hdtv.plugins.fitInterface",
+    "hdtv.plugins.config",
+    "hdtv.plugins.fitlist",
+    "hdtv.plugins.peakfinder",
+    # Registers the cut hotkeys, which are needed for matrices opened by
+    # other plugins (e.g. "root matrix get" or "sort listmode")
+    "hdtv.plugins.matInterface",
+]
+
+lazy_plugins = {
+    "hdtv.plugins.calInterface": {
+        "commands": {"calibration": 0, "nuclide": 1},
+        "options": [],
+    },
+    "hdtv.plugins.rootInterface": {"commands": {"root": 0}, "options": []},
+    "hdtv.plugins.fittex": {"commands": {"fit tex": 1}, "options": []},
+    "hdtv.plugins.fitexport": {"commands": {"fit export": 1}, "options": []},
+    "hdtv.plugins.fitmap": {
+        "commands": {"fit position": 1, "calibration position recalibrate": 1},
+        "options": [],
+    },
+    "hdtv.plugins.dblookup": {"commands": {"db": 1}, "options": ["database."]},
+    "hdtv.plugins.printing": {"commands": {"print": 1}, "options": []},
+    "hdtv.plugins.sessionInterface": {"commands": {"session": 1}, "options": []},
+    "hdtv.plugins.sortInterface": {"commands": {"sort": 0}, "options": []},
+}
+
+
+def RegisterLazyPlugins():
+    """
+    Register command stubs and option loaders for all lazy_plugins
+    """
+    import hdtv.cmdline
+    import hdtv.options
+
+    for (module, manifest) in lazy_plugins.items():
+        plugin = hdtv.cmdline.AddLazyPlugin(module, manifest["commands"])
+        for prefix in manifest["options"]:
+            hdtv.options.RegisterLoader(prefix, plugin.Load)
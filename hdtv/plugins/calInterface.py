@@ -25,6 +25,7 @@ Functions for efficiency, energy calibration
 
 import argparse
 import math
+import numpy as np
 from uncertainties import ufloat, ufloat_fromstr
 
 import hdtv.efficiency
@@ -194,6 +195,88 @@ class EffCalIf(object):
         )
         hdtv.ui.msg(html=str(table))
 
+    def Apply(self, spectrumIDs, npoints=1000):
+        """
+        Efficiency correct the volumes of all fitted peaks of the given
+        spectra. The efficiency of each spectrum is evaluated once on a
+        cached interpolation grid for all peaks at the same time.
+
+        Returns a list of dicts (one per peak) with the keys "spec", "id",
+        "pos", "vol", "eff" and "vol/eff".
+        """
+        results = list()
+        for spectrumID in spectrumIDs:
+            spec = self.spectra.dict[spectrumID]
+            if not spec.effCal:
+                raise hdtv.cmdline.HDTVCommandError(
+                    "Efficiency function not set for spectrum %s, use calibration efficiency set"
+                    % spectrumID
+                )
+
+            ids = list()
+            energies = list()
+            volumes = list()
+            for fitID in spec.ids:
+                fit = spec.dict[fitID]
+                for num, peak in enumerate(fit.peaks):
+                    ids.append(hdtv.util.ID(fitID.major, num))
+                    energies.append(peak.pos_cal)
+                    volumes.append(peak.vol)
+            if not ids:
+                continue
+
+            E = np.array([e.nominal_value for e in energies])
+            vol = np.array([v.nominal_value for v in volumes])
+            vol_err = np.array([v.std_dev for v in volumes])
+            try:
+                eff, eff_err = spec.effCal.cached(E, npoints=npoints)
+            except ValueError as msg:
+                raise hdtv.cmdline.HDTVCommandError(
+                    "Spectrum %s: %s" % (spectrumID, msg)
+                )
+            if not spec.effCal.grid.hasErrors:
+                hdtv.ui.warning(
+                    "No covariance matrix for efficiency of spectrum %s, "
+                    "ignoring efficiency errors" % spectrumID
+                )
+
+            # Uncertainties of volume and efficiency are independent
+            corr = vol / eff
+            with np.errstate(divide="ignore", invalid="ignore"):
+                corr_err = np.abs(corr) * np.sqrt(
+                    np.nan_to_num(vol_err / vol) ** 2 + (eff_err / eff) ** 2
+                )
+
+            for i, peakID in enumerate(ids):
+                results.append(
+                    {
+                        "spec": spectrumID,
+                        "id": peakID,
+                        "pos": energies[i],
+                        "vol": volumes[i],
+                        "eff": ufloat(eff[i], eff_err[i]),
+                        "vol/eff": ufloat(corr[i], corr_err[i]),
+                    }
+                )
+        return results
+
+    def WriteApplied(self, results, filename):
+        """
+        Write efficiency corrected volumes (see Apply) to a text table
+        """
+        keys = ["spec", "id", "pos", "vol", "eff", "vol/eff"]
+        header = ["spec", "id"]
+        for key in keys[2:]:
+            header += [key, "d" + key]
+        lines = ["# " + "\t".join(header)]
+        for res in results:
+            line = [str(res["spec"]), str(res["id"])]
+            for key in keys[2:]:
+                line += [repr(res[key].nominal_value), repr(res[key].std_dev)]
+            lines.append("\t".join(line))
+        with open(filename, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
     def Plot(self, spectrumID):
         """
         Plot efficiency
@@ -626,6 +709,40 @@ class EffCalHDTVInterface(object):
         )
         hdtv.cmdline.AddCommand(prog, self.FitEff, parser=parser, fileArgs=False)
 
+        prog = "calibration efficiency apply"
+        description = "Efficiency correct the volumes of all fitted peaks"
+        parser = hdtv.cmdline.HDTVOptionParser(prog=prog, description=description)
+        parser.add_argument(
+            "-s",
+            "--spectrum",
+            help="Spectrum IDs to apply efficiency to (default: %(default)s)",
+            action="store",
+            default="active",
+        )
+        parser.add_argument(
+            "-f",
+            "--file",
+            help="Write table of corrected volumes to file",
+            action="store",
+            default=None,
+        )
+        parser.add_argument(
+            "-F",
+            "--force",
+            action="store_true",
+            default=False,
+            help="overwrite existing files without asking",
+        )
+        parser.add_argument(
+            "-n",
+            "--npoints",
+            help="Number of points of efficiency interpolation grid (default: %(default)s)",
+            action="store",
+            type=int,
+            default=1000,
+        )
+        hdtv.cmdline.AddCommand(prog, self.ApplyEff, parser=parser, fileargs=True)
+
         prog = "calibration efficiency list"
         description = "List efficiencies"
         parser = hdtv.cmdline.HDTVOptionParser(prog=prog, description=description)
@@ -804,6 +921,34 @@ class EffCalHDTVInterface(object):
             args.database,
         )
 
+    def ApplyEff(self, args):
+        """
+        Efficiency correct volumes of all fits
+        """
+        try:
+            ids = hdtv.util.ID.ParseIds(args.spectrum, self.spectra)
+        except ValueError:
+            raise hdtv.cmdline.HDTVCommandError("Invalid ID %s" % args.spectrum)
+
+        if len(ids) == 0:
+            hdtv.ui.warning("No spectra chosen or active")
+            return
+
+        results = self.effIf.Apply(ids, npoints=args.npoints)
+
+        if args.file is not None:
+            filename = hdtv.util.user_save_file(args.file, args.force)
+            if not filename:
+                return
+            self.effIf.WriteApplied(results, filename)
+        else:
+            table = hdtv.util.Table(
+                data=results,
+                keys=["spec", "id", "pos", "vol", "eff", "vol/eff"],
+                ignoreEmptyCols=False,
+            )
+            hdtv.ui.msg(html=str(table))
+
     def ListEff(self, args):
         """
         List efficiencies
@@ -1125,7 +1270,23 @@ class EnergyCalHDTVInterface(object):
             default="active",
             help="Database from witch the data should be imported.",
         )
-        parser.add_argument("nuclide", nargs="+", help="nuclide to query")
+        parser.add_argument(
+            "-e",
+            "--energy",
+            action="store",
+            default=None,
+            type=float,
+            help="list transitions of all nuclides (IAEA database) near this energy",
+        )
+        parser.add_argument(
+            "-f",
+            "--fuzziness",
+            action="store",
+            default=1.0,
+            type=float,
+            help="energy window for --energy (default: %(default)s)",
+        )
+        parser.add_argument("nuclide", nargs="*", help="nuclide to query")
         hdtv.cmdline.AddCommand(prog, self.Nuc, parser=parser)
 
         prog = "calibration position read"
@@ -1246,8 +1407,18 @@ class EnergyCalHDTVInterface(object):
         """
         Returns a table of energies and intensities of the given nuclide.
         """
-        for nuclide in args.nuclide:
-            data = EnergyCalibration.SearchNuclide(nuclide, args.database)
+        if args.energy is not None:
+            transitions = EnergyCalibration.SearchEnergy(args.energy, args.fuzziness)
+            if args.nuclide:
+                transitions = [t for t in transitions if t["nuclide"] in args.nuclide]
+            if not transitions:
+                hdtv.ui.warning("No transitions found.")
+                return
+            EnergyCalibration.TableOfTransitions(transitions)
+            return
+        if not args.nuclide:
+            raise hdtv.cmdline.HDTVCommandError("No nuclide given.")
+        for data in EnergyCalibration.SearchNuclides(args.nuclide, args.database):
             EnergyCalibration.TableOfNuclide(data)
 
     def CalPosSet(self, args):
@@ -1370,10 +1541,7 @@ class EnergyCalHDTVInterface(object):
                 )
 
         # finds the right transitions for the given nuclide(s) from table
-        nuclei = [
-            EnergyCalibration.SearchNuclide(nucl, args.database)
-            for nucl in args.nuclide
-        ]
+        nuclei = EnergyCalibration.SearchNuclides(args.nuclide, args.database)
         transitions = [transition for n in nuclei for transition in n["transitions"]]
         energies = [t["energy"] for t in transitions]
 
@@ -23,6 +23,7 @@
 Gamma database integration for HDTV
 """
 
+import os
 import re
 from html import escape
 
@@ -30,6 +31,7 @@ import hdtv.plugins
 import hdtv.cmdline
 import hdtv.options
 import hdtv.database
+import hdtv.database.DDEPLibraries
 import hdtv.ui
 
 import hdtv.fit
@@ -126,6 +128,40 @@ class Database(object):
         parser.add_argument("database", default=None, nargs="*")
         hdtv.cmdline.AddCommand(prog, self.Info, parser=parser, fileargs=False)
 
+        prog = "db ddep fetch"
+        description = "Download DDEP decay data of nuclides into the local cache"
+        parser = hdtv.cmdline.HDTVOptionParser(prog=prog, description=description)
+        parser.add_argument(
+            "-F",
+            "--force",
+            action="store_true",
+            default=False,
+            help="download again even if the cached data has not expired",
+        )
+        parser.add_argument("nuclide", nargs="+", help="nuclides to fetch")
+        hdtv.cmdline.AddCommand(prog, self.DDEPFetch, parser=parser, fileargs=False)
+
+        prog = "db ddep import"
+        description = "Import a directory of DDEP .lara.txt files into the local cache"
+        parser = hdtv.cmdline.HDTVOptionParser(prog=prog, description=description)
+        parser.add_argument("directory", help="directory containing .lara.txt files")
+        hdtv.cmdline.AddCommand(prog, self.DDEPImport, parser=parser, fileargs=True)
+
+        prog = "db ddep list"
+        description = "List nuclides in the local DDEP cache"
+        parser = hdtv.cmdline.HDTVOptionParser(prog=prog, description=description)
+        hdtv.cmdline.AddCommand(prog, self.DDEPList, parser=parser, fileargs=False)
+
+        prog = "db ddep clear"
+        description = "Remove all nuclides from the local DDEP cache"
+        parser = hdtv.cmdline.HDTVOptionParser(prog=prog, description=description)
+        hdtv.cmdline.AddCommand(
+            prog,
+            lambda args: hdtv.database.DDEPLibraries.ClearCache(),
+            parser=parser,
+            fileargs=False,
+        )
+
     def FitPeakPostHook(self, fitclass):
         """
         Hook for hdtv.fit.Fit.FitPeakFunc function to automatically list matching
@@ -191,6 +227,33 @@ class Database(object):
             except KeyError:
                 raise hdtv.cmdline.HDTVCommandError("No such database: " + db.name)
 
+    def DDEPFetch(self, args):
+        """
+        Download DDEP decay data into the local cache
+        """
+        hdtv.database.DDEPLibraries.Prefetch(args.nuclide, force=args.force)
+        hdtv.ui.msg("Fetched " + str(len(args.nuclide)) + " nuclides")
+
+    def DDEPImport(self, args):
+        """
+        Import a directory of lara files into the local DDEP cache
+        """
+        if not os.path.isdir(args.directory):
+            raise hdtv.cmdline.HDTVCommandError("No such directory: " + args.directory)
+        imported = hdtv.database.DDEPLibraries.ImportDirectory(args.directory)
+        if not imported:
+            hdtv.ui.warning("No .lara.txt files found in " + args.directory)
+            return
+        hdtv.ui.msg("Imported " + str(len(imported)) + " nuclides")
+
+    def DDEPList(self, args):
+        """
+        List nuclides in the local DDEP cache
+        """
+        nuclides = hdtv.database.DDEPLibraries.CachedNuclides()
+        hdtv.ui.msg(" ".join(nuclides))
+        hdtv.ui.msg(str(len(nuclides)) + " nuclides in cache")
+
     def assureOpen(self):
         """
         assure that the database has been opened
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+
+# HDTV - A ROOT-based spectrum analysis software
+#  Copyright (C) 2006-2019  The HDTV development team (see file AUTHORS)
+#
+# This file is part of HDTV.
+#
+# HDTV is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 2 of the License, or (at your
+# option) any later version.
+#
+# HDTV is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HDTV; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+
+"""
+Export the results of stored fits as columns (CSV or numpy .npz), with one
+row per peak, for further analysis
+"""
+
+import os
+import csv
+
+import numpy as np
+
+import hdtv.cal
+import hdtv.cmdline
+import hdtv.ui
+import hdtv.util
+
+
+class FitExport(object):
+    """
+    All values are collected in a single pass over the fits into typed
+    columns; the calibration of positions and widths is then applied to
+    whole columns at once. Fits are converted in chunks, so that only the
+    columns (and not the intermediate values) of very large exports are
+    kept in memory.
+    """
+
+    formats = ["csv", "npz"]
+    integrals = ["tot", "bg", "sub"]
+
+    def __init__(self, spectra):
+        hdtv.ui.debug("Loaded plugin for exporting fit results")
+
+        self.spectra = spectra
+
+        prog = "fit export"
+        description = (
+            "write the results of fits (one row per peak, including "
+            "integrals and calibration) to a CSV or numpy .npz file"
+        )
+        parser = hdtv.cmdline.HDTVOptionParser(prog=prog, description=description)
+        parser.add_argument(
+            "-s",
+            "--spectrum",
+            action="store",
+            default="active",
+            help="select spectra to export",
+        )
+        parser.add_argument(
+            "-f",
+            "--fit",
+            action="store",
+            default="all",
+            help="specify which fits to export",
+        )
+        parser.add_argument(
+            "--format",
+            choices=self.formats,
+            default=None,
+            help="file format (default: from the file extension, else csv)",
+        )
+        parser.add_argument(
+            "-c",
+            "--chunk",
+            type=int,
+            default=10000,
+            help="number of fits converted at once (default: %(default)s)",
+        )
+        parser.add_argument(
+            "-F",
+            "--force",
+            action="store_true",
+            default=False,
+            help="overwrite existing files without asking",
+        )
+        parser.add_argument("filename", metavar="output-file", help="file to write to")
+        hdtv.cmdline.AddCommand(prog, self.FitExport, fileargs=True, parser=parser)
+
+    def Keys(self, params, ncal):
+        """
+        Names of the columns, in order
+        """
+        keys = ["spectrum", "name", "fit", "peak", "model", "chi"]
+        keys += ["channel", "channel_err"]
+        for p in params:
+            keys += [p, p + "_err"]
+        for kind in self.integrals:
+            keys += [kind + "_vol", kind + "_vol_err"]
+        keys += ["cal%d" % i for i in range(ncal)]
+        return keys
+
+    def Columns(self, fits, params, ncal):
+        """
+        Columns (a dict of numpy arrays) for a list of (spectrum ID,
+        spectrum, fit). Fits without peaks get a single row with peak -1.
+        """
+        n = sum(max(len(fit.peaks), 1) for (sid, spec, fit) in fits)
+        columns = {
+            "spectrum": np.empty(n, dtype=np.int32),
+            "fit": np.empty(n, dtype=np.int32),
+            "peak": np.empty(n, dtype=np.int32),
+            "chi": np.full(n, np.nan),
+        }
+        names = list()
+        models = list()
+        for key in self.Keys(params, 0)[6:]:
+            columns[key] = np.full(n, np.nan)
+        cal = np.zeros((n, ncal))
+
+        row = 0
+        for (sid, spec, fit) in fits:
+            coeffs = hdtv.cal.GetCoeffs(spec.cal) or [0.0, 1.0]
+            integral = fit.integral or dict()
+            peaks = fit.peaks or [None]
+            end = row + len(peaks)
+            columns["spectrum"][row:end] = sid.major
+            columns["fit"][row:end] = fit.ID.major
+            columns["peak"][row:end] = np.arange(len(peaks)) if fit.peaks else -1
+            if fit.chi is not None:
+                columns["chi"][row:end] = fit.chi
+            cal[row:end, : len(coeffs)] = coeffs
+            for kind in self.integrals:
+                if integral.get(kind):
+                    vol = integral[kind]["uncal"]["vol"]
+                    columns[kind + "_vol"][row:end] = vol.nominal_value
+                    columns[kind + "_vol_err"][row:end] = vol.std_dev
+            names += [spec.name] * len(peaks)
+            models += [fit.fitter.peakModel.name] * len(peaks)
+            for peak in fit.peaks:
+                for p in params:
+                    # Position and width are calibrated below; all other
+                    # parameters are taken as the peak reports them
+                    if p in ["pos", "width"]:
+                        value = getattr(peak, p, None)
+                    else:
+                        value = getattr(peak, p + "_cal", getattr(peak, p, None))
+                    if value is None:
+                        continue
+                    columns[p][row] = getattr(value, "nominal_value", value)
+                    columns[p + "_err"][row] = getattr(value, "std_dev", 0.0)
+                row += 1
+            row = end
+
+        columns["name"] = np.array(names, dtype=str)
+        columns["model"] = np.array(models, dtype=str)
+        for i in range(ncal):
+            columns["cal%d" % i] = cal[:, i]
+
+        # Calibrate (the calibration is a polynomial in the channel)
+        ch = columns["pos"]
+        columns["channel"] = ch.copy()
+        columns["channel_err"] = columns["pos_err"].copy()
+        columns["pos"] = self._Ch2E(cal, ch)
+        columns["pos_err"] = np.abs(self._dEdCh(cal, ch) * columns["pos_err"])
+        if "width" in params:
+            hwhm = columns["width"] / 2
+            columns["width"] = self._Ch2E(cal, ch + hwhm) - self._Ch2E(cal, ch - hwhm)
+            columns["width_err"] = np.abs(
+                (self._dEdCh(cal, ch + hwhm) + self._dEdCh(cal, ch - hwhm))
+                / 2.0
+                * columns["width_err"]
+            )
+        return columns
+
+    @staticmethod
+    def _Ch2E(cal, ch):
+        energy = np.zeros_like(ch)
+        for i in reversed(range(cal.shape[1])):
+            energy = energy * ch + cal[:, i]
+        return energy
+
+    @staticmethod
+    def _dEdCh(cal, ch):
+        slope = np.zeros_like(ch)
+        for i in reversed(range(1, cal.shape[1])):
+            slope = slope * ch + i * cal[:, i]
+        return slope
+
+    def Export(self, fname, fits, fmt="csv", chunk=10000):
+        """
+        Write a list of (spectrum ID, spectrum, fit) to fname. Returns the
+        number of rows written.
+        """
+        params = ["pos"]
+        ncal = 2
+        for (sid, spec, fit) in fits:
+            for p in fit.fitter.peakModel.fValidParStatus.keys():
+                if p not in params:
+                    params.append(p)
+            ncal = max(ncal, len(hdtv.cal.GetCoeffs(spec.cal)))
+        keys = self.Keys(params, ncal)
+        chunk = max(chunk, 1)
+        parts = (
+            self.Columns(fits[i : i + chunk], params, ncal)
+            for i in range(0, len(fits), chunk)
+        )
+
+        count = 0
+        if fmt == "csv":
+            with open(fname, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(keys)
+                for columns in parts:
+                    writer.writerows(zip(*(columns[key].tolist() for key in keys)))
+                    count += len(columns["fit"])
+        else:
+            parts = list(parts)
+            columns = {
+                key: np.concatenate([part[key] for part in parts]) for key in keys
+            }
+            # np.savez would append .npz to any other file name
+            with open(fname, "wb") as f:
+                np.savez(f, **columns)
+            count = len(columns["fit"])
+        return count
+
+    def FitExport(self, args):
+        fname = os.path.expanduser(args.filename)
+        fmt = args.format
+        if fmt is None:
+            fmt = "npz" if fname.lower().endswith(".npz") else "csv"
+
+        sids = hdtv.util.ID.ParseIds(args.spectrum, self.spectra)
+        if not sids:
+            hdtv.ui.warning("No spectra chosen or active")
+            return
+        fits = list()
+        for sid in sids:
+            spec = self.spectra.dict[sid]
+            ids = hdtv.util.ID.ParseIds(args.fit, spec)
+            fits.extend((sid, spec, spec.dict[ID]) for ID in ids)
+        if not fits:
+            hdtv.ui.warning("No fits to export")
+            return
+
+        if not hdtv.util.user_save_file(fname, args.force):
+            return
+        count = self.Export(fname, fits, fmt, args.chunk)
+        hdtv.ui.msg("Exported %d peaks of %d fits to %s" % (count, len(fits), fname))
+
+
+# plugin initialisation
+import __main__
+
+fit_export = FitExport(__main__.spectra)
@@ -25,6 +25,8 @@ Write and Read Fitlist saved in xml format
 
 import os
 import glob
+import weakref
+import concurrent.futures
 import hdtv.cmdline
 import hdtv.options
 import hdtv.fitxml
@@ -39,20 +41,96 @@ class FitlistManager(object):
         self.spectra = spectra
         self.xml = hdtv.fitxml.FitXml(spectra)
         self.list = dict()
+        # fits written to (or read from) each file, to know which fits
+        # have to be appended
+        self.saved = dict()
 
         self.tv = FitlistHDTVInterface(self)
 
-    def WriteXML(self, sid, fname=None):
+    def _Remember(self, fname, fits, data=None):
+        """
+        Remember that fits are in fname, together with their serialization
+        (data) to notice later changes
+        """
+        if data is None:
+            data = [self.xml.Fit2Bytes(fit) for fit in fits]
+        saved = self.saved.setdefault(fname, dict())
+        for (fit, fitData) in zip(fits, data):
+            saved[id(fit)] = (weakref.ref(fit), fitData)
+
+    def _Unsaved(self, fname, fits):
+        """
+        Split fits into those which are not in fname yet and those which
+        are, but have changed since they were written or read
+        """
+        saved = self.saved[fname]
+        new = list()
+        changed = list()
+        for fit in fits:
+            try:
+                (ref, fitData) = saved[id(fit)]
+            except KeyError:
+                new.append(fit)
+                continue
+            if ref() is not fit:
+                new.append(fit)
+            elif self.xml.Fit2Bytes(fit) != fitData:
+                changed.append(fit)
+        return (new, changed)
+
+    def WriteXML(self, sid, fname=None, append=False):
+        """
+        Write the fits of spectrum sid to fname. With append, only the fits
+        which are not in the file yet are appended to it; this needs a file
+        written or read in this session. If fits in the file have changed
+        since, the whole file is written again. Returns the number of fits
+        written.
+        """
         name = self.spectra.dict[sid].name
         # remember absolute pathname for later use
         fname = os.path.abspath(fname)
         self.list[name] = fname
+        fits = sorted(self.spectra.dict[sid].dict.values(), key=lambda fit: fit.ID)
+        if append and os.path.exists(fname):
+            if fname.split(".")[-1] in ["gz", "xz", "bz2"]:
+                raise hdtv.cmdline.HDTVCommandError(
+                    "Cannot append to compressed file %s" % fname
+                )
+            if fname not in self.saved:
+                raise hdtv.cmdline.HDTVCommandError(
+                    "Cannot append to %s, as it was neither written nor read "
+                    "in this session" % fname
+                )
+            (new, changed) = self._Unsaved(fname, fits)
+            if not changed:
+                with open(fname, "r+b") as f:
+                    data = self.xml.AppendFitlist(f, new)
+                self._Remember(fname, new, data)
+                return len(new)
+            hdtv.ui.info(
+                "%d fits in %s have changed, writing all fits again"
+                % (len(changed), fname)
+            )
+        self.saved.pop(fname, None)
         with hdtv.util.open_compressed(fname, mode="wb") as f:
-            self.xml.WriteFitlist(f, sid)
+            data = self.xml.WriteFitlist(f, sid)
+        self._Remember(fname, fits, data)
+        return len(fits)
 
     def ReadXML(
-        self, sid, fname, calibrate=False, refit=False, interactive=True, associate=True
+        self,
+        sid,
+        fname,
+        calibrate=False,
+        refit=False,
+        interactive=True,
+        associate=True,
+        root=None,
     ):
+        """
+        Read the fits of spectrum sid from fname. If root (the result of
+        ParseXML) is given, fname is not read again.
+        """
         spec = self.spectra.dict[sid]
         # remember absolute pathname for later use
         fname = os.path.abspath(fname)
@@ -60,15 +138,39 @@ class FitlistManager(object):
             self.list[spec.name] = fname
         else:
             self.list.pop(spec.name, None)
-        with hdtv.util.open_compressed(fname, mode="rb") as f:
-            self.xml.ReadFitlist(
-                f,
+        if root is not None:
+            (count, fits) = self.xml.ReadFitlist(
+                None,
                 sid,
                 calibrate=calibrate,
                 refit=refit,
                 interactive=interactive,
                 fname=fname,
+                root=root,
             )
+        else:
+            with hdtv.util.open_compressed(fname, mode="rb") as f:
+                (count, fits) = self.xml.ReadFitlist(
+                    f,
+                    sid,
+                    calibrate=calibrate,
+                    refit=refit,
+                    interactive=interactive,
+                    fname=fname,
+                )
+        self._Remember(fname, fits)
+
+    def ParseXML(self, fname):
+        """
+        Parse fname without restoring any fits (thread-safe)
+        """
+        with hdtv.util.open_compressed(fname, mode="rb") as f:
+            try:
+                return self.xml.ParseFitlist(f)
+            except SyntaxError:
+                raise hdtv.cmdline.HDTVCommandError(
+                    "Error reading fits from '%s'." % fname
+                )
 
     def WriteList(self, fname):
         lines = list()
@@ -84,6 +186,11 @@ class FitlistManager(object):
             f.write(text)
 
     def ReadList(self, fname):
+        # The first spectrum of each name is used
+        names = dict()
+        for ID in self.spectra.ids:
+            names.setdefault(self.spectra.dict[ID].name, ID)
+        entries = list()
         with open(fname, "r") as f:
             dirname = os.path.dirname(fname)
             for linenum, l in enumerate(f):
@@ -100,13 +207,9 @@ class FitlistManager(object):
                     if not os.path.exists(xmlfile):
                         hdtv.ui.warning("No such file %s" % xmlfile)
                         continue
-                    sid = None
-                    for ID in self.spectra.ids:
-                        if self.spectra.dict[ID].name == name:
-                            sid = ID
-                            break
+                    sid = names.get(name)
                     if sid is not None:
-                        self.ReadXML(sid, xmlfile)
+                        entries.append((sid, xmlfile))
                     else:
                         hdtv.ui.warning("Spectrum %s is not loaded. " % name)
                 except ValueError:
@@ -114,6 +217,21 @@ class FitlistManager(object):
                         "Could not parse line %d of file %s: ignored."
                         % (linenum + 1, fname)
                     )
+        if not entries:
+            return
+
+        # Parsing the files does not depend on the session, so they are
+        # parsed in parallel, while the fits are restored here, in order
+        with concurrent.futures.ThreadPoolExecutor() as pool:
+            roots = pool.map(self.ParseXML, [xmlfile for (sid, xmlfile) in entries])
+            if self.spectra.viewport:
+                self.spectra.viewport.LockUpdate()
+            try:
+                for ((sid, xmlfile), root) in zip(entries, roots):
+                    self.ReadXML(sid, xmlfile, root=root)
+            finally:
+                if self.spectra.viewport:
+                    self.spectra.viewport.UnlockUpdate()
 
 
 class FitlistHDTVInterface(object):
@@ -138,6 +256,16 @@ class FitlistHDTVInterface(object):
             default=False,
             help="overwrite existing files without asking",
         )
+        parser.add_argument(
+            "-a",
+            "--append",
+            action="store_true",
+            default=False,
+            help="append the fits which are not in the file yet, "
+            "instead of writing all fits again (only for files written "
+            "or read in this session; if fits in the file have changed, "
+            "all fits are written again)",
+        )
         parser.add_argument(
             "filename",
             nargs="?",
@@ -244,6 +372,12 @@ class FitlistHDTVInterface(object):
                     # TODO: do something sensible here... Luckily hdtv will not
                     # overwrite spectra without asking...
                     pass
+            if args.append and os.path.exists(fname):
+                count = self.FitlistIf.WriteXML(sid, fname, append=True)
+                hdtv.ui.msg(
+                    "Appended %d fits of spectrum %s to %s" % (count, sid, fname)
+                )
+                continue
             hdtv.ui.msg("Saving fits of spectrum %d to %s" % (sid, fname))
 
             if hdtv.util.user_save_file(fname, args.force):
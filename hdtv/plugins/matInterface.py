@@ -34,7 +34,7 @@ import hdtv.cmdline
 from hdtv.specreader import SpecReader, SpecReaderError
 
 from hdtv.matrix import Matrix
-from hdtv.histogram import MHisto2D
+from hdtv.histogram import OpenMatrix
 
 
 class MatInterface(object):
@@ -169,7 +169,7 @@ class MatInterface(object):
     def LoadMatrix(self, fname, sym, ID=None):
         # FIXME: just for testing!
         try:
-            histo = MHisto2D(fname, sym)
+            histo = OpenMatrix(fname, sym)
         except (OSError, SpecReaderError):
             hdtv.ui.warning("Could not load %s" % fname)
             return
@@ -37,7 +37,7 @@ import hdtv.util
 import hdtv.ui
 
 from hdtv.spectrum import Spectrum
-from hdtv.histogram import Histogram, RHisto2D, THnSparseWrapper
+from hdtv.histogram import Histogram, RHisto2D, SymHisto2D, THnSparseWrapper
 from hdtv.matrix import Matrix
 
 
@@ -190,11 +190,12 @@ class RootFileInterface(object):
         # a POSIX directory. If rfile is not None, we *changed* the ROOT file.
         if root_dir is None or rfile is not None:
             if self.rootfile is not None:
-                hdtv.ui.info("Closing old root file %s" % self.rootfile.GetName())
-                self.rootfile.Close()
+                hdtv.ui.info("Leaving root file %s" % self.rootfile.GetName())
+                hdtv.rfile_utils.file_pool.Release(self.rootfile)
             self.rootfile = rfile
             if self.rootfile is not None:
                 hdtv.ui.info("Opened new root file %s" % self.rootfile.GetName())
+                hdtv.rfile_utils.file_pool.Pin(self.rootfile)
 
         if root_dir is not None:
             root_dir.cd()
@@ -212,7 +213,7 @@ class RootFileInterface(object):
         if self.rootfile is None:
             hdtv.ui.info("No root file open, no action taken")
         else:
-            self.rootfile.Close()
+            hdtv.rfile_utils.file_pool.Close(self.rootfile)
             self.rootfile = None
 
     def RootGet_Completer(self, text, args=None):
@@ -275,9 +276,6 @@ class RootFileInterface(object):
             else:
                 obj = None
 
-            if rfile:
-                rfile.Close()
-
         return obj
 
     def GetCut(self, path):
@@ -368,7 +366,16 @@ class RootFileInterface(object):
         if rhist is None:
             raise hdtv.cmdline.HDTVCommandError("Failed to open 2D histogram")
 
-        if isinstance(rhist, ROOT.TH2):
+        if sym and isinstance(rhist, ROOT.TH2):
+            # Only one triangle of a symmetric matrix is kept in memory
+            try:
+                hist = SymHisto2D(rhist)
+            except RuntimeError as msg:
+                raise hdtv.cmdline.HDTVCommandError(str(msg))
+            # With TH1.AddDirectory(False), every read creates a new TH2,
+            # so nothing else refers to the full matrix
+            rhist.Delete()
+        elif isinstance(rhist, ROOT.TH2):
             hist = RHisto2D(rhist)
         elif isinstance(rhist, ROOT.THnSparse):
             hist = RHisto2D(THnSparseWrapper(rhist))
@@ -20,7 +20,8 @@
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
 
 """
-Plugin for executing a python script from the command line
+Plugin for executing a python script from the command line, and for
+running a batch file over many files in parallel
 """
 
 import os
@@ -28,6 +29,7 @@ import sys
 
 import hdtv.ui
 import hdtv.cmdline
+import hdtv.batch
 
 
 def run(args):
@@ -44,6 +46,55 @@ def run(args):
         hdtv.ui.error(str(err))
 
 
+def map_batchfile(args):
+    """
+    Executes a batch file for many files in parallel headless sessions
+    """
+    try:
+        jobs = hdtv.batch.Map(
+            args.batchfile, args.files, args.output, jobs=args.jobs, chunk=args.chunk
+        )
+    except IOError as err:
+        raise hdtv.cmdline.HDTVCommandError(str(err))
+    hdtv.ui.msg(html=str(hdtv.batch.Summary(jobs)))
+    for fname in hdtv.batch.MergeOutputs(jobs, args.output):
+        hdtv.ui.msg("Merged %s" % fname)
+    failed = [job for job in jobs if job.returncode != 0]
+    if failed:
+        hdtv.ui.warning("%d of %d jobs failed" % (len(failed), len(jobs)))
+
+
 hdtv.cmdline.AddCommand("run", run, nargs=1, fileargs=True)
 
+prog = "map"
+description = (
+    "Execute a batch file for each of many files in parallel headless "
+    "sessions, and merge the fit lists and tables they write. In the batch "
+    "file, $file, $name, $stem, $dir and $index refer to the input file."
+)
+parser = hdtv.cmdline.HDTVOptionParser(prog=prog, description=description)
+parser.add_argument(
+    "-j",
+    "--jobs",
+    type=int,
+    default=None,
+    help="number of parallel sessions (default: number of CPUs)",
+)
+parser.add_argument(
+    "-c",
+    "--chunk",
+    type=int,
+    default=1,
+    help="number of files per process (default: %(default)s)",
+)
+parser.add_argument(
+    "-o",
+    "--output",
+    default="hdtv-map",
+    help="output directory (default: %(default)s)",
+)
+parser.add_argument("batchfile", help="batch file template")
+parser.add_argument("files", nargs="+", help="input files")
+hdtv.cmdline.AddCommand(prog, map_batchfile, level=2, parser=parser, fileargs=True)
+
 hdtv.ui.debug("Loaded run plugin")
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+# HDTV - A ROOT-based spectrum analysis software
+#  Copyright (C) 2006-2019  The HDTV development team (see file AUTHORS)
+#
+# This file is part of HDTV.
+#
+# HDTV is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 2 of the License, or (at your
+# option) any later version.
+#
+# HDTV is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HDTV; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+
+"""
+Save and restore the whole session in a snapshot file
+"""
+
+import os
+import time
+
+import hdtv.cmdline
+import hdtv.snapshot
+import hdtv.ui
+import hdtv.util
+
+
+class SessionInterface(object):
+    def __init__(self, spectra):
+        hdtv.ui.debug("Loaded session plugin")
+
+        self.spectra = spectra
+
+        prog = "session save"
+        description = (
+            "Save all spectra with their calibrations, efficiencies and fits, "
+            "and the matrices with their cuts, to a snapshot file"
+        )
+        parser = hdtv.cmdline.HDTVOptionParser(prog=prog, description=description)
+        parser.add_argument(
+            "-F",
+            "--force",
+            action="store_true",
+            default=False,
+            help="overwrite existing files without asking",
+        )
+        parser.add_argument("filename", metavar="output-file")
+        hdtv.cmdline.AddCommand(prog, self.SessionSave, fileargs=True, parser=parser)
+
+        prog = "session load"
+        description = (
+            "Replace the current session by the one stored in a snapshot "
+            "file. The fits are restored without fitting again."
+        )
+        parser = hdtv.cmdline.HDTVOptionParser(prog=prog, description=description)
+        parser.add_argument("filename")
+        hdtv.cmdline.AddCommand(prog, self.SessionLoad, fileargs=True, parser=parser)
+
+    def SessionSave(self, args):
+        fname = os.path.expanduser(args.filename)
+        if not hdtv.util.user_save_file(fname, args.force):
+            return
+        start = time.perf_counter()
+        count = hdtv.snapshot.Save(self.spectra, fname)
+        hdtv.ui.msg(
+            "Saved %d spectra to %s (%.2f s)"
+            % (count, fname, time.perf_counter() - start)
+        )
+
+    def SessionLoad(self, args):
+        fname = os.path.expanduser(args.filename)
+        start = time.perf_counter()
+        try:
+            (nspectra, nfits) = hdtv.snapshot.Load(self.spectra, fname)
+        except (OSError, hdtv.snapshot.SnapshotError) as msg:
+            raise hdtv.cmdline.HDTVCommandError(str(msg))
+        hdtv.ui.msg(
+            "Restored %d spectra with %d fits from %s (%.2f s)"
+            % (nspectra, nfits, fname, time.perf_counter() - start)
+        )
+
+
+import __main__
+
+session_interface = SessionInterface(__main__.spectra)
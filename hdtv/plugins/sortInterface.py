@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+# HDTV - A ROOT-based spectrum analysis software
+#  Copyright (C) 2006-2019  The HDTV development team (see file AUTHORS)
+#
+# This file is part of HDTV.
+#
+# HDTV is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 2 of the License, or (at your
+# option) any later version.
+#
+# HDTV is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HDTV; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+
+"""
+Sort list-mode files into spectra and coincidence matrices
+"""
+
+import os
+import time
+
+import numpy as np
+import ROOT
+
+import hdtv.cal
+import hdtv.cmdline
+import hdtv.color
+import hdtv.sorter
+import hdtv.ui
+import hdtv.util
+
+from hdtv.histogram import Histogram, SymHisto2D
+from hdtv.matrix import Matrix
+from hdtv.specreader import SpecReader, SpecReaderError
+from hdtv.spectrum import Spectrum
+
+
+class SortInterface(object):
+    def __init__(self, spectra):
+        hdtv.ui.debug("Loaded plugin for sorting list-mode data")
+
+        self.spectra = spectra
+
+        prog = "sort listmode"
+        description = (
+            "Sort a list-mode file (fixed-size records of detector, energy "
+            "and time, ordered in time) into one spectrum per detector and, "
+            "with a coincidence window, a symmetric coincidence matrix. The "
+            "results are loaded, or written to files with --output."
+        )
+        parser = hdtv.cmdline.HDTVOptionParser(prog=prog, description=description)
+        parser.add_argument(
+            "-l",
+            "--layout",
+            default=hdtv.sorter.default_layout,
+            help="record layout as comma-separated name:type pairs with numpy "
+            "type codes; the fields detector, energy and time are required, "
+            "fields named _ are skipped (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--big-endian",
+            action="store_true",
+            default=False,
+            help="records are big-endian (default: little-endian)",
+        )
+        parser.add_argument(
+            "-H",
+            "--header",
+            type=int,
+            default=0,
+            help="size of the file header in bytes (default: %(default)s)",
+        )
+        parser.add_argument(
+            "-c",
+            "--callist",
+            default=None,
+            help="calibration list (<detector>: <cal0> <cal1> ...)",
+        )
+        parser.add_argument(
+            "-n",
+            "--nbins",
+            type=int,
+            default=8192,
+            help="number of bins of the spectra (default: %(default)s)",
+        )
+        parser.add_argument(
+            "-b",
+            "--binsize",
+            type=float,
+            default=1.0,
+            help="size of the bins of the spectra (default: %(default)s)",
+        )
+        parser.add_argument(
+            "-w",
+            "--window",
+            type=int,
+            default=None,
+            help="coincidence window in units of the timestamps "
+            "(default: no matrix)",
+        )
+        parser.add_argument(
+            "-m",
+            "--matrix-bins",
+            type=int,
+            default=4096,
+            help="number of bins of the matrix, which covers the same range "
+            "as the spectra (default: %(default)s)",
+        )
+        parser.add_argument(
+            "-j",
+            "--processes",
+            type=int,
+            default=None,
+            help="number of processes (default: number of CPUs)",
+        )
+        parser.add_argument(
+            "--chunk",
+            type=int,
+            default=1 << 20,
+            help="number of events sorted at once (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--dither",
+            action="store_true",
+            default=False,
+            help="spread raw energies over their channel before calibration",
+        )
+        parser.add_argument(
+            "-o",
+            "--output",
+            default=None,
+            help="write the spectra to <output>_d<detector>.spc and the "
+            "matrix to <output>.mtx instead of loading them",
+        )
+        parser.add_argument(
+            "--format",
+            default="lc",
+            help="mfile format of the spectra (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--matrix-format",
+            default="lc",
+            help="mfile format of the matrix (default: %(default)s)",
+        )
+        parser.add_argument(
+            "-F",
+            "--force",
+            action="store_true",
+            default=False,
+            help="overwrite existing files without asking",
+        )
+        parser.add_argument("filename", metavar="listmode-file")
+        hdtv.cmdline.AddCommand(prog, self.SortListmode, fileargs=True, parser=parser)
+
+    def ReadCalList(self, fname):
+        """
+        Read the calibrations of the detectors from a calibration list
+        <detector>: <cal0> <cal1> ...
+        """
+        cals = dict()
+        f = hdtv.util.TxtFile(fname)
+        f.read()
+        for (l, n) in zip(f.lines, f.linos):
+            try:
+                (k, v) = l.split(":", 1)
+                cals[int(k)] = [float(s) for s in v.split()]
+            except ValueError:
+                hdtv.ui.warning(
+                    "Could not parse line %d of file %s: ignored." % (n, fname)
+                )
+        return cals
+
+    def SortListmode(self, args):
+        fname = os.path.expanduser(args.filename)
+        cals = dict()
+        if args.callist:
+            cals = self.ReadCalList(os.path.expanduser(args.callist))
+        try:
+            layout = hdtv.sorter.ParseLayout(
+                args.layout, ">" if args.big_endian else "<"
+            )
+            sorter = hdtv.sorter.Sorter(
+                layout,
+                cals=cals,
+                nbins=args.nbins,
+                binsize=args.binsize,
+                window=args.window,
+                mbins=args.matrix_bins,
+                header=args.header,
+                chunk=args.chunk,
+                dither=args.dither,
+            )
+            start = time.perf_counter()
+            result = sorter.Sort(fname, args.processes)
+        except (OSError, hdtv.sorter.SortError) as msg:
+            raise hdtv.cmdline.HDTVCommandError(str(msg))
+        hdtv.ui.msg(
+            "Sorted %d events (%d coincidences) of %d detectors in %.2f s"
+            % (
+                result.events,
+                result.coincidences,
+                len(result.detectors),
+                time.perf_counter() - start,
+            )
+        )
+
+        name = os.path.splitext(os.path.basename(fname))[0]
+        if args.output:
+            self.Write(sorter, result, os.path.expanduser(args.output), args)
+        else:
+            self.Load(sorter, result, name)
+
+    def _TH1(self, name, contents):
+        hist = ROOT.TH1D(name, name, len(contents), -0.5, len(contents) - 0.5)
+        hist.SetContent(np.pad(contents.astype(np.float64), 1))
+        return hist
+
+    def _TH2(self, name, contents):
+        n = len(contents)
+        hist = ROOT.TH2D(name, name, n, -0.5, n - 0.5, n, -0.5, n - 0.5)
+        # ROOT stores the bins line by line (along x), with under- and
+        # overflow bins; the matrix is symmetric
+        hist.SetContent(np.ascontiguousarray(np.pad(contents.astype(np.float64), 1)))
+        return hist
+
+    def Write(self, sorter, result, output, args):
+        files = [(d, "%s_d%d.spc" % (output, d)) for d in result.detectors]
+        if result.matrix is not None:
+            files.append((None, output + ".mtx"))
+        for (d, fname) in files:
+            if not hdtv.util.user_save_file(fname, args.force):
+                return
+            try:
+                if d is None:
+                    hist = self._TH2(os.path.basename(fname), result.matrix)
+                    SpecReader.WriteMatrix(hist, fname, args.matrix_format)
+                else:
+                    hist = self._TH1(os.path.basename(fname), result.spectra[d])
+                    SpecReader.WriteSpectrum(hist, fname, args.format)
+            except SpecReaderError as msg:
+                raise hdtv.cmdline.HDTVCommandError(
+                    "Failed to write %s: %s" % (fname, msg)
+                )
+            hdtv.ui.msg("Wrote %s" % fname)
+        # The spectra are binned in energy, with bins of binsize
+        hdtv.ui.msg(
+            "Calibration of the spectra: 0 %s, of the matrix: 0 %s"
+            % (sorter.binsize, sorter.mbinsize)
+        )
+
+    def Load(self, sorter, result, name):
+        if self.spectra.viewport:
+            self.spectra.viewport.LockUpdate()
+        try:
+            for d in result.detectors:
+                hist = self._TH1("%s_d%d" % (name, d), result.spectra[d])
+                spec = Spectrum(
+                    Histogram(hist, cal=hdtv.cal.MakeCalibration([0, sorter.binsize]))
+                )
+                sid = self.spectra.Insert(spec)
+                spec.color = hdtv.color.ColorForID(sid.major)
+                hdtv.ui.msg("Loaded spectrum %s (id %s)" % (spec.name, sid))
+
+            if result.matrix is not None:
+                hist = SymHisto2D(self._TH2(name, result.matrix))
+                matrix = Matrix(hist, True, self.spectra.viewport)
+                ID = self.spectra.GetFreeID()
+                matrix.ID = ID
+                matrix.color = hdtv.color.ColorForID(ID.major)
+                proj = matrix.xproj
+                proj.cal = hdtv.cal.MakeCalibration([0, sorter.mbinsize])
+                sid = self.spectra.Insert(proj, ID=hdtv.util.ID(ID.major, 0))
+                self.spectra.ActivateObject(sid)
+                hdtv.ui.msg("Loaded matrix %s (projection id %s)" % (name, sid))
+        finally:
+            if self.spectra.viewport:
+                self.spectra.viewport.UnlockUpdate()
+
+
+# plugin initialisation
+import __main__
+
+sort_interface = SortInterface(__main__.spectra)
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+# HDTV - A ROOT-based spectrum analysis software
+#  Copyright (C) 2006-2019  The HDTV development team (see file AUTHORS)
+#
+# This file is part of HDTV.
+#
+# HDTV is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 2 of the License, or (at your
+# option) any later version.
+#
+# HDTV is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HDTV; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+
+"""
+Profiling helpers (startup time, command timing)
+"""
+
+import sys
+import time
+import contextlib
+import importlib.abc
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Do not import hdtv modules (or ROOT) here: the ImportTimer should be
+# installed before they are imported.
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """
+    Wraps a loader to measure the time spent executing a module
+    """
+
+    def __init__(self, loader, timer):
+        self.loader = loader
+        self.timer = timer
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Modules should only ever see their real loader
+        module.__loader__ = self.loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self.loader
+        self.timer._Start(module.__name__)
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timer._Stop(module.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """
+    Measures the import time of each module while installed in
+    sys.meta_path. For each module, the cumulative time (including the
+    imports it triggers) and the self time are recorded.
+    """
+
+    def __init__(self):
+        self.times = dict()
+        self._stack = []
+        self.start = None
+        self.stop = None
+
+    def Install(self):
+        self.start = time.perf_counter()
+        sys.meta_path.insert(0, self)
+
+    def Uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+        self.stop = time.perf_counter()
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def _Start(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _Stop(self, name):
+        (name, start, children) = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.times[name] = (elapsed, elapsed - children)
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def Total(self):
+        """
+        Total time since Install() (until Uninstall(), if called)
+        """
+        return (self.stop or time.perf_counter()) - self.start
+
+    def Report(self, limit=30, threshold=0.005):
+        """
+        Returns (module, cumulative time, self time) of the modules with the
+        largest self time (at most limit, and at least threshold seconds)
+        """
+        slowest = sorted(self.times.items(), key=lambda x: -x[1][1])
+        return [
+            (name, cumulative, selftime)
+            for (name, (cumulative, selftime)) in slowest[:limit]
+            if selftime >= threshold
+        ]
+
+
+def _MaxRSS():
+    """
+    Peak resident set size of the process in bytes (0 if unknown)
+    """
+    if resource is None:
+        return 0
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return maxrss if sys.platform == "darwin" else 1024 * maxrss
+
+
+class CommandTimer(object):
+    """
+    Measures wall time, CPU time and the increase of the peak memory usage
+    of commands. Depending on mode, each measurement is printed ("inline")
+    or accumulated per command for Summary() ("summary").
+    """
+
+    modes = ["off", "inline", "summary"]
+
+    def __init__(self):
+        self.mode = "off"
+        # command: [calls, wall time, cpu time, peak memory increase]
+        self.records = dict()
+
+    @contextlib.contextmanager
+    def Measure(self, command):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        rss = _MaxRSS()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            rss = _MaxRSS() - rss
+            self.Record(command, wall, cpu, rss)
+
+    def Record(self, command, wall, cpu, rss):
+        if self.mode == "inline":
+            import hdtv.ui
+
+            hdtv.ui.msg(
+                "%s: %.3f s wall, %.3f s cpu, +%s peak memory"
+                % (command, wall, cpu, _FormatBytes(rss))
+            )
+        record = self.records.setdefault(command, [0, 0.0, 0.0, 0])
+        record[0] += 1
+        record[1] += wall
+        record[2] += cpu
+        record[3] += rss
+
+    def Clear(self):
+        self.records.clear()
+
+    def Summary(self):
+        """
+        Table of all measured commands, slowest first
+        """
+        import hdtv.util
+
+        records = sorted(self.records.items(), key=lambda x: -x[1][1])
+        data = [
+            {
+                "command": command,
+                "calls": calls,
+                "wall": "%.3f" % wall,
+                "cpu": "%.3f" % cpu,
+                "memory": _FormatBytes(rss),
+            }
+            for (command, (calls, wall, cpu, rss)) in records
+        ]
+        return hdtv.util.Table(
+            data,
+            keys=["command", "calls", "wall", "cpu", "memory"],
+            header=["command", "calls", "wall [s]", "cpu [s]", "peak memory"],
+            sortBy=None,
+        )
+
+
+def _FormatBytes(n):
+    for unit in ["B", "kB", "MB"]:
+        if n < 1024:
+            return "%d %s" % (n, unit)
+        n /= 1024
+    return "%.1f GB" % n
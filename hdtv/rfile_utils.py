@@ -26,6 +26,7 @@ directories
 
 import os.path
 import fnmatch
+from collections import OrderedDict
 import ROOT
 
 # Required for Get() to work (otherwise, histogram objects are automatically
@@ -33,6 +34,162 @@ import ROOT
 ROOT.TH1.AddDirectory(False)
 
 
+class _PoolEntry(object):
+    def __init__(self, rfile, stamp):
+        self.rfile = rfile
+        self.stamp = stamp
+        self.pins = 0
+        # Key index: path of directory -> list of (name, class name)
+        self.keys = dict()
+
+
+class FilePool(object):
+    """
+    Process-wide pool of open ROOT files, so that completion and pattern
+    matching do not re-open files (and re-read their key lists) over and
+    over again. Files are closed when they are evicted (least recently
+    used first) or when they changed on disk, unless they are pinned.
+
+    Files obtained from the pool must not be closed by the caller.
+    """
+
+    def __init__(self, maxfiles=16):
+        self.maxfiles = maxfiles
+        self._entries = OrderedDict()
+        # Pinned files that were replaced because they changed on disk
+        self._orphans = []
+
+    @staticmethod
+    def _Stamp(fname):
+        st = os.stat(fname)
+        return (st.st_mtime_ns, st.st_size)
+
+    def Open(self, fname):
+        """
+        Returns the open ROOT file fname, or None if it cannot be opened.
+        Note that opening a file changes the current ROOT directory.
+        """
+        key = os.path.realpath(fname)
+        try:
+            stamp = self._Stamp(key)
+        except OSError:
+            return None
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.stamp == stamp:
+                self._entries.move_to_end(key)
+                return entry.rfile
+            self._Discard(key)
+
+        # Disable warnings when opening files
+        ROOT.gErrorIgnoreLevel = ROOT.kError
+        rfile = ROOT.TFile(fname)
+        ROOT.gErrorIgnoreLevel = ROOT.kInfo
+        if rfile.IsZombie():
+            rfile.Close()
+            return None
+        self._entries[key] = _PoolEntry(rfile, stamp)
+        self._Evict()
+        return rfile
+
+    def _Find(self, rfile):
+        for entry in list(self._entries.values()) + self._orphans:
+            if entry.rfile is rfile:
+                return entry
+        return None
+
+    def _Discard(self, key):
+        entry = self._entries.pop(key)
+        if entry.pins:
+            entry.keys.clear()
+            self._orphans.append(entry)
+        else:
+            entry.rfile.Close()
+
+    def _Evict(self):
+        for key in list(self._entries.keys()):
+            if len(self._entries) <= self.maxfiles:
+                break
+            if not self._entries[key].pins:
+                self._Discard(key)
+
+    def Pin(self, rfile):
+        """
+        Keep rfile open (e.g. while it is the current directory)
+        """
+        entry = self._Find(rfile)
+        if entry is not None:
+            entry.pins += 1
+
+    def Release(self, rfile):
+        """
+        Undo Pin()
+        """
+        entry = self._Find(rfile)
+        if entry is None or not entry.pins:
+            return
+        entry.pins -= 1
+        if not entry.pins and entry in self._orphans:
+            self._orphans.remove(entry)
+            entry.rfile.Close()
+        self._Evict()
+
+    def Close(self, rfile):
+        """
+        Remove rfile from the pool and close it, even if it is pinned
+        """
+        entry = self._Find(rfile)
+        if entry is None:
+            rfile.Close()
+            return
+        for (key, other) in list(self._entries.items()):
+            if other is entry:
+                del self._entries[key]
+        if entry in self._orphans:
+            self._orphans.remove(entry)
+        entry.rfile.Close()
+
+    def Clear(self):
+        """
+        Close all unpinned files
+        """
+        for key in list(self._entries.keys()):
+            if not self._entries[key].pins:
+                self._Discard(key)
+
+    def Keys(self, root_dir):
+        """
+        Returns the keys of root_dir as a list of (name, class name), one
+        per name (the highest cycle). The list is cached for directories in
+        files of the pool.
+        """
+        entry = None
+        rfile = root_dir.GetFile()
+        if rfile:
+            entry = self._entries.get(os.path.realpath(rfile.GetName()))
+        if entry is not None:
+            try:
+                return entry.keys[root_dir.GetPath()]
+            except KeyError:
+                pass
+
+        keys = []
+        names = set()
+        list_of_keys = root_dir.GetListOfKeys()
+        if list_of_keys is not None:
+            for k in list_of_keys:
+                name = k.GetName()
+                if name not in names:
+                    names.add(name)
+                    keys.append((name, k.GetClassName()))
+        if entry is not None:
+            entry.keys[root_dir.GetPath()] = keys
+        return keys
+
+
+file_pool = FilePool()
+
+
 def GetRelDirectory(cur_posix_path, cur_root_dir, path):
     """
     Resolve the relative path path with respect to the current directory
@@ -46,11 +203,10 @@ def GetRelDirectory(cur_posix_path, cur_root_dir, path):
     Returns a triple (new_posix_path, new_root_file, new_root_dir).
     new_posix_path is the new posix path.
     new_root_file is the ROOT file in wich new_root_dir resides, or None if
-    new_root_dir resides in the same file as cur_root_dir. If new_root_file is
-    not None, the caller is expected to close the file after being done with it.
-    (Note: a path moving out of a ROOT file and then back in
-    is considered to refer to a different file, with the consequences mentioned
-    above.)
+    new_root_dir resides in the same file as cur_root_dir. new_root_file
+    belongs to file_pool and must not be closed by the caller (use
+    file_pool.Pin() to keep it open). (Note: a path moving out of a ROOT file
+    and then back in is considered to refer to a different file.)
     new_root_dir is the new ROOT TDirectory.
 
     If path is invalid, (None, None, None) is returned.
@@ -88,9 +244,7 @@ def GetRelDirectory(cur_posix_path, cur_root_dir, path):
                 elif pc == "..":
                     cur_root_dir = cur_root_dir.GetMotherDir()
                     if cur_root_dir is None:
-                        if rfile is not None:
-                            # print "Info: closing %s" % str(rfile)
-                            rfile.Close()
+                        rfile = None
                 else:
                     cur_root_dir = cur_root_dir.Get(pc)
                     if not isinstance(cur_root_dir, ROOT.TDirectoryFile):
@@ -101,12 +255,8 @@ def GetRelDirectory(cur_posix_path, cur_root_dir, path):
                 if os.path.isdir(full_name):
                     cur_posix_path = full_name
                 elif IsROOTFile(full_name):
-                    # print("Info: Opening %s" % full_name)
-                    # Disable warnings when opening files
-                    ROOT.gErrorIgnoreLevel = ROOT.kError
-                    rfile = ROOT.TFile(full_name)
-                    ROOT.gErrorIgnoreLevel = ROOT.kInfo
-                    if rfile.IsZombie():
+                    rfile = file_pool.Open(full_name)
+                    if rfile is None:
                         error = True
                         break
                     cur_root_dir = rfile
@@ -115,9 +265,6 @@ def GetRelDirectory(cur_posix_path, cur_root_dir, path):
                     break
 
         if error:
-            if rfile:
-                # print "Info: closing %s" % str(rfile)
-                rfile.Close()
             return (None, None, None)
 
         return (cur_posix_path, rfile, cur_root_dir)
@@ -153,15 +300,12 @@ def PathComplete(cur_posix_path, cur_root_dir, path, pattern, dirs_only=False):
 
     if root_dir is not None:
         # Suggest completions from a ROOT directory
-        keys = root_dir.GetListOfKeys()
-        if keys is not None:
-            for k in keys:
-                name = k.GetName()
-                if name[0:l] == pattern:
-                    if k.GetClassName() == "TDirectoryFile":
-                        options.append(name + "/")
-                    elif not dirs_only:
-                        options.append(name + " ")
+        for (name, classname) in file_pool.Keys(root_dir):
+            if name[0:l] == pattern:
+                if classname == "TDirectoryFile":
+                    options.append(name + "/")
+                elif not dirs_only:
+                    options.append(name + " ")
 
     else:
         for name in os.listdir(posix_path):
@@ -171,10 +315,6 @@ def PathComplete(cur_posix_path, cur_root_dir, path, pattern, dirs_only=False):
                 ):
                     options.append(name + "/")
 
-    if rfile:
-        # print "Info: closing %s" % str(rfile)
-        rfile.Close()
-
     return options
 
 
@@ -224,9 +364,9 @@ def RecursivePathMatch(cur_path, pcomp):
         if fnmatch.fnmatch(name, pcomp[0]):
             full_name = os.path.join(cur_path, name)
             if os.path.isfile(full_name) and IsROOTFile(full_name):
-                rfile = ROOT.TFile(full_name)
-                matched_objects += RecursiveROOTMatch(cur_path, rfile, pcomp[1:])
-                rfile.Close()
+                rfile = file_pool.Open(full_name)
+                if rfile is not None:
+                    matched_objects += RecursiveROOTMatch(cur_path, rfile, pcomp[1:])
             elif os.path.isdir(full_name):
                 matched_objects += RecursivePathMatch(full_name, pcomp[1:])
     return matched_objects
@@ -254,19 +394,14 @@ def RecursiveROOTMatch(rfile_path, rfile_dir, pcomp):
             else:
                 return RecursivePathMatch(rfile_path, pcomp[1:])
     else:
-        keys = rfile_dir.GetListOfKeys()
-        if keys is None:
-            return []
-
         matched_objects = []
-        for k in keys:
-            name = k.GetName()
+        for (name, classname) in file_pool.Keys(rfile_dir):
             if fnmatch.fnmatch(name, pcomp[0]):
                 if len(pcomp) == 1:
-                    matched_objects.append(k.ReadObj())
-                elif k.GetClassName() == "TDirectoryFile":
+                    matched_objects.append(rfile_dir.Get(name))
+                elif classname == "TDirectoryFile":
                     matched_objects += RecursiveROOTMatch(
-                        rfile_path, k.ReadObj(), pcomp[1:]
+                        rfile_path, rfile_dir.Get(name), pcomp[1:]
                     )
 
     return matched_objects
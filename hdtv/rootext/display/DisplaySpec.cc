@@ -22,6 +22,7 @@
 
 #include "DisplaySpec.hh"
 
+#include <algorithm>
 #include <utility>
 
 #include <TH1.h>
@@ -34,9 +35,11 @@ namespace Display {
 
 //! Constructor
 DisplaySpec::DisplaySpec(const TH1 *hist, int col)
-    : DisplayBlock(col), fCachedMaxBin{0}, fCachedMax{0.0}, fDrawUnderflowBin(false), fDrawOverflowBin(false) {
+    : DisplayBlock(col), fHist{nullptr}, fPyramidSize{0}, fCachedMax{0.0}, fDrawUnderflowBin(false),
+      fDrawOverflowBin(false) {
 
-  fHist.reset(dynamic_cast<TH1 *>(hist->Clone()));
+  fOwnedHist.reset(dynamic_cast<TH1 *>(hist->Clone()));
+  fHist = fOwnedHist.get();
 
   // cout << "GSDisplaySpec constructor" << endl;
 
@@ -46,13 +49,58 @@ DisplaySpec::DisplaySpec(const TH1 *hist, int col)
   fCachedB2 = 0;
 }
 
+DisplaySpec::DisplaySpec(TH1 *hist, int col, bool share)
+    : DisplayBlock(col), fHist{hist}, fPyramidSize{0}, fCachedB1{1}, fCachedB2{0}, fCachedMax{0.0},
+      fDrawUnderflowBin(false), fDrawOverflowBin(false) {
+  //! Constructor, displaying hist itself instead of a copy if share is true
+  //! (see SetSharedHist())
+
+  if (!share) {
+    fOwnedHist.reset(dynamic_cast<TH1 *>(hist->Clone()));
+    fHist = fOwnedHist.get();
+  }
+}
+
 void DisplaySpec::SetHist(const TH1 *hist) {
   //! Set the histogram owned by this object to a copy of hist
 
-  fHist.reset(dynamic_cast<TH1 *>(hist->Clone()));
+  fOwnedHist.reset(dynamic_cast<TH1 *>(hist->Clone()));
+  fHist = fOwnedHist.get();
+  HistChanged();
+}
+
+void DisplaySpec::SetSharedHist(TH1 *hist) {
+  //! Display hist without copying it. The caller keeps ownership and must
+  //! call HistChanged() after modifying hist.
+
+  fOwnedHist.reset();
+  fHist = hist;
+  HistChanged();
+}
+
+void DisplaySpec::HistChanged() {
+  //! Invalidate all cached information about the histogram and redraw
+
+  InvalidatePyramid();
+  fCachedB1 = 1;
+  fCachedB2 = 0;
   Update();
 }
 
+void DisplaySpec::BuildPyramid() {
+  //! Build the max pyramid of the current histogram
+
+  int n = GetNbinsX() + 2;
+  fMaxPyramid.resize(2 * n);
+  for (int bin = 0; bin < n; bin++) {
+    fMaxPyramid[n + bin] = fHist->GetBinContent(bin);
+  }
+  for (int i = n - 1; i > 0; i--) {
+    fMaxPyramid[i] = std::max(fMaxPyramid[2 * i], fMaxPyramid[2 * i + 1]);
+  }
+  fPyramidSize = n;
+}
+
 int DisplaySpec::GetRegionMaxBin(int b1, int b2) {
   //! Find the bin number of the bin between b1 and b2 (inclusive) which
   //! contains the most events
@@ -82,23 +130,37 @@ int DisplaySpec::GetRegionMaxBin(int b1, int b2) {
 double DisplaySpec::GetRegionMax(int b1, int b2) {
   //! Get the maximum counts in the region between bin b1 and bin b2 (inclusive)
   //! b1 and b2 are raw bin numbers
+  //! The region is clipped according to fDrawUnderflowBin and fDrawOverflowBin
+  //! Runs in O(log(b2 - b1)) using the max pyramid
 
-  int max_bin = GetRegionMaxBin(b1, b2);
+  b1 = ClipBin(b1);
+  b2 = ClipBin(b2);
 
-  // return max_bin == -1 ? 0.0 : fHist->GetBinContent(max_bin);
-  return fHist->GetBinContent(max_bin);
+  if (b2 <= b1) {
+    return fHist->GetBinContent(b1);
+  }
+
+  if (fPyramidSize != GetNbinsX() + 2) {
+    BuildPyramid();
+  }
+
+  double max_y = fMaxPyramid[fPyramidSize + b1];
+  for (int l = fPyramidSize + b1, r = fPyramidSize + b2 + 1; l < r; l /= 2, r /= 2) {
+    if (l & 1) {
+      max_y = std::max(max_y, fMaxPyramid[l++]);
+    }
+    if (r & 1) {
+      max_y = std::max(max_y, fMaxPyramid[--r]);
+    }
+  }
+
+  return max_y;
 }
 
 double DisplaySpec::GetMax_Cached(int b1, int b2) {
   //! Gets the maximum count between bin b1 and bin b2, inclusive.
-  //! Employes caching to save time during scrolling operations.
-  //!
-  //! NOTE: For the caching to be effective, use this function ONLY for
-  //! scrolling operations.
-
-  int bin = 0;
-  int newBin = 0;
-  double max, newMax = -1.0;
+  //! Employes caching to save time during repeated calls (e.g. from
+  //! the y autoscale of every redraw).
 
   b1 = std::max(b1, 0);
   b2 = std::min(b2, GetNbinsX() + 1);
@@ -107,50 +169,10 @@ double DisplaySpec::GetMax_Cached(int b1, int b2) {
     std::swap(b1, b2);
   }
 
-  if (fCachedB2 < b1 || fCachedB1 > b2 || fCachedB1 > fCachedB2) {
+  if (fCachedB1 != b1 || fCachedB2 != b2) {
     fCachedB1 = b1;
     fCachedB2 = b2;
-    fCachedMaxBin = GetRegionMaxBin(b1, b2);
-    fCachedMax = GetBinContent(fCachedMaxBin);
-  } else {
-    if (b1 < fCachedB1) {
-      newBin = GetRegionMaxBin(b1, fCachedB1);
-      newMax = GetBinContent(newBin);
-
-      fCachedB1 = b1;
-    }
-
-    if (b2 > fCachedB2) {
-      bin = GetRegionMaxBin(fCachedB2, b2);
-      max = GetBinContent(bin);
-
-      if (max > newMax) {
-        newMax = max;
-        newBin = bin;
-      }
-
-      fCachedB2 = b2;
-    }
-
-    if (newMax >= fCachedMax) {
-      fCachedMaxBin = newBin;
-      fCachedMax = newMax;
-    } else if (fCachedMaxBin < b1 || fCachedMaxBin > b2) {
-      bin = GetRegionMaxBin(b1 > fCachedB1 ? b1 : fCachedB1, b2 < fCachedB2 ? b2 : fCachedB2);
-
-      max = GetBinContent(bin);
-
-      if (max > newMax) {
-        fCachedMax = max;
-        fCachedMaxBin = bin;
-      } else {
-        fCachedMax = newMax;
-        fCachedMaxBin = newBin;
-      }
-
-      fCachedB1 = b1;
-      fCachedB2 = b2;
-    }
+    fCachedMax = GetRegionMax(b1, b2);
   }
 
   return fCachedMax;
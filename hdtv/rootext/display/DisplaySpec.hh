@@ -25,6 +25,7 @@
 
 #include <memory>
 #include <sstream>
+#include <vector>
 
 #include <TH1.h>
 
@@ -37,10 +38,14 @@ namespace Display {
 class DisplaySpec : public DisplayBlock {
 public:
   explicit DisplaySpec(const TH1 *hist, int col = DEFAULT_COLOR);
+  DisplaySpec(TH1 *hist, int col, bool share);
 
   void SetHist(const TH1 *hist);
+  void SetSharedHist(TH1 *hist);
+  void HistChanged();
 
-  TH1 *GetHist() { return fHist.get(); }
+  TH1 *GetHist() { return fHist; }
+  bool IsHistShared() const { return !fOwnedHist; }
 
   int GetRegionMaxBin(int b1, int b2);
   double GetRegionMax(int b1, int b2);
@@ -104,9 +109,22 @@ public:
   int GetZIndex() const override { return Z_INDEX_SPEC; }
 
 private:
-  std::unique_ptr<TH1> fHist;
-
-  int fCachedB1, fCachedB2, fCachedMaxBin;
+  void BuildPyramid();
+  void InvalidatePyramid() { fPyramidSize = 0; }
+
+  // The displayed histogram. It is either a private copy (owned by
+  // fOwnedHist) or shared with the caller, who must keep it alive and call
+  // HistChanged() after modifying it.
+  TH1 *fHist;
+  std::unique_ptr<TH1> fOwnedHist;
+
+  // Max pyramid over all bins (including under- and overflow), stored
+  // as implicit binary tree: leaves at [n, 2n), node i = max(2i, 2i+1).
+  // Built lazily on the first region query after the histogram changed.
+  std::vector<double> fMaxPyramid;
+  int fPyramidSize;
+
+  int fCachedB1, fCachedB2;
   double fCachedMax;
   bool fDrawUnderflowBin, fDrawOverflowBin;
   std::string fID; // ID for use by higher-level structures
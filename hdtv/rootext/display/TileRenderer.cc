@@ -0,0 +1,273 @@
+/*
+ * HDTV - A ROOT-based spectrum analysis software
+ *  Copyright (C) 2006-2009  The HDTV development team (see file AUTHORS)
+ *
+ * This file is part of HDTV.
+ *
+ * HDTV is free software; you can redistribute it and/or modify it
+ * under the terms of the GNU General Public License as published by the
+ * Free Software Foundation; either version 2 of the License, or (at your
+ * option) any later version.
+ *
+ * HDTV is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+ * FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+ * for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with HDTV; if not, write to the Free Software Foundation,
+ * Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+ *
+ */
+
+#include "TileRenderer.hh"
+
+#include <algorithm>
+#include <cmath>
+
+#include <TH2.h>
+
+namespace HDTV {
+namespace Display {
+
+namespace {
+
+// Same as View2D::Log()
+double ModLog(double x) {
+  if (x < 0.0) {
+    return 0.0;
+  } else if (x < 1.0) {
+    return x;
+  } else {
+    return log(x) + 1.0;
+  }
+}
+
+} // end anonymous namespace
+
+TileRenderer::TileRenderer(const TH2 *mat, int tileSize, unsigned int nThreads)
+    : fMatrix{mat}, fTileSize{tileSize}, fNbinsX{mat->GetNbinsX()}, fNbinsY{mat->GetNbinsY()}, fLevelsReady{0},
+      fParams{}, fGeneration{0}, fStop{false}, fStopBuild{false} {
+
+  int nLevels = 0;
+  for (int n = std::max(fNbinsX, fNbinsY); n > 1; n = (n + 1) / 2) {
+    nLevels++;
+  }
+  fLevels.resize(nLevels);
+
+  if (nThreads == 0) {
+    nThreads = std::min(std::max(std::thread::hardware_concurrency(), 1U), 8U);
+  }
+  for (unsigned int i = 0; i < nThreads; i++) {
+    fWorkers.emplace_back(&TileRenderer::Work, this);
+  }
+  fBuilder = std::thread(&TileRenderer::BuildPyramid, this);
+}
+
+TileRenderer::~TileRenderer() {
+  fStopBuild = true;
+  {
+    std::lock_guard<std::mutex> lock(fMutex);
+    fStop = true;
+  }
+  fWakeup.notify_all();
+  for (auto &worker : fWorkers) {
+    worker.join();
+  }
+  fBuilder.join();
+}
+
+void TileRenderer::BuildPyramid() {
+  //! Build the max level-of-detail pyramid, one level after the other
+
+  int w = fNbinsX;
+  int h = fNbinsY;
+  for (size_t level = 0; level < fLevels.size(); level++) {
+    int pw = w;
+    int ph = h;
+    w = (w + 1) / 2;
+    h = (h + 1) / 2;
+    std::vector<float> data(static_cast<size_t>(w) * h);
+
+    for (int j = 0; j < h; j++) {
+      if (fStopBuild) {
+        return;
+      }
+      for (int i = 0; i < w; i++) {
+        float max = -INFINITY;
+        for (int dj = 0; dj < 2 && 2 * j + dj < ph; dj++) {
+          for (int di = 0; di < 2 && 2 * i + di < pw; di++) {
+            float v;
+            if (level == 0) {
+              v = fMatrix->GetBinContent(2 * i + di + 1, 2 * j + dj + 1);
+            } else {
+              v = fLevels[level - 1][static_cast<size_t>(2 * j + dj) * pw + 2 * i + di];
+            }
+            max = std::max(max, v);
+          }
+        }
+        data[static_cast<size_t>(j) * w + i] = max;
+      }
+    }
+
+    fLevels[level] = std::move(data);
+    fLevelsReady.store(level + 1, std::memory_order_release);
+  }
+}
+
+int TileRenderer::GetLevel(const TileParams &params) const {
+  //! Coarsest pyramid level whose cells are not larger than a pixel
+
+  double bx = 1.0 / (params.xZoom * fMatrix->GetXaxis()->GetBinWidth(1));
+  double by = 1.0 / (params.yZoom * fMatrix->GetYaxis()->GetBinWidth(1));
+  double binsPerPixel = std::min(bx, by);
+  if (!(binsPerPixel >= 2.0)) {
+    return 0;
+  }
+  int level = static_cast<int>(std::floor(std::log2(binsPerPixel)));
+  return std::min(level, GetLevelsReady());
+}
+
+double TileRenderer::GetValue(int bx, int by, int level) const {
+  if (level == 0 || bx < 1 || bx > fNbinsX || by < 1 || by > fNbinsY) {
+    return fMatrix->GetBinContent(bx, by);
+  }
+  int w = ((fNbinsX - 1) >> level) + 1;
+  return fLevels[level - 1][static_cast<size_t>((by - 1) >> level) * w + ((bx - 1) >> level)];
+}
+
+void TileRenderer::RenderTile(Tile &tile, const TileParams &params) const {
+  //! Compute the z values of all pixels of tile (thread-safe)
+
+  const TAxis *xaxis = fMatrix->GetXaxis();
+  const TAxis *yaxis = fMatrix->GetYaxis();
+  const int level = GetLevel(params);
+
+  // Bin numbers of all columns of the tile
+  std::vector<int> xbins(fTileSize);
+  for (int x = 0; x < fTileSize; x++) {
+    xbins[x] = xaxis->FindFixBin((x + tile.x * fTileSize) / params.xZoom - params.xEOffset);
+  }
+
+  tile.z.resize(static_cast<size_t>(fTileSize) * fTileSize);
+  for (int y = 0; y < fTileSize; y++) {
+    int by = yaxis->FindFixBin(-(y + tile.y * fTileSize) / params.yZoom + params.yEOffset);
+    for (int x = 0; x < fTileSize; x++) {
+      double z = GetValue(xbins[x], by, level);
+      if (params.logScale) {
+        z = ModLog(z);
+      }
+      tile.z[static_cast<size_t>(y) * fTileSize + x] =
+          static_cast<int>((z / params.zVisibleRegion) * params.zColorRange);
+    }
+  }
+}
+
+void TileRenderer::Work() {
+  for (;;) {
+    Job job;
+    TileParams params;
+    {
+      std::unique_lock<std::mutex> lock(fMutex);
+      fWakeup.wait(lock, [this] { return fStop || !fQueue.empty(); });
+      if (fStop) {
+        return;
+      }
+      job = std::move(fQueue.front());
+      fQueue.pop_front();
+      if (!job.batch && job.generation != fGeneration) {
+        continue;
+      }
+      params = fParams;
+    }
+
+    Tile tile{job.x, job.y, job.generation, {}};
+    RenderTile(tile, params);
+
+    if (job.batch) {
+      std::lock_guard<std::mutex> lock(job.batch->mutex);
+      job.batch->tiles.push_back(std::move(tile));
+      if (--job.batch->remaining == 0) {
+        job.batch->done.notify_one();
+      }
+    } else {
+      std::lock_guard<std::mutex> lock(fMutex);
+      if (tile.generation == fGeneration) {
+        fReady.push_back(std::move(tile));
+        if (fReady.size() > cMaxReady) {
+          fReady.pop_front();
+        }
+      }
+    }
+  }
+}
+
+void TileRenderer::SetParams(const TileParams &params) {
+  std::lock_guard<std::mutex> lock(fMutex);
+  if (params != fParams) {
+    fParams = params;
+    fGeneration++;
+    fQueue.clear();
+    fReady.clear();
+    fRequested.clear();
+  }
+}
+
+void TileRenderer::Invalidate() {
+  std::lock_guard<std::mutex> lock(fMutex);
+  fGeneration++;
+  fQueue.clear();
+  fReady.clear();
+  fRequested.clear();
+}
+
+std::vector<Tile> TileRenderer::Render(const std::vector<std::pair<int, int>> &tiles) {
+  auto batch = std::make_shared<Batch>();
+  batch->remaining = tiles.size();
+  if (tiles.empty()) {
+    return {};
+  }
+
+  {
+    std::lock_guard<std::mutex> lock(fMutex);
+    std::set<uint32_t> ids;
+    for (const auto &xy : tiles) {
+      ids.insert(TileId(xy.first, xy.second));
+      fRequested.insert(TileId(xy.first, xy.second));
+    }
+    // Do not render tiles twice
+    fQueue.erase(std::remove_if(fQueue.begin(), fQueue.end(),
+                                [&ids](const Job &job) { return ids.count(TileId(job.x, job.y)) > 0; }),
+                 fQueue.end());
+    // Visible tiles go first
+    for (const auto &xy : tiles) {
+      fQueue.push_front(Job{xy.first, xy.second, fGeneration, batch});
+    }
+  }
+  fWakeup.notify_all();
+
+  std::unique_lock<std::mutex> lock(batch->mutex);
+  batch->done.wait(lock, [&batch] { return batch->remaining == 0; });
+  return std::move(batch->tiles);
+}
+
+void TileRenderer::Prefetch(int x, int y) {
+  {
+    std::lock_guard<std::mutex> lock(fMutex);
+    if (!fRequested.insert(TileId(x, y)).second) {
+      return;
+    }
+    fQueue.push_back(Job{x, y, fGeneration, nullptr});
+  }
+  fWakeup.notify_one();
+}
+
+std::vector<Tile> TileRenderer::TakePrefetched() {
+  std::lock_guard<std::mutex> lock(fMutex);
+  std::vector<Tile> tiles(std::make_move_iterator(fReady.begin()), std::make_move_iterator(fReady.end()));
+  fReady.clear();
+  return tiles;
+}
+
+} // end namespace Display
+} // end namespace HDTV
@@ -0,0 +1,144 @@
+/*
+ * HDTV - A ROOT-based spectrum analysis software
+ *  Copyright (C) 2006-2009  The HDTV development team (see file AUTHORS)
+ *
+ * This file is part of HDTV.
+ *
+ * HDTV is free software; you can redistribute it and/or modify it
+ * under the terms of the GNU General Public License as published by the
+ * Free Software Foundation; either version 2 of the License, or (at your
+ * option) any later version.
+ *
+ * HDTV is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+ * FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+ * for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with HDTV; if not, write to the Free Software Foundation,
+ * Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+ *
+ */
+
+#ifndef __TileRenderer_h__
+#define __TileRenderer_h__
+
+#include <atomic>
+#include <condition_variable>
+#include <cstdint>
+#include <deque>
+#include <memory>
+#include <mutex>
+#include <set>
+#include <thread>
+#include <utility>
+#include <vector>
+
+class TH2;
+
+namespace HDTV {
+namespace Display {
+
+//! Mapping from tile pixels to matrix coordinates and z color scale. A copy
+//! is used by the worker threads, so they never access the view itself.
+struct TileParams {
+  double xZoom, yZoom;
+  double xEOffset, yEOffset;
+  bool logScale;
+  double zVisibleRegion;
+  int zColorRange;
+
+  bool operator==(const TileParams &o) const {
+    return xZoom == o.xZoom && yZoom == o.yZoom && xEOffset == o.xEOffset && yEOffset == o.yEOffset &&
+           logScale == o.logScale && zVisibleRegion == o.zVisibleRegion && zColorRange == o.zColorRange;
+  }
+  bool operator!=(const TileParams &o) const { return !(*this == o); }
+};
+
+//! A rendered tile: one z color scale value per pixel (row-major)
+struct Tile {
+  int x, y;
+  unsigned int generation;
+  std::vector<int> z;
+};
+
+//! TileRenderer: renders tiles of a matrix in a pool of worker threads
+//!
+//! When zoomed out, pixels are sampled from a max level-of-detail pyramid
+//! of the matrix (level n holds the maximum of 2^n x 2^n bins), so that
+//! peaks stay visible and rendering cost does not depend on the number of
+//! bins per pixel. The pyramid is built once in a background thread; until
+//! a level is ready, the matrix is point-sampled.
+//!
+//! All public functions must be called from a single (the GUI) thread.
+class TileRenderer {
+public:
+  TileRenderer(const TH2 *mat, int tileSize, unsigned int nThreads = 0);
+  ~TileRenderer();
+
+  //! Set the pixel mapping; discards pending and finished prefetches if it changed
+  void SetParams(const TileParams &params);
+  //! Discard all pending and finished prefetches
+  void Invalidate();
+
+  //! Render tiles in parallel and wait for them
+  std::vector<Tile> Render(const std::vector<std::pair<int, int>> &tiles);
+  //! Queue a tile for rendering in the background (once per generation)
+  void Prefetch(int x, int y);
+  //! Return all prefetched tiles finished since the last call
+  std::vector<Tile> TakePrefetched();
+
+  void RenderTile(Tile &tile, const TileParams &params) const;
+  int GetLevelsReady() const { return fLevelsReady.load(std::memory_order_acquire); }
+
+private:
+  struct Batch {
+    std::mutex mutex;
+    std::condition_variable done;
+    size_t remaining;
+    std::vector<Tile> tiles;
+  };
+
+  struct Job {
+    int x, y;
+    unsigned int generation;
+    std::shared_ptr<Batch> batch;
+  };
+
+  static uint32_t TileId(int x, int y) { return (y << 16) | (x & 0xFFFF); }
+
+  void Work();
+  void BuildPyramid();
+  int GetLevel(const TileParams &params) const;
+  double GetValue(int bx, int by, int level) const;
+
+  const TH2 *fMatrix;
+  const int fTileSize;
+  int fNbinsX, fNbinsY;
+
+  // Pyramid levels 1..n are stored in fLevels[0..n-1]; fLevelsReady levels
+  // are complete and may be read by the workers
+  std::vector<std::vector<float>> fLevels;
+  std::atomic<int> fLevelsReady;
+
+  std::mutex fMutex;
+  std::condition_variable fWakeup;
+  std::deque<Job> fQueue;
+  std::deque<Tile> fReady;
+  std::set<uint32_t> fRequested;
+  TileParams fParams;
+  unsigned int fGeneration;
+  bool fStop;
+  std::atomic<bool> fStopBuild;
+
+  std::vector<std::thread> fWorkers;
+  std::thread fBuilder;
+
+  // Upper bound for finished, not yet collected prefetched tiles
+  static const size_t cMaxReady = 256;
+};
+
+} // end namespace Display
+} // end namespace HDTV
+
+#endif
@@ -30,6 +30,8 @@
 #include <TGStatusBar.h>
 #include <TH2.h>
 
+#include "TileRenderer.hh"
+
 namespace HDTV {
 namespace Display {
 
@@ -37,6 +39,7 @@ View2D::View2D(const TGWindow *p, UInt_t w, UInt_t h, TH2 *mat)
     : View(p, w, h), fXEOffset{0.0}, fYEOffset{0.0}, fXTileOffset{0}, fYTileOffset{0}, fVPHeight{0}, fVPWidth{0} {
   fMatrix = mat;
   fMatrixMax = fMatrix->GetMaximum();
+  fRenderer.reset(new TileRenderer(fMatrix, cTileSize));
 
   fStatusBar = nullptr;
 
@@ -304,7 +307,20 @@ int View2D::GetValueAtPixel(int x, int y) {
   return ZCtsToScr(z);
 }
 
+TileParams View2D::GetTileParams() {
+  return TileParams{fPainter.GetXZoom(), fPainter.GetYZoom(), fXEOffset, fYEOffset, fLogScale != 0, fZVisibleRegion,
+                    cZColorRange};
+}
+
 Pixmap_t View2D::RenderTile(int xoff, int yoff) {
+  Tile tile{xoff, yoff, 0, {}};
+  fRenderer->RenderTile(tile, GetTileParams());
+  return CreateTilePixmap(tile);
+}
+
+Pixmap_t View2D::CreateTilePixmap(const Tile &tile) {
+  //! Convert the z values of tile to a pixmap (must run in the GUI thread)
+
   int x, y, z;
   int r, g, b;
   Pixmap_t pixmap;
@@ -350,7 +366,7 @@ Pixmap_t View2D::RenderTile(int xoff, int yoff) {
 
   for (y = 0; y < cTileSize; y++) {
     for (x = 0; x < cTileSize; x++) {
-      z = GetValueAtPixel(x + xoff * cTileSize, -(y + yoff * cTileSize));
+      z = tile.z[y * cTileSize + x];
       ZtoRGB(z, r, g, b);
 
       r = (r_shift > 0) ? (r << r_shift) : (r >> (-r_shift));
@@ -369,7 +385,7 @@ Pixmap_t View2D::RenderTile(int xoff, int yoff) {
   }
   gVirtualX->DeleteImage(img);
 
-  RenderCuts(xoff, yoff, pixmap);
+  RenderCuts(tile.x, tile.y, pixmap);
 
   return pixmap;
 }
@@ -454,6 +470,9 @@ void View2D::FlushTiles() {
     gVirtualX->DeletePixmap(tile.second);
   }
   fTiles.clear();
+  if (fRenderer) {
+    fRenderer->Invalidate();
+  }
 }
 
 Pixmap_t View2D::GetTile(int x, int y) {
@@ -470,6 +489,49 @@ Pixmap_t View2D::GetTile(int x, int y) {
   }
 }
 
+//! Render all missing tiles in the given range in parallel, and add tiles
+//! prefetched in the background to the cache
+void View2D::RenderTiles(int x1, int y1, int x2, int y2) {
+  fRenderer->SetParams(GetTileParams());
+
+  for (const auto &tile : fRenderer->TakePrefetched()) {
+    uint32_t id = (tile.y << 16) | (tile.x & 0xFFFF);
+    if (fTiles.find(id) == fTiles.end()) {
+      fTiles.insert(std::make_pair(id, CreateTilePixmap(tile)));
+    }
+  }
+
+  std::vector<std::pair<int, int>> missing;
+  for (int x = x1; x <= x2; x++) {
+    for (int y = y1; y <= y2; y++) {
+      uint32_t id = (y << 16) | (x & 0xFFFF);
+      if (fTiles.find(id) == fTiles.end()) {
+        missing.emplace_back(x, y);
+      }
+    }
+  }
+
+  for (const auto &tile : fRenderer->Render(missing)) {
+    uint32_t id = (tile.y << 16) | (tile.x & 0xFFFF);
+    fTiles.insert(std::make_pair(id, CreateTilePixmap(tile)));
+  }
+}
+
+//! Queue the tiles around the given range for background rendering
+void View2D::PrefetchTiles(int x1, int y1, int x2, int y2) {
+  for (int x = x1 - 1; x <= x2 + 1; x++) {
+    for (int y = y1 - 1; y <= y2 + 1; y++) {
+      if (x >= x1 && x <= x2 && y >= y1 && y <= y2) {
+        continue;
+      }
+      uint32_t id = (y << 16) | (x & 0xFFFF);
+      if (fTiles.find(id) == fTiles.end()) {
+        fRenderer->Prefetch(x, y);
+      }
+    }
+  }
+}
+
 //! Callback for changes in size of our screen area
 void View2D::Layout() {
   // Convert offset to energy units
@@ -507,6 +569,8 @@ void View2D::DoRedraw() {
 
   // gVirtualX->FillRectangle(GetId(), GetWhiteGC()(), 0, 0, fWidth, fHeight);
 
+  RenderTiles(x1, y1, x2, y2);
+
   for (x = x1; x <= x2; x++) {
     for (y = y1; y <= y2; y++) {
       tile = GetTile(x, y);
@@ -570,6 +634,8 @@ void View2D::DoRedraw() {
     // cout << "Weeding..." << endl;
     WeedTiles();
   }
+
+  PrefetchTiles(x1, y1, x2, y2);
 }
 
 void View2D::SetDarkMode(bool dark) {
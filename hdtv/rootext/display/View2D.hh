@@ -34,6 +34,7 @@ typedef unsigned int uint32_t;
 
 #include <list>
 #include <map>
+#include <memory>
 
 #include "DisplayCut.hh"
 #include "Painter.hh"
@@ -45,6 +46,10 @@ class TH2;
 namespace HDTV {
 namespace Display {
 
+class TileRenderer;
+struct Tile;
+struct TileParams;
+
 //! View2D: Class implementing a scrollable matrix display
 class View2D : public View {
 public:
@@ -52,9 +57,12 @@ public:
   ~View2D() override;
 
   Pixmap_t RenderTile(int xoff, int yoff);
+  Pixmap_t CreateTilePixmap(const Tile &tile);
   void RenderCuts(int xoff, int yoff, Pixmap_t pixmap);
   void RenderCut(const DisplayCut &cut, int xoff, int yoff, Pixmap_t pixmap);
   Pixmap_t GetTile(int x, int y);
+  void RenderTiles(int x1, int y1, int x2, int y2);
+  void PrefetchTiles(int x1, int y1, int x2, int y2);
   void FlushTiles();
   void WeedTiles();
   void DoRedraw() override;
@@ -105,12 +113,14 @@ public:
 
   void ZtoRGB(int z, int &r, int &g, int &b);
   int GetValueAtPixel(int xs, int ys);
+  TileParams GetTileParams();
   bool GetDarkMode() { return fDarkMode; }
 
 protected:
   std::list<DisplayCut> fCuts;
 
   std::map<uint32_t, Pixmap_t> fTiles;
+  std::unique_ptr<TileRenderer> fRenderer; //!
   double fZVisibleRegion;
   Bool_t fLogScale;
 
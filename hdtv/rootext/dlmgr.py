@@ -25,9 +25,15 @@ HDTV dynamic (C++) library manager
 
 import os
 import sys
+import errno
+import fcntl
+import hashlib
 import shutil
 import subprocess
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import ROOT
 import hdtv.ui
 from hdtv.rootext import modules, libfmt
@@ -37,16 +43,53 @@ from hdtv._version import get_versions
 __version__ = get_versions()["version"]
 del get_versions
 
+srcdir = os.path.dirname(__file__)
+
+
+def BuildKey():
+    """
+    Hash of everything the libraries depend on: the C++ sources of all
+    modules (display also uses the calibration headers), the compiler and
+    the ROOT build configuration. Builds from identical sources are shared
+    between HDTV versions and Python interpreters.
+    """
+    h = hashlib.sha256()
+    for module in sorted(modules):
+        for (dirpath, dirnames, filenames) in os.walk(os.path.join(srcdir, module)):
+            dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+            for filename in sorted(filenames):
+                fname = os.path.join(dirpath, filename)
+                h.update(os.path.relpath(fname, srcdir).encode() + b"\0")
+                with open(fname, "rb") as f:
+                    h.update(f.read())
+    compiler = os.getenv("CXX", "c++")
+    config = [
+        os.path.realpath(shutil.which(compiler) or compiler),
+        os.getenv("CXXFLAGS", ""),
+        str(ROOT.gROOT.GetVersionInt()),
+        str(ROOT.gROOT.GetGitCommit()),
+        str(ROOT.gSystem.GetBuildArch()),
+        str(ROOT.gSystem.GetBuildCompilerVersion()),
+    ]
+    h.update("\0".join(config).encode())
+    return h.hexdigest()[:16]
+
+
 cachedir = os.path.join(
     os.getenv("XDG_CACHE_HOME", os.path.join(os.environ["HOME"], ".cache")), "hdtv"
 )
-usrdir = os.path.join(
-    cachedir, "%d-%d-%s" % (sys.hexversion, ROOT.gROOT.GetVersionInt(), __version__)
-)
+usrdir = os.path.join(cachedir, "lib-" + BuildKey())
 sysdir = os.path.join(
     os.path.dirname(__file__), "root-" + str(ROOT.gROOT.GetVersionInt())
 )
 
+# Time in seconds it took to load (and possibly build) each library
+load_times = dict()
+
+# Serializes builds of the threads of this process (lockf() only
+# excludes other processes)
+_build_lock = threading.Lock()
+
 
 def FindLibrary(name, libname):
     """
@@ -65,6 +108,7 @@ def LoadLibrary(name):
     """
     Load a dynamic library. Try to find and load it, or rebuild it on fail
     """
+    start = time.perf_counter()
     loaded = False
     libname = libfmt % name
     fname = FindLibrary(name, libname)
@@ -72,13 +116,23 @@ def LoadLibrary(name):
         loaded = _LoadLibrary(fname) >= 0
 
     if not loaded:
-        fname = BuildLibrary(name, usrdir)
+        if fname:
+            # Broken (or incompatible) library: replace it
+            BuildLibraries(usrdir, [name], force=True)
+        else:
+            # Build all missing libraries at once: the others will be
+            # needed soon, and building them concurrently is hardly slower
+            missing = [lib for lib in modules if not FindLibrary(lib, libfmt % lib)]
+            BuildLibraries(usrdir, [name] + [lib for lib in missing if lib != name])
+        fname = os.path.join(usrdir, "lib", libname)
         loaded = _LoadLibrary(fname) >= 0
 
     if not loaded:
         hdtv.ui.error("Failed to load library %s" % libname)
         sys.exit(1)
 
+    load_times[name] = time.perf_counter() - start
+
 
 def _LoadLibrary(fname):
     ROOT.gSystem.SetDynamicPath(
@@ -90,29 +144,122 @@ def _LoadLibrary(fname):
     return ROOT.gSystem.Load(fname)
 
 
+class BuildLock(object):
+    """
+    Exclusive lock on a library directory, shared by all processes (and
+    hosts, if the file system supports POSIX locks) using it
+    """
+
+    def __init__(self, dir):
+        self.fname = dir.rstrip(os.sep) + ".lock"
+        self.fd = None
+
+    def __enter__(self):
+        _build_lock.acquire()
+        try:
+            os.makedirs(os.path.dirname(self.fname), exist_ok=True)
+            self.fd = os.open(self.fname, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.lockf(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError as e:
+                if e.errno not in (errno.EACCES, errno.EAGAIN):
+                    raise
+                hdtv.ui.info(
+                    "Waiting for another process to build the libraries in %s"
+                    % os.path.dirname(self.fname)
+                )
+                fcntl.lockf(self.fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._Release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        self._Release()
+
+    def _Release(self):
+        if self.fd is not None:
+            # Closing the file releases the lock
+            os.close(self.fd)
+            self.fd = None
+        _build_lock.release()
+
+
 def RebuildLibraries(dir, libraries=None):
-    if os.path.exists(dir):
-        shutil.rmtree(dir)
-    for name in libraries or modules:
-        BuildLibrary(name, dir)
+    """
+    Rebuild libraries (default: all) in dir, replacing existing builds
+    """
+    BuildLibraries(dir, libraries or modules, force=True)
+
 
+def BuildLibraries(dir, libraries, force=False):
+    """
+    Build libraries concurrently and install them into dir. Unless force
+    is given, libraries that (meanwhile) exist in dir are skipped.
+    """
+    with BuildLock(dir):
+        if not force:
+            libraries = [
+                name
+                for name in libraries
+                if not os.path.isfile(os.path.join(dir, "lib", libfmt % name))
+            ]
+        if not libraries:
+            return
+        jobs = max(1, (os.cpu_count() or 1) // len(libraries))
+        with ThreadPoolExecutor(max_workers=len(libraries)) as pool:
+            builds = [pool.submit(BuildLibrary, name, dir, jobs) for name in libraries]
+            # Wait for all builds; raise the first error
+            for build in builds:
+                build.exception()
+            for build in builds:
+                build.result()
 
-def BuildLibrary(name, dir):
+
+def BuildLibrary(name, dir, jobs=None):
+    """
+    Build a library in a temporary directory and install it into dir.
+    The library itself is moved into place last, so that a process
+    finding it (without holding the lock) never sees a partial install.
+    """
     srcdir = os.path.join(os.path.dirname(__file__), name)
-    # with tempfile.TemporaryDirectory() as tmpdir: TOOD: Not available in python2
-    tmpdir = tempfile.mkdtemp()
-    subprocess.check_call(
-        [
-            "cmake",
-            srcdir,
-            "-DCMAKE_INSTALL_PREFIX=%s" % dir,
-            "-DCMAKE_BUILD_TYPE=Release",
-        ],
-        cwd=tmpdir,
-    )
-    subprocess.check_call(["cmake", "--build", ".", "-j"], cwd=tmpdir)
-    subprocess.check_call(["cmake", "--build", ".", "--target", "install"], cwd=tmpdir)
-    shutil.rmtree(tmpdir)
+    libdir = os.path.join(dir, "lib")
+    os.makedirs(libdir, exist_ok=True)
+    # Same file system as dir, so that files can be moved atomically
+    with tempfile.TemporaryDirectory(dir=dir, prefix=".build-") as tmpdir:
+        builddir = os.path.join(tmpdir, "build")
+        installdir = os.path.join(tmpdir, "install")
+        os.mkdir(builddir)
+        build = [
+            [
+                "cmake",
+                srcdir,
+                "-DCMAKE_INSTALL_PREFIX=%s" % installdir,
+                "-DCMAKE_BUILD_TYPE=Release",
+            ],
+            ["cmake", "--build", ".", "-j"] + ([str(jobs)] if jobs else []),
+            ["cmake", "--build", ".", "--target", "install"],
+        ]
+        for cmd in build:
+            # Builds run concurrently, so only show the output on errors
+            proc = subprocess.run(
+                cmd,
+                cwd=builddir,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True,
+            )
+            if proc.returncode != 0:
+                hdtv.ui.error(
+                    "Failed to build library %s:\n%s" % (libfmt % name, proc.stdout)
+                )
+                proc.check_returncode()
+
+        libname = libfmt % name
+        files = sorted(os.listdir(os.path.join(installdir, "lib")))
+        files.sort(key=lambda f: f == libname)
+        for f in files:
+            os.replace(os.path.join(installdir, "lib", f), os.path.join(libdir, f))
 
-    hdtv.ui.info("Rebuild library %s in %s" % ((libfmt % name), dir))
-    return os.path.join(dir, "lib", libfmt % name)
+    hdtv.ui.info("Rebuild library %s in %s" % (libname, dir))
+    return os.path.join(libdir, libname)
@@ -0,0 +1,191 @@
+/*
+ * HDTV - A ROOT-based spectrum analysis software
+ *  Copyright (C) 2006-2009  The HDTV development team (see file AUTHORS)
+ *
+ * This file is part of HDTV.
+ *
+ * HDTV is free software; you can redistribute it and/or modify it
+ * under the terms of the GNU General Public License as published by the
+ * Free Software Foundation; either version 2 of the License, or (at your
+ * option) any later version.
+ *
+ * HDTV is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+ * FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+ * for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with HDTV; if not, write to the Free Software Foundation,
+ * Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+ *
+ */
+
+#include "LCWriter.hh"
+
+#include <algorithm>
+#include <limits>
+#include <thread>
+
+extern "C" {
+#include "lc_c1.h"
+#include "lc_c2.h"
+#include "lc_minfo.h"
+}
+
+namespace {
+const size_t kBlockSize = 16 * 1024 * 1024;
+} // end anonymous namespace
+
+LCWriter::LCWriter(const char *fname, unsigned int levels, unsigned int lines, unsigned int columns, int version,
+                   unsigned int nThreads)
+    : fFile(nullptr), fLevels(levels), fLines(lines), fColumns(columns), fVersion(version), fThreads(nThreads),
+      fCompress(nullptr), fLineLenMax(0), fFreePos(0), fFail(false) {
+
+  // Same default and compressors as lc_init()
+  if (fVersion == 0) {
+    fVersion = LC_STD_VERSION;
+  }
+  switch (fVersion) {
+  case LC_C1_VERSION:
+    fCompress = lc1_compress;
+    fLineLenMax = lc1_comprlinelenmax(fColumns);
+    break;
+  case LC_C2_VERSION:
+    fCompress = lc2_compress;
+    fLineLenMax = lc2_comprlinelenmax(fColumns);
+    break;
+  default:
+    return;
+  }
+
+  if (fThreads == 0) {
+    fThreads = std::max(std::thread::hardware_concurrency(), 1U);
+  }
+
+  // The lines follow the header and the table of their positions and lengths
+  uint64_t n = uint64_t(fLevels) * fLines;
+  fFreePos = sizeof(lc_header) + n * sizeof(lc_poslen);
+  if (fColumns == 0 || n == 0 || fFreePos > std::numeric_limits<uint32_t>::max()) {
+    return;
+  }
+  fPosLen.reserve(2 * n);
+
+  fFile = fopen(fname, "wb");
+  if (fFile && fseek(fFile, fFreePos, SEEK_SET) != 0) {
+    fclose(fFile);
+    fFile = nullptr;
+  }
+}
+
+LCWriter::~LCWriter() {
+  if (fFile) {
+    fclose(fFile);
+  }
+}
+
+unsigned int LCWriter::GetBlockLines() const {
+  return std::max<unsigned int>(kBlockSize / (fColumns * sizeof(int32_t)), fThreads);
+}
+
+void LCWriter::Compress(Block &block, unsigned int first, unsigned int nLines, const FillFunc &fill) const {
+  std::vector<int32_t> line(fColumns);
+  block.data.resize(size_t(nLines) * fLineLenMax);
+  block.lengths.resize(nLines);
+  block.ok = true;
+
+  size_t size = 0;
+  for (unsigned int i = 0; i < nLines; i++) {
+    fill(first + i, line.data());
+    int32_t len = fCompress(block.data.data() + size, line.data(), fColumns);
+    if (len <= 0) {
+      block.ok = false;
+      return;
+    }
+    block.lengths[i] = len;
+    size += len;
+  }
+  block.data.resize(size);
+}
+
+bool LCWriter::PutLines(unsigned int nLines, const FillFunc &fill) {
+  unsigned int first = fPosLen.size() / 2;
+  if (!fFile || fFail || nLines > fLevels * fLines - first) {
+    fFail = true;
+    return false;
+  }
+
+  // Each thread compresses a consecutive part of the lines; the parts are then written in order
+  unsigned int nBlocks = std::max(std::min(fThreads, nLines), 1U);
+  unsigned int perBlock = (nLines + nBlocks - 1) / nBlocks;
+  std::vector<Block> blocks(nBlocks);
+  std::vector<std::thread> workers;
+  for (unsigned int b = 1; b < nBlocks; b++) {
+    unsigned int start = std::min(b * perBlock, nLines);
+    unsigned int n = std::min(perBlock, nLines - start);
+    workers.emplace_back(&LCWriter::Compress, this, std::ref(blocks[b]), first + start, n, std::cref(fill));
+  }
+  Compress(blocks[0], first, std::min(perBlock, nLines), fill);
+  for (auto &worker : workers) {
+    worker.join();
+  }
+
+  for (const auto &block : blocks) {
+    if (!block.ok) {
+      fFail = true;
+      return false;
+    }
+    for (uint32_t len : block.lengths) {
+      fPosLen.push_back(fFreePos);
+      fPosLen.push_back(len);
+      fFreePos += len;
+    }
+    if (fFreePos > std::numeric_limits<uint32_t>::max() ||
+        fwrite(block.data.data(), 1, block.data.size(), fFile) != block.data.size()) {
+      fFail = true;
+      return false;
+    }
+  }
+  return true;
+}
+
+bool LCWriter::WriteLE4(const uint32_t *values, size_t n) {
+  std::vector<unsigned char> buf(4 * n);
+  for (size_t i = 0; i < n; i++) {
+    buf[4 * i] = values[i] & 0xff;
+    buf[4 * i + 1] = (values[i] >> 8) & 0xff;
+    buf[4 * i + 2] = (values[i] >> 16) & 0xff;
+    buf[4 * i + 3] = (values[i] >> 24) & 0xff;
+  }
+  return fwrite(buf.data(), 1, buf.size(), fFile) == buf.size();
+}
+
+bool LCWriter::Close() {
+  if (!fFile) {
+    return false;
+  }
+
+  // Same header as lc_flush()
+  bool ok = !fFail && fPosLen.size() == 2 * size_t(fLevels) * fLines;
+  if (ok) {
+    uint32_t header[] = {static_cast<uint32_t>(MAGIC_LC),
+                         static_cast<uint32_t>(fVersion),
+                         fLevels,
+                         fLines,
+                         fColumns,
+                         sizeof(lc_header),
+                         static_cast<uint32_t>(fFreePos),
+                         0, // freelistpos
+                         0, // used
+                         0, // free
+                         0};
+    static_assert(sizeof(header) == sizeof(lc_header), "LC header size mismatch");
+    ok = fseek(fFile, 0, SEEK_SET) == 0 && WriteLE4(header, sizeof(header) / sizeof(uint32_t)) &&
+         WriteLE4(fPosLen.data(), fPosLen.size());
+  }
+
+  if (fclose(fFile) != 0) {
+    ok = false;
+  }
+  fFile = nullptr;
+  return ok;
+}
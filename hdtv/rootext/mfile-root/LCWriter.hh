@@ -0,0 +1,76 @@
+/*
+ * HDTV - A ROOT-based spectrum analysis software
+ *  Copyright (C) 2006-2009  The HDTV development team (see file AUTHORS)
+ *
+ * This file is part of HDTV.
+ *
+ * HDTV is free software; you can redistribute it and/or modify it
+ * under the terms of the GNU General Public License as published by the
+ * Free Software Foundation; either version 2 of the License, or (at your
+ * option) any later version.
+ *
+ * HDTV is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+ * FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+ * for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with HDTV; if not, write to the Free Software Foundation,
+ * Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+ *
+ */
+
+#ifndef __LCWriter_h__
+#define __LCWriter_h__
+
+#include <cstdint>
+#include <cstdio>
+#include <functional>
+#include <vector>
+
+//! Writes a new line-compressed (LC) matrix file, compressing blocks of lines in parallel worker threads
+//!
+//! The lines are put in order (level by level) and written one after the other, which is the layout of an LC file
+//! that mfile writes line by line, so that both files are identical.
+class LCWriter {
+public:
+  //! Fills the values of a line (level * lines + line) into buf; called from the worker threads
+  using FillFunc = std::function<void(unsigned int line, int32_t *buf)>;
+
+  LCWriter(const char *fname, unsigned int levels, unsigned int lines, unsigned int columns, int version = 0,
+           unsigned int nThreads = 0);
+  ~LCWriter();
+
+  bool IsZombie() const { return fFile == nullptr; }
+
+  //! Number of lines compressed at once (about 16 MB of values)
+  unsigned int GetBlockLines() const;
+
+  //! Compress and write the next nLines lines
+  bool PutLines(unsigned int nLines, const FillFunc &fill);
+
+  //! Write the header and the position of the lines and close the file
+  bool Close();
+
+private:
+  struct Block {
+    std::vector<char> data;
+    std::vector<uint32_t> lengths;
+    bool ok;
+  };
+
+  void Compress(Block &block, unsigned int first, unsigned int nLines, const FillFunc &fill) const;
+  bool WriteLE4(const uint32_t *values, size_t n);
+
+  FILE *fFile;
+  unsigned int fLevels, fLines, fColumns;
+  int fVersion;
+  unsigned int fThreads;
+  int32_t (*fCompress)(char *dest, int32_t *src, int32_t num);
+  uint32_t fLineLenMax;
+  std::vector<uint32_t> fPosLen;
+  uint64_t fFreePos;
+  bool fFail;
+};
+
+#endif
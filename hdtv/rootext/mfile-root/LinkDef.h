@@ -9,6 +9,7 @@
 #pragma link C++ class VMatrix+;
 #pragma link C++ class MFMatrix+;
 #pragma link C++ class RMatrix+;
+#pragma link C++ class SymMatrix+;
 #pragma link C++ class MatOp+;
 
 #endif
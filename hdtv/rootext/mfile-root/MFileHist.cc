@@ -21,12 +21,15 @@
  */
 #include "MFileHist.hh"
 
+#include <algorithm>
 #include <iostream>
 
 #include <TArrayD.h>
 #include <TH1.h>
 #include <TH2.h>
 
+#include "LCWriter.hh"
+
 const int MFileHist::ERR_SUCCESS = 0;
 const int MFileHist::ERR_READ_OPEN = 1;
 const int MFileHist::ERR_READ_INFO = 2;
@@ -118,7 +121,43 @@ int MFileHist::WriteTH1(const TH1 *hist, char *fname, char *fmt) {
   return ERR_SUCCESS;
 }
 
-int MFileHist::WriteTH2(const TH2 *hist, char *fname, char *fmt) {
+namespace {
+// Same rounding as mputdbl() for integer formats
+inline int32_t RoundToInt(double value) { return value > 0 ? value + 0.5 : value - 0.5; }
+
+int WriteTH2LC(const TH2 *hist, char *fname, int version, unsigned int nThreads) {
+  unsigned int nbinsx = hist->GetNbinsX();
+  unsigned int nbinsy = hist->GetNbinsY();
+
+  LCWriter writer(fname, 1, nbinsy, nbinsx, version, nThreads);
+  if (writer.IsZombie()) {
+    return MFileHist::ERR_WRITE_OPEN;
+  }
+
+  // Empties the fill buffer of the histogram (if any) before the worker threads read from it
+  hist->GetBinContent(1, 1);
+  auto fill = [hist, nbinsx](unsigned int line, int32_t *buf) {
+    for (unsigned int col = 0; col < nbinsx; col++) {
+      buf[col] = RoundToInt(hist->GetBinContent(col + 1, line + 1));
+    }
+  };
+
+  unsigned int blockLines = writer.GetBlockLines();
+  for (unsigned int line = 0; line < nbinsy; line += blockLines) {
+    if (!writer.PutLines(std::min(blockLines, nbinsy - line), fill)) {
+      return MFileHist::ERR_WRITE_PUT;
+    }
+  }
+
+  if (!writer.Close()) {
+    return MFileHist::ERR_WRITE_CLOSE;
+  }
+
+  return MFileHist::ERR_SUCCESS;
+}
+} // end anonymous namespace
+
+int MFileHist::WriteTH2(const TH2 *hist, char *fname, char *fmt, unsigned int nThreads) {
   MFILE *mf;
   minfo info;
   int nbinsx = hist->GetNbinsX();
@@ -144,6 +183,15 @@ int MFileHist::WriteTH2(const TH2 *hist, char *fname, char *fmt) {
     return ERR_WRITE_INFO;
   }
 
+  // Line-compressed matrices are compressed in parallel; mfile has not written anything yet, so closing it leaves an
+  // empty file
+  if (nThreads != 1 && info.filetype == MAT_LC) {
+    if (mclose(mf) != 0) {
+      return ERR_WRITE_CLOSE;
+    }
+    return WriteTH2LC(hist, fname, info.version, nThreads);
+  }
+
   TArrayD buf(nbinsx);
 
   for (line = 0; line < nbinsy; line++) {
@@ -66,7 +66,8 @@ public:
   TH2I *ToTH2I(const char *name, const char *title, unsigned int level);
 
   static int WriteTH1(const TH1 *hist, char *fname, char *fmt);
-  static int WriteTH2(const TH2 *hist, char *fname, char *fmt);
+  //! Line-compressed matrices are compressed in nThreads threads (0: one per CPU, 1: serially by mfile)
+  static int WriteTH2(const TH2 *hist, char *fname, char *fmt, unsigned int nThreads = 0);
 
   static const char *GetErrorMsg(int error_nr);
   const char *GetErrorMsg() { return GetErrorMsg(fErrno); }
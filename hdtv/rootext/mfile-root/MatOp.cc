@@ -22,8 +22,11 @@
 
 #include "MatOp.hh"
 
+#include <algorithm>
 #include <iostream>
+#include <vector>
 
+#include "LCWriter.hh"
 #include "MFileRoot.hh"
 #include "matop/matop_adjust.h"
 #include "matop/matop_conv.h"
@@ -101,12 +104,89 @@ int MatOp::Project(const char *src_fname, const char *prx_fname, const char *pry
   return ERR_SUCCESS;
 }
 
-int MatOp::Transpose(const char *src_fname, const char *dst_fname) {
+namespace {
+// Largest matrix (number of values) that is transposed in memory
+const size_t kMaxTransposeValues = size_t(1) << 27;
+
+// Formats that matop_conv() copies as integers
+bool IsIntFormat(int filetype) {
+  switch (filetype) {
+  case MAT_LE2:
+  case MAT_LE4:
+  case MAT_HE2:
+  case MAT_HE4:
+  case MAT_LE2T:
+  case MAT_LE4T:
+  case MAT_HE2T:
+  case MAT_HE4T:
+  case MAT_SHM:
+  case MAT_LC:
+  case MAT_MATE:
+  case MAT_TRIXI:
+    return true;
+  }
+  return false;
+}
+
+// Transposes an integer matrix in memory; the lines of the transpose are compressed in parallel
+int TransposeInMemory(MFILE *src, const char *dst_fname, const minfo &info, unsigned int nThreads) {
+  unsigned int levels = info.levels;
+  unsigned int lines = info.lines;
+  unsigned int columns = info.columns;
+
+  std::vector<int32_t> values(size_t(levels) * lines * columns);
+  for (unsigned int v = 0; v < levels; v++) {
+    for (unsigned int l = 0; l < lines; l++) {
+      if (mgetint(src, &values[(size_t(v) * lines + l) * columns], v, l, 0, columns) != int32_t(columns)) {
+        return MatOp::ERR_TRANS_FAIL;
+      }
+    }
+  }
+
+  LCWriter writer(dst_fname, levels, columns, lines, 0, nThreads);
+  if (writer.IsZombie()) {
+    return MatOp::ERR_TRANS_OPEN;
+  }
+
+  // Line (level * columns + c) of the transpose is column c of the source
+  auto fill = [&values, lines, columns](unsigned int line, int32_t *buf) {
+    const int32_t *col = &values[size_t(line / columns) * lines * columns + line % columns];
+    for (unsigned int l = 0; l < lines; l++) {
+      buf[l] = col[size_t(l) * columns];
+    }
+  };
+
+  unsigned int nLines = levels * columns;
+  unsigned int blockLines = writer.GetBlockLines();
+  for (unsigned int line = 0; line < nLines; line += blockLines) {
+    if (!writer.PutLines(std::min(blockLines, nLines - line), fill)) {
+      return MatOp::ERR_TRANS_FAIL;
+    }
+  }
+
+  if (!writer.Close()) {
+    return MatOp::ERR_TRANS_FAIL;
+  }
+
+  return MatOp::ERR_SUCCESS;
+}
+} // end anonymous namespace
+
+int MatOp::Transpose(const char *src_fname, const char *dst_fname, unsigned int nThreads) {
   MFile in_matrix(src_fname, "r");
   if (in_matrix.IsZombie()) {
     return ERR_SRC_OPEN;
   }
 
+  // The output file gets no format below, so matop_conv() writes the transpose of an integer matrix in the default
+  // (line-compressed) format; this is written in parallel, with the same result
+  minfo info;
+  mgetinfo(in_matrix.File(), &info);
+  if (nThreads != 1 && IsIntFormat(info.filetype) &&
+      size_t(info.levels) * info.lines * info.columns <= kMaxTransposeValues) {
+    return TransposeInMemory(in_matrix.File(), dst_fname, info, nThreads);
+  }
+
   // std::cout << "Info: input format is " << mgetfmt(in_matrix, NULL) <<
   // std::endl;
 
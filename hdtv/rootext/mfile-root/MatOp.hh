@@ -26,7 +26,9 @@
 class MatOp {
 public:
   static int Project(const char *src_fname, const char *prx_fname, const char *pry_fname = nullptr);
-  static int Transpose(const char *src_fname, const char *dst_fname);
+  //! Integer matrices are transposed in memory and compressed in nThreads threads (0: one per CPU, 1: serially by
+  //! matop)
+  static int Transpose(const char *src_fname, const char *dst_fname, unsigned int nThreads = 0);
 
   static const char *GetErrorString(int error_nr);
 
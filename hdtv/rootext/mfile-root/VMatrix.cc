@@ -164,3 +164,98 @@ void MFMatrix::AddLine(TArrayD &dst, int l) {
     dst[c] += fBuf[c];
   }
 }
+
+SymMatrix::SymMatrix(TH2 *hist) : VMatrix(), fN(0), fAxis(), fData() {
+  int n = hist->GetNbinsX();
+  if (hist->GetNbinsY() != n) {
+    fFail = true;
+    return;
+  }
+
+  Allocate(n);
+  const TAxis *axis = hist->GetXaxis();
+  if (axis->GetXbins()->GetSize() > 0) {
+    fAxis.Set(n, axis->GetXbins()->GetArray());
+  } else {
+    fAxis.Set(n, axis->GetXmin(), axis->GetXmax());
+  }
+
+  double *data = fData.data();
+  for (int i = 0; i < n; ++i) {
+    for (int j = i; j < n; ++j) {
+      *data++ = hist->GetBinContent(i + 1, j + 1);
+    }
+  }
+}
+
+SymMatrix::SymMatrix(MFileHist *mat, unsigned int level) : VMatrix(), fN(0), fAxis(), fData() {
+  int n = mat->GetNLines();
+  if (level >= mat->GetNLevels() || static_cast<int>(mat->GetNColumns()) != n) {
+    fFail = true;
+    return;
+  }
+
+  Allocate(n);
+  fAxis.Set(n, -0.5, n - 0.5);
+
+  // Line l of the file holds the bins (c, l) with c <= l, i.e. column l of
+  // the packed triangle
+  std::vector<double> buf(n);
+  for (int l = 0; l < n; ++l) {
+    if (!mat->FillBuf1D(buf.data(), level, l)) {
+      fFail = true;
+      fData.clear();
+      return;
+    }
+    for (int c = 0; c <= l; ++c) {
+      fData[Index(c, l)] = buf[c];
+    }
+  }
+}
+
+void SymMatrix::Allocate(int n) {
+  fN = n;
+  fData.assign(static_cast<size_t>(n) * (n + 1) / 2, 0.0);
+}
+
+void SymMatrix::AddLine(TArrayD &dst, int l) {
+  double *d = dst.GetArray();
+  const double *data = fData.data();
+
+  // Column l of the triangle: the distance between (c, l) and (c + 1, l)
+  // decreases by one with every line
+  size_t idx = l;
+  for (int c = 0; c < l; ++c) {
+    d[c] += data[idx];
+    idx += fN - c - 1;
+  }
+
+  // Line l of the triangle
+  const double *line = data + Index(l, l);
+  for (int c = l; c < fN; ++c) {
+    d[c] += *line++;
+  }
+}
+
+TH1 *SymMatrix::Projection(const char *histname, const char *histtitle) {
+  if (Failed()) {
+    return nullptr;
+  }
+
+  std::vector<double> sum(fN, 0.0);
+  const double *data = fData.data();
+  for (int i = 0; i < fN; ++i) {
+    // Diagonal bins are counted once, all others for their line and column
+    sum[i] += *data++;
+    for (int j = i + 1; j < fN; ++j) {
+      sum[i] += *data;
+      sum[j] += *data++;
+    }
+  }
+
+  auto hist = new TH1D(histname, histtitle, fN, fAxis.GetXmin(), fAxis.GetXmax());
+  for (int c = 0; c < fN; c++) {
+    hist->SetBinContent(c + 1, sum[c]);
+  }
+  return hist;
+}
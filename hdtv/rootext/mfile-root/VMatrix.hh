@@ -24,7 +24,9 @@
 #define __VMatrix_h__
 
 #include <list>
+#include <vector>
 
+#include <TAxis.h>
 #include <TH1.h>
 #include <TH2.h>
 
@@ -145,4 +147,47 @@ private:
   TArrayD fBuf;
 };
 
+//! Symmetric matrix, of which only the upper triangle is kept in memory
+/*!
+ * The triangle is packed line by line: line i holds the bins (i, i) to
+ * (i, n-1). A full line l of the matrix is thus made up of column l of the
+ * triangle (the bins (c, l) with c < l) and the contiguous line l.
+ */
+class SymMatrix : public VMatrix {
+public:
+  //! Convert a square TH2, using its upper triangle (x bin <= y bin)
+  explicit SymMatrix(TH2 *hist);
+  //! Read a square mfile matrix, using the lower triangle of each line
+  //! (as stored by the triangular formats le2t, le4t, ...)
+  SymMatrix(MFileHist *mat, unsigned int level);
+  ~SymMatrix() override = default;
+
+  int FindCutBin(double x) override { return fAxis.FindFixBin(x) - 1; }
+
+  int GetCutLowBin() override { return 0; }
+  int GetCutHighBin() override { return fN - 1; }
+
+  double GetProjXmin() override { return fAxis.GetXmin(); }
+  double GetProjXmax() override { return fAxis.GetXmax(); }
+  int GetProjXbins() override { return fN; }
+
+  void AddLine(TArrayD &dst, int l) override;
+
+  //! Projection (sum of all lines), in a single pass over the triangle
+  TH1 *Projection(const char *histname, const char *histtitle);
+
+  //! Number of bins kept in memory
+  size_t GetSize() { return fData.size(); }
+
+private:
+  //! Index of bin (i, j), i <= j, in the packed triangle
+  size_t Index(int i, int j) { return static_cast<size_t>(i) * (2 * fN - i - 1) / 2 + j; }
+
+  void Allocate(int n);
+
+  int fN;
+  TAxis fAxis;
+  std::vector<double> fData;
+};
+
 #endif
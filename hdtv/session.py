@@ -43,10 +43,16 @@ class Session(DrawableManager):
     First of all this provides a list of spectra, which is why this is called
     spectra in most contexts. But this also keeps track of the basic fit interface
     and of a list of calibrations.
+
+    A headless session (e.g. for batch jobs) needs no X server: it has a
+    null viewport, and display objects are replaced by noops.
     """
 
-    def __init__(self):
-        self.window = Window()
+    def __init__(self, headless=False):
+        self.headless = headless
+        if headless:
+            monkey_patch_ui()
+        self.window = Window(headless=headless)
         super(Session, self).__init__(viewport=self.window.viewport)
         # TODO: make peakModel and bgdeg configurable
         self.workFit = Fit(Fitter(peakModel="theuerkauf", backgroundModel="polynomial"))
@@ -238,6 +244,9 @@ class Session(DrawableManager):
             ID = spec.activeID
         ID = spec.Insert(self.workFit, ID)
         spec.dict[ID].active = False
+        if not self.viewport:
+            # nothing to draw, keep only the results
+            spec.dict[ID].Release()
         spec.ActivateObject(None)
         hdtv.ui.msg("Storing workFit with ID %s" % ID)
         self.workFit = copy.copy(self.workFit)
@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+
+# HDTV - A ROOT-based spectrum analysis software
+#  Copyright (C) 2006-2019  The HDTV development team (see file AUTHORS)
+#
+# This file is part of HDTV.
+#
+# HDTV is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 2 of the License, or (at your
+# option) any later version.
+#
+# HDTV is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HDTV; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+
+"""
+Session snapshots
+
+A snapshot stores a whole session in a single file: the spectra with
+their bin contents, calibrations, efficiencies and fits, and the matrices
+with their cuts. Restoring a snapshot does not read the spectrum files and
+does not repeat any fit.
+
+File layout: the magic string, the format version (uint32) and the length
+of the header (uint64), followed by the header (JSON) and the arrays. Each
+array starts at a multiple of ALIGN bytes, so it can be memory-mapped.
+"""
+
+import os
+import json
+import struct
+import tempfile
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+import hdtv.cal
+import hdtv.color
+import hdtv.efficiency
+import hdtv.ui
+import hdtv.util
+from hdtv.cut import Cut
+from hdtv.fitxml import FitXml
+from hdtv.histogram import OpenMatrix, SnapshotHistogram
+from hdtv.matrix import Matrix
+from hdtv.specreader import SpecReaderError
+from hdtv.spectrum import CutSpectrum, Spectrum
+from hdtv.weakref_proxy import weakref
+
+MAGIC = b"HDTVSNAP"
+VERSION = 1
+ALIGN = 64
+
+_prefix = struct.Struct("<8sIQ")
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _Padded(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+def Write(fname, header, arrays):
+    """
+    Write header (a dict) and arrays (a dict mapping names to numpy arrays)
+    to a snapshot file. The file is replaced atomically.
+    """
+    layout = dict()
+    offset = 0
+    for (name, array) in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        layout[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset += _Padded(array.nbytes)
+    data = json.dumps(dict(header, arrays=layout)).encode("utf-8")
+    start = _Padded(_prefix.size + len(data))
+
+    dirname = os.path.dirname(os.path.abspath(fname))
+    (fd, tmpname) = tempfile.mkstemp(dir=dirname, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_prefix.pack(MAGIC, VERSION, len(data)))
+            f.write(data)
+            f.write(b"\0" * (start - _prefix.size - len(data)))
+            for (name, array) in arrays.items():
+                f.write(array.tobytes())
+                f.write(b"\0" * (_Padded(array.nbytes) - array.nbytes))
+        os.replace(tmpname, fname)
+    except BaseException:
+        os.unlink(tmpname)
+        raise
+
+
+class Snapshot(object):
+    """
+    Snapshot file opened for reading; arrays are memory-mapped
+    """
+
+    def __init__(self, fname):
+        self.fname = fname
+        with open(fname, "rb") as f:
+            try:
+                (magic, version, length) = _prefix.unpack(f.read(_prefix.size))
+            except struct.error:
+                magic = None
+            if magic != MAGIC:
+                raise SnapshotError("%s is not a hdtv session snapshot" % fname)
+            if version > VERSION:
+                raise SnapshotError(
+                    "%s has snapshot version %d, this hdtv supports up to %d"
+                    % (fname, version, VERSION)
+                )
+            self.header = json.loads(f.read(length).decode("utf-8"))
+        self._start = _Padded(_prefix.size + length)
+        self._map = None
+
+    def Array(self, name):
+        """
+        Returns the array name (read-only view of the file)
+        """
+        info = self.header["arrays"][name]
+        dtype = np.dtype(info["dtype"])
+        count = int(np.prod(info["shape"], dtype=np.int64))
+        if count == 0:
+            return np.zeros(info["shape"], dtype=dtype)
+        if self._map is None:
+            self._map = np.memmap(self.fname, dtype=np.uint8, mode="r")
+        begin = self._start + info["offset"]
+        data = self._map[begin : begin + count * dtype.itemsize]
+        return data.view(dtype).reshape(info["shape"])
+
+
+def _IDToJson(ID):
+    return None if ID is None else [ID.major, ID.minor]
+
+
+def _IDFromJson(ID):
+    return None if ID is None else hdtv.util.ID(*ID)
+
+
+def _EffToJson(eff):
+    if eff is None:
+        return None
+    return {
+        "class": type(eff).__name__,
+        "parameter": list(eff.parameter),
+        "covariance": eff.fCov,
+    }
+
+
+def _EffFromJson(eff):
+    if eff is None:
+        return None
+    # Missing parameters (of older versions) are set to 0
+    effCal = getattr(hdtv.efficiency, eff["class"])(pars=eff["parameter"])
+    effCal.fCov = effCal._upgradeCov(eff["covariance"])
+    return effCal
+
+
+def _MarkersToJson(markers):
+    return [[m.p1.pos_cal, m.p2.pos_cal] for m in markers if m.p2 is not None]
+
+
+def _CutToJson(ID, cut, spectra):
+    try:
+        sid = spectra.Index(cut.spec) if cut.spec is not None else None
+    except (ValueError, ReferenceError):
+        sid = None
+    return {
+        "id": _IDToJson(ID),
+        "axis": cut.axis,
+        "regions": _MarkersToJson(cut.regionMarkers),
+        "backgrounds": _MarkersToJson(cut.bgMarkers),
+        "spectrum": _IDToJson(sid),
+    }
+
+
+def Save(spectra, fname):
+    """
+    Write a snapshot of the session spectra to fname
+    """
+    fitxml = FitXml(spectra)
+    arrays = dict()
+    header = {
+        "activeID": _IDToJson(spectra.activeID),
+        "visible": [_IDToJson(ID) for ID in spectra.visible],
+        "caldict": {
+            name: hdtv.cal.GetCoeffs(cal) for (name, cal) in spectra.caldict.items()
+        },
+        "spectra": [],
+        "matrices": [],
+    }
+    matrices = dict()
+    for (n, ID) in enumerate(spectra.ids):
+        spec = spectra.dict[ID]
+        hist = spec.hist
+        entry = {
+            "id": _IDToJson(ID),
+            "name": spec.name,
+            "filename": getattr(hist, "filename", None),
+            "fmt": getattr(hist, "fmt", None),
+            "cal": hdtv.cal.GetCoeffs(spec.cal) if spec.cal else None,
+            "norm": spec.norm,
+            "effCal": _EffToJson(spec.effCal),
+            "fits": [
+                {
+                    "id": _IDToJson(fitID),
+                    "xml": ET.tostring(fitxml.Fit2Xml(fit), encoding="unicode"),
+                }
+                for (fitID, fit) in sorted(spec.dict.items())
+            ],
+            "visibleFits": [_IDToJson(fitID) for fitID in spec.visible],
+        }
+        matrix = getattr(spec, "matrix", None)
+        if matrix is not None and getattr(matrix.histo2D, "filename", None):
+            matrices[matrix.ID] = matrix
+            entry["matrix"] = _IDToJson(matrix.ID)
+            entry["axis"] = spec.axis
+            # Projections are read from their files again
+            for axis in ("x", "y"):
+                if hist is getattr(matrix.histo2D, "%sproj" % axis):
+                    entry["projection"] = axis
+        elif matrix is not None:
+            hdtv.ui.warning(
+                "Matrix %s cannot be saved, storing %s as a plain spectrum"
+                % (matrix.name, ID)
+            )
+        if "projection" not in entry:
+            (contents, errors) = hist.GetArrays()
+            entry["contents"] = "spectrum%d" % n
+            arrays[entry["contents"]] = contents
+            if errors is not None:
+                entry["errors"] = "errors%d" % n
+                arrays[entry["errors"]] = errors
+            if isinstance(hist, SnapshotHistogram) and hist._lazy is not None:
+                (entry["xmin"], entry["xmax"]) = hist._lazy[2:]
+            else:
+                xaxis = hist.hist.GetXaxis()
+                (entry["xmin"], entry["xmax"]) = (xaxis.GetXmin(), xaxis.GetXmax())
+        header["spectra"].append(entry)
+
+    for (ID, matrix) in sorted(matrices.items()):
+        header["matrices"].append(
+            {
+                "id": _IDToJson(ID),
+                "filename": os.path.abspath(matrix.histo2D.filename),
+                "sym": matrix.sym,
+                "cuts": [
+                    _CutToJson(cutID, cut, spectra)
+                    for (cutID, cut) in sorted(matrix.dict.items())
+                ],
+            }
+        )
+    Write(fname, header, arrays)
+    return len(header["spectra"])
+
+
+def _LoadMatrix(spectra, entry):
+    try:
+        histo = OpenMatrix(entry["filename"], entry["sym"])
+    except (OSError, RuntimeError, SpecReaderError) as msg:
+        hdtv.ui.warning("Could not load matrix %s: %s" % (entry["filename"], msg))
+        return None
+    matrix = Matrix(histo, entry["sym"], spectra.viewport)
+    matrix.ID = _IDFromJson(entry["id"])
+    matrix.color = hdtv.color.ColorForID(matrix.ID.major)
+    return matrix
+
+
+def _RestoreCuts(spectra, matrix, entry):
+    for cutEntry in entry["cuts"]:
+        cut = Cut()
+        for (p1, p2) in cutEntry["regions"]:
+            cut.regionMarkers.SetMarker(p1)
+            cut.regionMarkers.SetMarker(p2)
+        for (p1, p2) in cutEntry["backgrounds"]:
+            cut.bgMarkers.SetMarker(p1)
+            cut.bgMarkers.SetMarker(p2)
+        cut.matrix = matrix
+        cut.axis = cutEntry["axis"]
+        sid = _IDFromJson(cutEntry["spectrum"])
+        if sid in spectra.dict:
+            cut.spec = weakref(spectra.dict[sid])
+        matrix.Insert(cut, _IDFromJson(cutEntry["id"]))
+        matrix.dict[cut.ID].active = False
+    matrix.ActivateObject(None)
+
+
+def _RestoreFits(spectra, spec, entry, fitxml):
+    failed = 0
+    for fitEntry in entry["fits"]:
+        (fit, success) = fitxml.Xml2Fit(
+            ET.fromstring(fitEntry["xml"]), calibration=spec.cal
+        )
+        if success:
+            try:
+                fit.Restore(spec=spec)
+            except (TypeError, IndexError) as err:
+                hdtv.ui.debug("An exception occurred while restoring the peaks")
+                hdtv.ui.debug(err)
+                success = False
+        if not success:
+            failed += 1
+            fit.FitPeakFunc(spec)
+        spec.Insert(fit, _IDFromJson(fitEntry["id"]))
+    hidden = set(spec.ids) - {_IDFromJson(ID) for ID in entry["visibleFits"]}
+    if hidden:
+        spec.HideObjects(hidden)
+    return failed
+
+
+def Load(spectra, fname):
+    """
+    Replace the session spectra by the ones stored in the snapshot fname
+    """
+    snapshot = Snapshot(fname)
+    header = snapshot.header
+    fitxml = FitXml(spectra)
+
+    if spectra.viewport:
+        spectra.viewport.LockUpdate()
+    try:
+        for ID in spectra.ids:
+            spectra.Pop(ID)
+        spectra.caldict = {
+            name: hdtv.cal.MakeCalibration(coeffs)
+            for (name, coeffs) in header["caldict"].items()
+        }
+
+        matrices = dict()
+        for entry in header["matrices"]:
+            matrix = _LoadMatrix(spectra, entry)
+            if matrix is not None:
+                matrices[matrix.ID] = matrix
+
+        nfits = 0
+        failed = 0
+        for entry in header["spectra"]:
+            ID = _IDFromJson(entry["id"])
+            cal = entry["cal"]
+            matrix = matrices.get(_IDFromJson(entry.get("matrix")))
+            if "projection" in entry:
+                if matrix is None:
+                    continue
+                spec = matrix.project(entry["projection"])
+            else:
+                hist = SnapshotHistogram(
+                    entry["name"],
+                    snapshot.Array(entry["contents"]),
+                    snapshot.Array(entry["errors"]) if "errors" in entry else None,
+                    entry["xmin"],
+                    entry["xmax"],
+                    filename=entry["filename"],
+                    fmt=entry["fmt"],
+                    cal=cal,
+                )
+                if matrix is not None:
+                    spec = CutSpectrum(hist, matrix, entry["axis"])
+                else:
+                    spec = Spectrum(hist)
+            spec.effCal = _EffFromJson(entry["effCal"])
+            spectra.Insert(spec, ID)
+            spec.color = (
+                matrix.color if matrix is not None else hdtv.color.ColorForID(ID.major)
+            )
+            if cal is not None:
+                spec.cal = hdtv.cal.MakeCalibration(cal)
+            spec.norm = entry["norm"]
+            failed += _RestoreFits(spectra, spec, entry, fitxml)
+            nfits += len(entry["fits"])
+
+        for entry in header["matrices"]:
+            matrix = matrices.get(_IDFromJson(entry["id"]))
+            if matrix is not None:
+                _RestoreCuts(spectra, matrix, entry)
+
+        visible = [_IDFromJson(ID) for ID in header["visible"]]
+        spectra.ShowObjects([ID for ID in visible if ID in spectra.dict])
+        activeID = _IDFromJson(header["activeID"])
+        if activeID in spectra.dict:
+            spectra.ActivateObject(activeID)
+    finally:
+        if spectra.viewport:
+            spectra.viewport.UnlockUpdate()
+
+    if failed:
+        hdtv.ui.warning(
+            "%d of %d fits could not be restored and were repeated" % (failed, nfits)
+        )
+    return (len(spectra), nfits)
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+
+# HDTV - A ROOT-based spectrum analysis software
+#  Copyright (C) 2006-2019  The HDTV development team (see file AUTHORS)
+#
+# This file is part of HDTV.
+#
+# HDTV is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 2 of the License, or (at your
+# option) any later version.
+#
+# HDTV is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HDTV; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+
+"""
+Sort list-mode data into spectra and coincidence matrices
+
+A list-mode file is a sequence of fixed-size event records (after an
+optional header), each with a detector number, a raw energy and a
+timestamp. The events must be ordered in time. Two events of different
+detectors form a coincidence if their timestamps differ by at most the
+coincidence window.
+
+The file is split into one part per process. Each process memory-maps the
+file and sorts its part chunk by chunk; the events after the end of a chunk
+are only looked at to find the coincidences of its last events.
+
+This module only depends on numpy, so that the worker processes start
+quickly (without loading ROOT).
+"""
+
+import os
+import concurrent.futures
+import multiprocessing
+
+import numpy as np
+
+# Fields every record layout must have
+fields = ("detector", "energy", "time")
+
+default_layout = "detector:u2,energy:u2,time:u8"
+
+
+class SortError(Exception):
+    pass
+
+
+def ParseLayout(layout, byteorder="<"):
+    """
+    Create the record type from a layout like "detector:u2,energy:u2,time:u8"
+    (field name and numpy type code, in the order of the record). Fields
+    named "_" are padding and are ignored.
+    """
+    items = list()
+    for (n, item) in enumerate(layout.split(",")):
+        try:
+            (name, code) = (s.strip() for s in item.split(":"))
+            dtype = np.dtype(code).newbyteorder(byteorder)
+        except (ValueError, TypeError):
+            raise SortError("Invalid field %r in record layout" % item)
+        if name == "_":
+            name = "_%d" % n
+        items.append((name, dtype))
+    try:
+        dtype = np.dtype(items)
+    except ValueError as msg:
+        raise SortError("Invalid record layout: %s" % msg)
+    missing = [f for f in fields if f not in dtype.names]
+    if missing:
+        raise SortError("Record layout lacks field(s) %s" % ", ".join(missing))
+    if dtype["detector"].kind != "u":
+        raise SortError("Detector numbers must be unsigned integers")
+    return dtype
+
+
+class SortResult(object):
+    """
+    Spectra (one line per detector), matrix and statistics of a sorted file
+    """
+
+    def __init__(self, spectra, matrix, events, coincidences):
+        self.spectra = spectra
+        self.matrix = matrix
+        self.events = events
+        self.coincidences = coincidences
+
+    def Add(self, other):
+        if len(other.spectra) > len(self.spectra):
+            (self.spectra, other.spectra) = (other.spectra, self.spectra)
+        self.spectra[: len(other.spectra)] += other.spectra
+        if self.matrix is None:
+            self.matrix = other.matrix
+        elif other.matrix is not None:
+            self.matrix += other.matrix
+        self.events += other.events
+        self.coincidences += other.coincidences
+
+    @property
+    def detectors(self):
+        """
+        Detectors with at least one event
+        """
+        return [int(d) for d in np.flatnonzero(self.spectra.sum(axis=1))]
+
+
+class Sorter(object):
+    """
+    Sorts list-mode files into one spectrum per detector and (if a
+    coincidence window is given) a symmetric matrix of the coincident
+    events. Spectra and matrix cover the same energy range, from 0 to
+    nbins * binsize, with the bins centered on multiples of their width.
+
+    Energies are calibrated with the polynomial coefficients in cals
+    (detector: [cal0, cal1, ...]); detectors without calibration are
+    sorted by their raw energy. With dither, the raw energies are spread
+    over their channel before calibration, to avoid artifacts from
+    rebinning integer values.
+    """
+
+    def __init__(
+        self,
+        layout=default_layout,
+        cals=None,
+        nbins=8192,
+        binsize=1.0,
+        window=None,
+        mbins=4096,
+        header=0,
+        chunk=1 << 20,
+        dither=False,
+    ):
+        if isinstance(layout, str):
+            layout = ParseLayout(layout)
+        self.dtype = layout
+        self.cals = dict(cals or {})
+        self.nbins = nbins
+        self.binsize = binsize
+        self.window = window
+        self.mbins = mbins
+        self.header = header
+        self.chunk = max(int(chunk), 1)
+        self.dither = dither
+
+    @property
+    def mbinsize(self):
+        return self.binsize * self.nbins / self.mbins
+
+    def Sort(self, fname, processes=None):
+        """
+        Sort a list-mode file in processes (default: one per CPU) worker
+        processes. Returns a SortResult.
+        """
+        size = os.path.getsize(fname) - self.header
+        if size < 0 or size % self.dtype.itemsize:
+            raise SortError(
+                "Size of %s is not a multiple of the record size (%d bytes)"
+                % (fname, self.dtype.itemsize)
+            )
+        nevents = size // self.dtype.itemsize
+        if processes is None:
+            processes = os.cpu_count() or 1
+        processes = max(min(processes, nevents // self.chunk + 1), 1)
+        bounds = np.linspace(0, nevents, processes + 1).astype(np.int64)
+        parts = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+        if processes == 1:
+            results = [self.SortPart(fname, *parts[0])]
+        else:
+            # Do not fork the (ROOT, GUI) process; spawned workers only
+            # import this module
+            context = multiprocessing.get_context("spawn")
+            with concurrent.futures.ProcessPoolExecutor(
+                processes, mp_context=context
+            ) as executor:
+                futures = [
+                    executor.submit(self.SortPart, fname, start, stop)
+                    for (start, stop) in parts
+                ]
+                results = [f.result() for f in futures]
+
+        result = results[0]
+        for other in results[1:]:
+            result.Add(other)
+        return result
+
+    def SortPart(self, fname, start, stop):
+        """
+        Sort the events start to stop (exclusive) of a file
+        """
+        # The coincidences of all chunks are added to a single matrix
+        if self.window is None:
+            matrix = None
+        else:
+            matrix = np.zeros((self.mbins, self.mbins), dtype=np.int64)
+        result = SortResult(np.zeros((0, self.nbins), dtype=np.int64), matrix, 0, 0)
+        if stop <= start:
+            return result
+        events = np.memmap(fname, dtype=self.dtype, mode="r", offset=self.header)
+        for first in range(start, stop, self.chunk):
+            last = min(first + self.chunk, stop)
+            result.Add(self._SortChunk(events, first, last, matrix))
+        del events
+        return result
+
+    def _Calibrate(self, detector, energy, seed):
+        """
+        Calibrated energies of a chunk (the coefficients are looked up for
+        all events at once)
+        """
+        energy = energy.astype(np.float64)
+        if self.dither:
+            energy += np.random.default_rng(seed).random(len(energy)) - 0.5
+        ndet = int(detector.max()) + 1 if len(detector) else 0
+        degree = max([len(c) for c in self.cals.values()] + [2])
+        coeffs = np.zeros((ndet, degree))
+        coeffs[:, 1] = 1.0
+        for (d, c) in self.cals.items():
+            if d < ndet:
+                coeffs[d] = 0.0
+                coeffs[d, : len(c)] = c
+        coeffs = coeffs[detector]
+        # Horner scheme
+        result = np.zeros_like(energy)
+        for i in reversed(range(degree)):
+            result = result * energy + coeffs[:, i]
+        return result
+
+    @staticmethod
+    def _Bins(energy, binsize, nbins):
+        """
+        Bin numbers of energies, -1 for energies outside of the range
+        """
+        bins = np.floor(energy / binsize + 0.5).astype(np.int64)
+        bins[(bins < 0) | (bins >= nbins)] = -1
+        return bins
+
+    def _SortChunk(self, events, first, last, matrix=None):
+        """
+        Sort the events first to last (exclusive); their coincidences are
+        added to matrix
+        """
+        chunk = events[first:last]
+        detector = chunk["detector"].astype(np.int64)
+        energy = self._Calibrate(detector, chunk["energy"], first)
+
+        # Spectra
+        ndet = int(detector.max()) + 1
+        bins = self._Bins(energy, self.binsize, self.nbins)
+        valid = bins >= 0
+        spectra = np.bincount(
+            detector[valid] * self.nbins + bins[valid], minlength=ndet * self.nbins
+        ).reshape(ndet, self.nbins)
+
+        if self.window is None:
+            return SortResult(spectra, None, len(chunk), 0)
+
+        # Events after the chunk which may be coincident with its last events
+        time = chunk["time"].astype(np.int64)
+        end = last
+        while end < len(events) and int(events[end]["time"]) - time[-1] <= self.window:
+            end = min(end + max(self.chunk // 16, 1), len(events))
+        if end > last:
+            tail = events[last:end]
+            detector = np.concatenate([detector, tail["detector"].astype(np.int64)])
+            energy = np.concatenate(
+                [energy, self._Calibrate(detector[len(chunk) :], tail["energy"], last)]
+            )
+            time = np.concatenate([time, tail["time"].astype(np.int64)])
+
+        # Coincidences of each event of the chunk with the later events; as
+        # the events are ordered in time, there are no coincidences at larger
+        # distances once there are none at a distance
+        mbins = self._Bins(energy, self.mbinsize, self.mbins)
+        indices = list()
+        n = len(chunk)
+        distance = 1
+        while True:
+            m = min(n, len(time) - distance)
+            if m <= 0:
+                break
+            close = time[distance : distance + m] - time[:m] <= self.window
+            if not close.any():
+                break
+            b1 = mbins[:m]
+            b2 = mbins[distance : distance + m]
+            pair = (
+                close
+                & (detector[:m] != detector[distance : distance + m])
+                & (b1 >= 0)
+                & (b2 >= 0)
+            )
+            (b1, b2) = (b1[pair], b2[pair])
+            # Symmetric matrix: fill both (b1, b2) and (b2, b1)
+            indices += [b1 * self.mbins + b2, b2 * self.mbins + b1]
+            distance += 1
+        indices = np.concatenate(indices) if indices else np.zeros(0, np.int64)
+        # Only count the occupied matrix bins: a dense bincount would need
+        # a full matrix for every chunk
+        (occupied, counts) = np.unique(indices, return_counts=True)
+        matrix.reshape(-1)[occupied] += counts
+        return SortResult(spectra, None, len(chunk), len(indices) // 2)
@@ -210,6 +210,10 @@ class TextSpecReader(object):
 
 
 class SpecReader(object):
+    # Matrix formats which only store one triangle of a symmetric matrix
+    # (MAT_LE2T, MAT_LE4T, MAT_HE2T and MAT_HE4T in mfile.h)
+    triangular = (15, 16, 17, 18)
+
     @staticmethod
     def GetSpectrum(fname, fmt=None, histname=None, histtitle=None):
         """
@@ -315,8 +319,55 @@ class SpecReader(object):
         # FIXME: this ignores possibly specified bin errors
         return ROOT.MFMatrix(mhist, 0)
 
+    @staticmethod
+    def GetFileType(fname, fmt=None):
+        """
+        Get the mfile type (MAT_* in mfile.h) of a matrix file
+        """
+        mhist = ROOT.MFileHist()
+        if not fmt or fmt.lower() == "mfile":
+            errno = mhist.Open(fname)
+        else:
+            errno = mhist.Open(fname, fmt)
+        if errno != ROOT.MFileHist.ERR_SUCCESS:
+            raise SpecReaderError(mhist.GetErrorMsg())
+        filetype = mhist.GetFileType()
+        mhist.Close()
+        return filetype
+
+    @staticmethod
+    def GetSymMatrix(fname, fmt=None):
+        """
+        Load a symmetric matrix into memory, keeping only one triangle of it
+        """
+        mhist = ROOT.MFileHist()
+        if not fmt or fmt.lower() == "mfile":
+            errno = mhist.Open(fname)
+        else:
+            errno = mhist.Open(fname, fmt)
+        if errno != ROOT.MFileHist.ERR_SUCCESS:
+            raise SpecReaderError(mhist.GetErrorMsg())
+
+        # The bins are copied, so the file can be closed afterwards
+        matrix = ROOT.SymMatrix(mhist, 0)
+        mhist.Close()
+        if matrix.Failed():
+            raise SpecReaderError("%s is not a square matrix" % fname)
+        return matrix
+
     @staticmethod
     def WriteSpectrum(hist, fname, fmt):
         result = ROOT.MFileHist.WriteTH1(hist, fname, fmt)
         if result != ROOT.MFileHist.ERR_SUCCESS:
             raise SpecReaderError(ROOT.MFileHist.GetErrorMsg(result))
+
+    @staticmethod
+    def WriteMatrix(hist, fname, fmt, threads=0):
+        """
+        Write a TH2 to an mfile matrix. Line-compressed (lc) matrices are
+        compressed by the given number of threads (0: one per CPU); the file
+        is the same as when written serially (threads=1).
+        """
+        result = ROOT.MFileHist.WriteTH2(hist, fname, fmt, threads)
+        if result != ROOT.MFileHist.ERR_SUCCESS:
+            raise SpecReaderError(ROOT.MFileHist.GetErrorMsg(result))
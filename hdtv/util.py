@@ -435,11 +435,22 @@ class Position(object):
 
     if self.pos_cal is set the position is fixed in calibrated space.
     if self.pos_uncal is set the position is fixed in uncalibrated space.
+
+    The position in the other space is converted on first access and
+    cached until the position, its calibration or any calibration object
+    (see CalibrationChanged) changes.
     """
 
+    __slots__ = ("_cal", "_fixedInCal", "_pos_cal", "_pos_uncal", "_cache")
+
+    # Increased each time a calibration object is modified in place, which
+    # invalidates the cached conversions of all positions
+    _generation = 0
+
     def __init__(self, pos, fixedInCal, cal=None):
-        self.cal = cal
+        self._cal = cal
         self._fixedInCal = fixedInCal
+        self._cache = None
         if fixedInCal:
             self._pos_cal = pos
             self._pos_uncal = None
@@ -447,18 +458,51 @@ class Position(object):
             self._pos_cal = None
             self._pos_uncal = pos
 
+    @classmethod
+    def CalibrationChanged(cls):
+        """
+        Must be called after a calibration object was modified in place
+        (e.g. by SetCal or Rebin), as positions cannot notice that
+        """
+        cls._generation += 1
+
+    # cal
+    def _set_cal(self, cal):
+        self._cal = cal
+        self._cache = None
+
+    def _get_cal(self):
+        return self._cal
+
+    cal = property(_get_cal, _set_cal)
+
+    def _Converted(self):
+        """
+        Position in the space it is not fixed in
+        """
+        cache = self._cache
+        if cache is not None and cache[0] == Position._generation:
+            return cache[1]
+        if self._fixedInCal:
+            value = self._E2Ch(self._pos_cal)
+        else:
+            value = self._Ch2E(self._pos_uncal)
+        self._cache = (Position._generation, value)
+        return value
+
     # pos_cal
     def _set_pos_cal(self, pos):
-        if not self.fixedInCal:
+        if not self._fixedInCal:
             raise TypeError("Position is fixed in uncalibrated space")
         self._pos_cal = pos
         self._pos_uncal = None
+        self._cache = None
 
     def _get_pos_cal(self):
-        if self.fixedInCal:
+        if self._fixedInCal:
             return self._pos_cal
         else:
-            return self._Ch2E(self._pos_uncal)
+            return self._Converted()
 
     pos_cal = property(_get_pos_cal, _set_pos_cal)
 
@@ -468,10 +512,11 @@ class Position(object):
             raise TypeError("Position is fixed in calibrated space")
         self._pos_uncal = pos
         self._pos_cal = None
+        self._cache = None
 
     def _get_pos_uncal(self):
-        if self.fixedInCal:
-            return self._E2Ch(self._pos_cal)
+        if self._fixedInCal:
+            return self._Converted()
         else:
             return self._pos_uncal
 
@@ -499,17 +544,17 @@ class Position(object):
         return text
 
     def _Ch2E(self, Ch):
-        if self.cal is None:
+        if self._cal is None:
             E = Ch
         else:
-            E = self.cal.Ch2E(Ch)
+            E = self._cal.Ch2E(Ch)
         return E
 
     def _E2Ch(self, E):
-        if self.cal is None:
+        if self._cal is None:
             Ch = E
         else:
-            Ch = self.cal.E2Ch(E)
+            Ch = self._cal.E2Ch(E)
         return Ch
 
     def FixInCal(self):
@@ -517,19 +562,23 @@ class Position(object):
         Fix position in calibrated space
         """
         if not self._fixedInCal:
+            pos = self._Converted()
             self._fixedInCal = True
-            self.pos_cal = self._Ch2E(self._pos_uncal)
+            self.pos_cal = pos
 
     def FixInUncal(self):
         """
         Fix position in uncalibrated space
         """
         if self._fixedInCal:
+            pos = self._Converted()
             self._fixedInCal = False
-            self.pos_uncal = self._E2Ch(self._pos_cal)
+            self.pos_uncal = pos
 
 
 class ID(object):
+    __slots__ = ("major", "minor")
+
     def __init__(self, major=None, minor=None):
         if major is None:
             self.major = None
@@ -578,7 +627,12 @@ class ID(object):
 
     def __hash__(self):
         # this is needed to use IDs as keys in dicts and in sets
-        return hash(self.major) ^ hash(self.minor)
+        # hash(None) depends on the address of None (before Python 3.12),
+        # so None is replaced by -1 (IDs are never negative) to get the
+        # same set and dict order in every run
+        major = -1 if self.major is None else self.major
+        minor = -1 if self.minor is None else self.minor
+        return hash((major, minor))
 
     def __str__(self):
         if self.major is None and self.minor is None:
@@ -621,7 +675,7 @@ class ID(object):
         elif string.upper() == "VISIBLE":
             return list(manager.visible)
         elif string.upper() == "HIDDEN":
-            return [ID for ID in manager.ids if ID not in manager.visible]
+            return [ID for ID in manager.sortedIDs if ID not in manager.visible]
         else:
             raise ValueError
 
@@ -685,7 +739,7 @@ class ID(object):
                         hdtv.ui.error("Invalid ID %s" % stop)
                         raise ValueError
                 # fill the range
-                ids.extend([i for i in manager.ids if (i >= start and i <= stop)])
+                ids.extend(manager.sortedIDs.range(start, stop))
             else:
                 try:
                     special = cls._parseSpecialID(s, manager)
@@ -702,19 +756,13 @@ class ID(object):
             ids.remove(None)
 
         # filter non-existing ids
-        valid_ids = list()
         if only_existent:
+            valid_ids = list()
             for ID in ids:
-                for mID in manager.ids:
-                    if (mID.major == ID.major) and (mID.minor == ID.minor):
-                        valid_ids.append(ID)
-                        break  # break out of for mID in manager.ids loop
-
-                if (
-                    ID not in valid_ids
-                ):  # This only works because we appended IDs above, not mIDs, because they are different instances of the ID object
+                if ID in manager.dict:
+                    valid_ids.append(ID)
+                else:
                     hdtv.ui.warning("Non-existent id %s" % ID)
-
         else:
             valid_ids = ids
 
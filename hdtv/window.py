@@ -25,6 +25,7 @@ import hdtv.options
 import hdtv.color
 import hdtv.cmdline
 import hdtv.ui
+import hdtv.dummy
 from hdtv.marker import MarkerCollection
 import hdtv.rootext.display
 from hdtv.cmdline import HDTVCommandAbort, HDTVCommandError
@@ -207,17 +208,22 @@ class Window(KeyHandler):
     This class provides basic key handling for zooming and scrolling.
     """
 
-    def __init__(self):
+    def __init__(self, headless=False):
         super(Window, self).__init__()
 
-        self.viewer = ROOT.HDTV.Display.Viewer()
+        self.headless = headless
+        if headless:
+            self.viewer = hdtv.dummy.NullViewer()
+        else:
+            self.viewer = ROOT.HDTV.Display.Viewer()
         self.viewport = self.viewer.GetViewport()
         self._dispatchers = list()
 
-        # Handle closing of the main window (with an application exit)
-        disp = ROOT.TPyDispatcher(hdtv.cmdline.AsyncExit)
-        self.viewer.Connect("CloseWindow()", "TPyDispatcher", disp, "Dispatch()")
-        self._dispatchers.append(disp)
+        if not headless:
+            # Handle closing of the main window (with an application exit)
+            disp = ROOT.TPyDispatcher(hdtv.cmdline.AsyncExit)
+            self.viewer.Connect("CloseWindow()", "TPyDispatcher", disp, "Dispatch()")
+            self._dispatchers.append(disp)
 
         self.XZoomMarkers = MarkerCollection(
             "X", paired=True, maxnum=1, color=hdtv.color.zoom
@@ -229,9 +235,10 @@ class Window(KeyHandler):
         self.YZoomMarkers.Draw(self.viewport)
 
         # Key Handling
-        disp = ROOT.TPyDispatcher(self.KeyHandler)
-        self.viewer.Connect("KeyPressed()", "TPyDispatcher", disp, "Dispatch()")
-        self._dispatchers.append(disp)
+        if not headless:
+            disp = ROOT.TPyDispatcher(self.KeyHandler)
+            self.viewer.Connect("KeyPressed()", "TPyDispatcher", disp, "Dispatch()")
+            self._dispatchers.append(disp)
 
         self.keyString = ""
         self.AddHotkey(ROOT.kKey_u, lambda: self.viewport.Update())
@@ -43,7 +43,7 @@ def pytest_configure(config):
         print("Force Library Rebuild ...")
         import hdtv.rootext.dlmgr
 
-        hdtv.rootext.dlmgr.RebuildLibraries(hdtv.rootext.dlmgr.usrlibdir)
+        hdtv.rootext.dlmgr.RebuildLibraries(hdtv.rootext.dlmgr.usrdir)
 
 
 def pytest_sessionfinish(session, exitstatus):
@@ -32,7 +32,7 @@ import os
 import pytest
 
 from tests.helpers.utils import setup_io, redirect_stdout
-from tests.helpers.fixtures import temp_file_compressed
+from tests.helpers.fixtures import temp_file, temp_file_compressed
 
 from hdtv.util import monkey_patch_ui
 
@@ -41,6 +41,7 @@ monkey_patch_ui()
 import __main__
 
 import hdtv.session
+from hdtv.cmdline import HDTVCommandError
 
 try:
     __main__.spectra = hdtv.session.Session()
@@ -172,3 +173,107 @@ def test_fitxml_eepeak(temp_file_compressed):
     spectra.SetMarker("region", 1125)
     spectra.SetMarker("peak", 1120)
     fit_write_and_save(temp_file_compressed)
+
+
+def test_fitxml_append(temp_file):
+    """
+    append new fits to an existing fit list
+    """
+    spectra.SetMarker("region", 500)
+    spectra.SetMarker("region", 520)
+    spectra.SetMarker("peak", 511)
+    spectra.ExecuteFit()
+    spectra.StoreFit()
+    spectra.ClearFit()
+    sid = spectra.Get("0").ID
+    assert fitxml.WriteXML(sid, temp_file) == 1
+
+    spectra.SetMarker("region", 1450)
+    spectra.SetMarker("region", 1470)
+    spectra.SetMarker("peak", 1460)
+    spectra.ExecuteFit()
+    spectra.StoreFit()
+    spectra.ClearFit()
+    out_original = list_fit()
+    assert fitxml.WriteXML(sid, temp_file, append=True) == 1
+    assert fitxml.WriteXML(sid, temp_file, append=True) == 0
+
+    spectra.Get("0").Clear()
+    fitxml.ReadXML(sid, temp_file)
+    assert len(spectra.Get("0").dict) == 2
+    assert out_original == list_fit()
+
+
+def test_fitxml_list(tmp_path):
+    """
+    write and read back a list of fit lists
+    """
+    spectra.SetMarker("region", 500)
+    spectra.SetMarker("region", 520)
+    spectra.SetMarker("peak", 511)
+    spectra.ExecuteFit()
+    spectra.StoreFit()
+    spectra.ClearFit()
+    out_original = list_fit()
+    sid = spectra.Get("0").ID
+    fitxml.WriteXML(sid, str(tmp_path / "fits.xml"))
+    listfile = str(tmp_path / "fits.list")
+    fitxml.WriteList(listfile)
+    with open(listfile, "a") as f:
+        f.write("\nnot_loaded.spc: fits.xml\n")
+
+    spectra.Get("0").Clear()
+    fitxml.ReadList(listfile)
+    assert len(spectra.Get("0").dict) == 1
+    assert out_original == list_fit()
+
+
+def test_fitxml_append_untracked(temp_file):
+    """
+    refuse to append to a fit list which is unknown to this session
+    """
+    spectra.SetMarker("region", 500)
+    spectra.SetMarker("region", 520)
+    spectra.SetMarker("peak", 511)
+    spectra.ExecuteFit()
+    spectra.StoreFit()
+    spectra.ClearFit()
+    sid = spectra.Get("0").ID
+    assert fitxml.WriteXML(sid, temp_file) == 1
+
+    # e.g. written in an earlier session
+    fitxml.saved.clear()
+    with pytest.raises(HDTVCommandError):
+        fitxml.WriteXML(sid, temp_file, append=True)
+
+    fitxml.ReadXML(sid, temp_file)
+    assert fitxml.WriteXML(sid, temp_file, append=True) == 0
+
+
+def test_fitxml_append_changed(temp_file):
+    """
+    write all fits again if a fit in the file has changed
+    """
+    spectra.SetMarker("region", 500)
+    spectra.SetMarker("region", 520)
+    spectra.SetMarker("peak", 511)
+    spectra.ExecuteFit()
+    spectra.StoreFit()
+    spectra.ClearFit()
+    sid = spectra.Get("0").ID
+    assert fitxml.WriteXML(sid, temp_file) == 1
+
+    spectra.SetMarker("region", 1450)
+    spectra.SetMarker("region", 1470)
+    spectra.SetMarker("peak", 1460)
+    spectra.ExecuteFit()
+    spectra.StoreFit()
+    spectra.ClearFit()
+    fit = min(spectra.Get("0").dict.values(), key=lambda fit: fit.ID)
+    fit.chi += 1.0
+    assert fitxml.WriteXML(sid, temp_file, append=True) == 2
+    assert fitxml.WriteXML(sid, temp_file, append=True) == 0
+
+    spectra.Get("0").Clear()
+    fitxml.ReadXML(sid, temp_file)
+    assert len(spectra.Get("0").dict) == 2
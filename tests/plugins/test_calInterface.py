@@ -22,9 +22,12 @@
 import re
 import os
 import sys
+import math
 import filecmp
 
+import numpy as np
 import pytest
+from uncertainties import ufloat, correlated_values, umath
 
 from tests.helpers.utils import redirect_stdout, hdtvcmd
 from tests.helpers.fixtures import temp_file
@@ -186,6 +189,14 @@ def test_cmd_nuclide(nuclide):
     assert "intensity" in f
 
 
+def test_cmd_nuclide_energy():
+    f, ferr = hdtvcmd("nuclide -e 1332.5 -f 0.5")
+    assert ferr == ""
+    assert "Co-60" in f
+    f, ferr = hdtvcmd("nuclide -e 1332.5 -f 0.5 Cs-137")
+    assert "No transitions found" in ferr
+
+
 @pytest.mark.parametrize(
     "parameters, function",
     [
@@ -267,6 +278,126 @@ def test_cmd_cal_eff_write_cov(parfile, covfile, efffunction, temp_file):
     assert filecmp.cmp(covfile, temp_file)
 
 
+@pytest.mark.parametrize(
+    "parfile, covfile, efffunction",
+    [("tests/share/osiris_bg.par", "tests/share/osiris_bg.cov", "wunder")],
+)
+def test_eff_vectorized(parfile, covfile, efffunction):
+    hdtvcmd("calibration efficiency set {}".format(efffunction))
+    hdtvcmd("calibration efficiency read parameter {}".format(parfile))
+    hdtvcmd("calibration efficiency read covariance {}".format(covfile))
+    effCal = spectra.dict[spectra.activeID].effCal
+    energies = np.linspace(100.0, 3000.0, 30)
+    values, errors = effCal.evaluate(energies)
+    assert values == pytest.approx([effCal.value(E) for E in energies])
+    assert np.all(errors >= 0.0)
+    values, cov = effCal.evaluate(energies, full_cov=True)
+    assert cov.shape == (len(energies), len(energies))
+    assert np.sqrt(np.diagonal(cov)) == pytest.approx(errors)
+
+
+def _eff_reference(efffunction, E, p):
+    """
+    Efficiency as function of the parameters (ufloats), for an independent
+    error propagation
+    """
+    if efffunction == "wiedenhoever":
+        return p[0] * p[4] * (E - p[2] + p[3] * umath.exp(-p[4] * E)) ** (-p[1])
+    if efffunction == "pow":
+        return p[0] * (p[1] + p[2] * E ** (-p[3]))
+    if efffunction == "exp":
+        return p[0] * (p[1] * umath.exp(-p[2] * E) + p[3] * umath.exp(-p[4] * E))
+    # poly: the error is propagated on the logarithmic scale
+    ln_eff = p[0] * sum(c * math.log(E) ** i for i, c in enumerate(p[1:]))
+    ln_err = ln_eff.std_dev
+    value = math.exp(ln_eff.nominal_value)
+    return ufloat(value, (math.exp(ln_err) - math.exp(-ln_err)) / 2.0 * value)
+
+
+@pytest.mark.parametrize(
+    "parameters, efffunction",
+    [
+        ("1,0.8,20,50,0.005", "wiedenhoever"),
+        ("1,0.001,2.0,0.6", "pow"),
+        ("1,0.5,0.001,0.2,0.0002", "exp"),
+        ("1,-1.0,0.5,-0.05,0.001,0.00001", "poly"),
+    ],
+)
+def test_eff_vectorized_scalar(parameters, efffunction):
+    hdtvcmd("calibration efficiency set -p {} {}".format(parameters, efffunction))
+    effCal = spectra.dict[spectra.activeID].effCal
+    pars = np.array(effCal.parameter)
+    # Correlated errors for all parameters but the fixed normalization
+    sigma = 0.01 * np.abs(pars)
+    sigma[0] = 0.0
+    idx = np.arange(len(pars))
+    cov = 0.5 ** np.abs(np.subtract.outer(idx, idx)) * np.outer(sigma, sigma)
+    effCal.covariance = cov
+    upars = [pars[0]] + list(correlated_values(pars[1:], cov[1:, 1:]))
+
+    energies = np.linspace(100.0, 3000.0, 30)
+    values, errors = effCal.evaluate(energies)
+    assert values == pytest.approx([effCal.value(E) for E in energies])
+    assert errors == pytest.approx([effCal.error(E) for E in energies])
+    reference = [_eff_reference(efffunction, E, upars) for E in energies]
+    assert values == pytest.approx([r.nominal_value for r in reference])
+    assert errors == pytest.approx([r.std_dev for r in reference])
+    assert np.all(errors > 0.0)
+
+    correlated = effCal.correlated(energies)
+    assert [c.nominal_value for c in correlated] == pytest.approx(values)
+    assert [c.std_dev for c in correlated] == pytest.approx(errors)
+
+
+def test_eff_poly_legacy_files(tmp_path):
+    # Older versions saved degree + 1 values, without the highest coefficient
+    parfile = tmp_path / "poly.par"
+    parfile.write_text("1.0\n-1.0\n0.5\n-0.05\n0.001\n")
+    covfile = tmp_path / "poly.cov"
+    cov = np.diag([0.0, 1e-4, 1e-5, 1e-6, 1e-8])
+    covfile.write_text("\n".join(" ".join(str(v) for v in row) for row in cov))
+    hdtvcmd("calibration efficiency set poly")
+    f, ferr = hdtvcmd("calibration efficiency read parameter {}".format(parfile))
+    assert "older version" in f + ferr
+    f, ferr = hdtvcmd("calibration efficiency read covariance {}".format(covfile))
+    assert "older version" in f + ferr
+
+    effCal = spectra.dict[spectra.activeID].effCal
+    assert effCal.parameter == pytest.approx([1.0, -1.0, 0.5, -0.05, 0.001, 0.0])
+    expected = np.zeros((6, 6))
+    expected[:5, :5] = cov
+    assert effCal.covariance == pytest.approx(expected)
+    values, errors = effCal.evaluate([500.0, 1000.0])
+    assert np.all(errors > 0.0)
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+@pytest.mark.parametrize(
+    "parfile, covfile, efffunction",
+    [("tests/share/osiris_bg.par", "tests/share/osiris_bg.cov", "wunder")],
+)
+def test_cmd_cal_eff_apply(parfile, covfile, efffunction, temp_file):
+    hdtvcmd("fit peakfind -a -t 0.002")
+    hdtvcmd("calibration efficiency set {}".format(efffunction))
+    hdtvcmd("calibration efficiency read parameter {}".format(parfile))
+    hdtvcmd("calibration efficiency read covariance {}".format(covfile))
+    f, ferr = hdtvcmd("calibration efficiency apply")
+    assert ferr == ""
+    assert "vol/eff" in f
+    f, ferr = hdtvcmd("calibration efficiency apply -F -f {}".format(temp_file))
+    assert ferr == ""
+    with open(temp_file) as tf:
+        lines = tf.read().splitlines()
+    assert lines[0].startswith("#")
+    npeaks = sum(len(fit.peaks) for fit in spectra.dict[spectra.activeID].dict.values())
+    assert len(lines) - 1 == npeaks
+
+
+def test_cmd_cal_eff_apply_unset():
+    f, ferr = hdtvcmd("calibration efficiency apply")
+    assert "Efficiency function not set" in ferr
+
+
 @pytest.mark.skip(reason="Sample spectrum not sufficient for test?")
 def test_cmd_cal_pos_nuclide():
     raise NotImplementedError
@@ -19,7 +19,9 @@
 # along with HDTV; if not, write to the Free Software Foundation,
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
 
+import os
 import re
+import shutil
 import sys
 
 import pytest
@@ -29,6 +31,9 @@ from tests.helpers.utils import redirect_stdout, hdtvcmd
 import hdtv.cmdline
 import hdtv.options
 import hdtv.plugins.dblookup
+import hdtv.database
+import hdtv.database.cache
+from hdtv.database import IAEALibraries, DDEPLibraries
 
 
 @pytest.fixture(autouse=True)
@@ -105,6 +110,136 @@ def test_cmd_db_set(db):
     assert hdtv.options.Get("database.db") == db
 
 
+@pytest.mark.parametrize("db", ["promptgammas", "pgaalib_iki2000"])
+@pytest.mark.parametrize("energy", [139.94, 511.0, 2223.0])
+@pytest.mark.parametrize("fuzziness", [0.1, 1.0, 5.0])
+def test_db_find_energy(db, energy, fuzziness):
+    database = hdtv.database.databases[db]()
+    database.open()
+    expected = [
+        g.ID for g in database if abs(g.energy.nominal_value - energy) <= fuzziness
+    ]
+    found = database.find(fuzziness, energy=energy)
+    assert [g.ID for g in found] == expected
+
+
+@pytest.mark.parametrize("db", ["promptgammas", "pgaalib_iki2000"])
+def test_db_find_exact(db):
+    database = hdtv.database.databases[db]()
+    database.open()
+    expected = [g.ID for g in database if g.z == 26 and g.a == 56]
+    assert [g.ID for g in database.find(z=26, a=56)] == expected
+    assert [g.ID for g in database.find(symbol="FE", a=56)] == expected
+    assert [g.ID for g in database.find(nuclide="56-Fe")] == expected
+
+
+def test_db_cache(tmp_path, monkeypatch):
+    cachedir = tmp_path / "cache"
+    monkeypatch.setattr(hdtv.database.cache, "cachedir", str(cachedir))
+    csvfile = tmp_path / "PGAAlib-IKI2000.dat"
+    shutil.copy(os.path.join(hdtv.datadir, "PGAAlib-IKI2000.dat"), str(csvfile))
+
+    def cached():
+        return [f.name for f in cachedir.glob("PGAAlib-IKI2000.dat-*.npz")]
+
+    database = hdtv.database.PGAAlib_IKI2000(csvfile=str(csvfile))
+    database.open()
+    expected = [str(g) for g in database.find(energy=511.0)]
+    cache = cached()
+    assert len(cache) == 1
+
+    database = hdtv.database.PGAAlib_IKI2000(csvfile=str(csvfile))
+    database.open()
+    assert [str(g) for g in database.find(energy=511.0)] == expected
+    assert cached() == cache
+
+    # Changed source invalidates the cache
+    with open(str(csvfile), "a") as f:
+        f.write("26,56,511.1,0.1,0.1,0.01,1.0,\n")
+    database = hdtv.database.PGAAlib_IKI2000(csvfile=str(csvfile))
+    database.open()
+    assert len(database.find(energy=511.0)) == len(expected) + 1
+    assert len(cached()) == 1
+    assert cached() != cache
+
+
+def test_db_cache_malformed(tmp_path, monkeypatch):
+    cachedir = tmp_path / "cache"
+    monkeypatch.setattr(hdtv.database.cache, "cachedir", str(cachedir))
+    csvfile = tmp_path / "PGAAlib-IKI2000.dat"
+    shutil.copy(os.path.join(hdtv.datadir, "PGAAlib-IKI2000.dat"), str(csvfile))
+    # A field beyond the size limit of the csv module
+    with open(str(csvfile), "a") as f:
+        f.write('26,56,"%s",0.1,0.1,0.01,1.0,\n' % ("1" * (1 << 18)))
+
+    database = hdtv.database.PGAAlib_IKI2000(csvfile=str(csvfile))
+    with pytest.raises(hdtv.cmdline.HDTVCommandAbort) as err:
+        database.open()
+    assert "PGAAlib-IKI2000.dat, line" in str(err.value)
+    assert not database.opened
+    assert list(cachedir.glob("PGAAlib-IKI2000.dat-*.npz")) == []
+
+
 def count_results(query):
     f, ferr = hdtvcmd(query)
     return int(re.search(r"Found (\d+) results", f).groups()[0])
+
+
+def test_iaea_index():
+    co60 = IAEALibraries.SearchNuclide("Co-60")
+    energies = [t["energy"].nominal_value for t in co60["transitions"]]
+    assert 1332.492 in energies
+    # Returned data may be modified without affecting the index
+    co60["transitions"].clear()
+    assert IAEALibraries.SearchNuclide("Co-60")["transitions"]
+
+    nuclides = IAEALibraries.SearchNuclides(["Co-60", "Cs-137"])
+    assert [n["nuclide"] for n in nuclides] == ["Co-60", "Cs-137"]
+
+    transitions = IAEALibraries.SearchEnergy(1332.5, 0.1)
+    assert "Co-60" in [t["nuclide"] for t in transitions]
+    assert all(abs(t["energy"].nominal_value - 1332.5) <= 0.1 for t in transitions)
+
+    with pytest.raises(hdtv.cmdline.HDTVCommandError):
+        IAEALibraries.SearchNuclide("Xx-999")
+
+
+LARA_CO60 = """Nuclide ; Co-60\r
+Half-life (s) ; 1.66344E+8 ; 1.2E+4\r
+Reference ; LNHB\r
+------\r
+1173.228 ; 0.003 ; 99.85 ; 0.03 ; g ; 1 ; Ni-60\r
+1332.492 ; 0.004 ; 99.9826 ; 0.0006 ; g ; 1 ; Ni-60\r
+"""
+
+
+def test_ddep_offline_import(tmp_path, monkeypatch):
+    monkeypatch.setattr(DDEPLibraries, "cachedir", str(tmp_path / "cache"))
+    monkeypatch.setattr(DDEPLibraries, "_records", dict())
+    hdtv.options.Set("database.ddep.offline", "true")
+    try:
+        f, ferr = hdtvcmd("db ddep fetch Co-60")
+        assert "offline mode" in ferr
+
+        laradir = tmp_path / "lara"
+        laradir.mkdir()
+        (laradir / "Co-60.lara.txt").write_text(LARA_CO60)
+        f, ferr = hdtvcmd("db ddep import {}".format(laradir))
+        assert ferr == ""
+        assert "Imported 1 nuclides" in f
+        f, ferr = hdtvcmd("db ddep list")
+        assert "Co-60" in f
+
+        data = DDEPLibraries.SearchNuclide("Co-60")
+        assert data["reference"] == "LNHB"
+        assert [t["energy"].nominal_value for t in data["transitions"]] == [
+            1173.228,
+            1332.492,
+        ]
+        assert data["transitions"][1]["intensity"].std_dev == pytest.approx(6e-6)
+
+        hdtvcmd("db ddep clear")
+        with pytest.raises(hdtv.cmdline.HDTVCommandError):
+            DDEPLibraries.SearchNuclide("Co-60")
+    finally:
+        hdtv.options.Reset("database.ddep.offline")
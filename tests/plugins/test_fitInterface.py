@@ -22,6 +22,7 @@
 import re
 import os
 import sys
+import xml.etree.ElementTree as ET
 
 import pytest
 
@@ -45,6 +46,7 @@ except RuntimeError:
 from hdtv.plugins.specInterface import spec_interface
 from hdtv.plugins.fitInterface import fit_interface
 import hdtv.plugins.peakfinder
+from hdtv.plugins.fitlist import fitxml
 
 spectra = __main__.spectra
 
@@ -96,6 +98,32 @@ def test_cmd_fit_various():
     assert f == ""
 
 
+def test_cmd_fit_hide_releases_fitter():
+    spec_interface.LoadSpectra(testspectrum)
+    setup_fit()
+    hdtvcmd("fit execute", "fit store", "fit clear")
+    spec = spectra.dict[spectra.activeID]
+    fit = spec.dict[spec.ids[0]]
+    listed, ferr = hdtvcmd("fit list")
+    xml = ET.tostring(fitxml.xml.Fit2Xml(fit))
+
+    hdtvcmd("fit hide 0")
+    assert fit.dispPeakFunc is None
+    assert fit.fitter.peakFitter is None
+    assert all(peak.displayObj is None for peak in fit.peaks)
+    f, ferr = hdtvcmd("fit list")
+    assert ferr == ""
+    assert f == listed
+    assert ET.tostring(fitxml.xml.Fit2Xml(fit)) == xml
+
+    hdtvcmd("fit show 0")
+    assert fit.dispPeakFunc is not None
+    assert fit.fitter.peakFitter.GetNumPeaks() == 2
+    assert all(peak.displayObj is not None for peak in fit.peaks)
+    f, ferr = hdtvcmd("fit list")
+    assert f == listed
+
+
 def test_cmd_fit_peakfind():
     spec_interface.LoadSpectra(testspectrum)
     assert len(spec_interface.spectra.dict) == 1
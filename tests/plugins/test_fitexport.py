@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+# HDTV - A ROOT-based spectrum analysis software
+#  Copyright (C) 2006-2009  The HDTV development team (see file AUTHORS)
+#
+# This file is part of HDTV.
+#
+# HDTV is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 2 of the License, or (at your
+# option) any later version.
+#
+# HDTV is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HDTV; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+
+
+import csv
+import os
+
+import numpy as np
+import pytest
+
+from tests.helpers.utils import hdtvcmd
+from tests.helpers.fixtures import temp_file
+
+from hdtv.util import monkey_patch_ui
+
+monkey_patch_ui()
+
+import hdtv.cmdline
+import hdtv.options
+import hdtv.session
+
+import __main__
+
+try:
+    __main__.spectra = hdtv.session.Session()
+except RuntimeError:
+    pass
+
+from hdtv.plugins.specInterface import spec_interface
+from hdtv.plugins.fitInterface import fit_interface
+import hdtv.plugins.calInterface
+import hdtv.plugins.fitexport
+
+spectra = __main__.spectra
+
+testspectrum = os.path.join(os.path.curdir, "tests", "share", "osiris_bg.spc")
+
+
+@pytest.fixture(autouse=True)
+def prepare():
+    fit_interface.ResetFitterParameters()
+    hdtv.options.Set("table", "classic")
+    hdtv.options.Set("uncertainties", "short")
+    for ID in spectra.ids:
+        spectra.Pop(ID)
+    spec_interface.LoadSpectra(testspectrum)
+    hdtvcmd("calibration position set 0.5 2")
+    hdtvcmd(
+        "fit marker peak set 580",
+        "fit marker peak set 592",
+        "fit marker background set 520",
+        "fit marker background set 550",
+        "fit marker region set 570",
+        "fit marker region set 615",
+        "fit execute",
+        "fit store",
+        "fit marker peak set 1200",
+        "fit marker region set 1180",
+        "fit marker region set 1220",
+        "fit execute",
+        "fit store",
+    )
+    yield
+    for ID in spectra.ids:
+        spectra.Pop(ID)
+    fit_interface.ResetFitterParameters()
+
+
+def stored_peaks():
+    spec = spectra.dict[spectra.activeID]
+    return [peak for ID in spec.ids for peak in spec.dict[ID].peaks]
+
+
+def test_cmd_fit_export_csv(temp_file):
+    f, ferr = hdtvcmd("fit export -F {}".format(temp_file))
+    assert ferr == ""
+    assert "Exported 3 peaks of 2 fits" in f
+    with open(temp_file, newline="") as csvfile:
+        rows = list(csv.DictReader(csvfile))
+    assert len(rows) == 3
+    assert [int(row["fit"]) for row in rows] == [0, 0, 1]
+    assert [int(row["peak"]) for row in rows] == [0, 1, 0]
+    for (row, peak) in zip(rows, stored_peaks()):
+        assert float(row["channel"]) == pytest.approx(peak.pos.nominal_value)
+        assert float(row["pos"]) == pytest.approx(peak.pos_cal.nominal_value)
+        assert float(row["pos_err"]) == pytest.approx(peak.pos_cal.std_dev)
+        assert float(row["width"]) == pytest.approx(peak.width_cal.nominal_value)
+        assert float(row["vol"]) == pytest.approx(peak.vol.nominal_value)
+        assert (float(row["cal0"]), float(row["cal1"])) == (0.5, 2.0)
+
+
+def test_cmd_fit_export_npz(temp_file):
+    f, ferr = hdtvcmd("fit export -F --chunk 1 --format npz {}".format(temp_file))
+    assert ferr == ""
+    columns = np.load(temp_file)
+    assert columns["fit"].dtype == np.int32
+    assert list(columns["peak"]) == [0, 1, 0]
+    positions = [peak.pos_cal.nominal_value for peak in stored_peaks()]
+    assert np.allclose(columns["pos"], positions)
+    assert np.all(columns["sub_vol"][:2] == columns["sub_vol"][0])
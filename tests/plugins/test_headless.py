@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+# HDTV - A ROOT-based spectrum analysis software
+#  Copyright (C) 2006-2009  The HDTV development team (see file AUTHORS)
+#
+# This file is part of HDTV.
+#
+# HDTV is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 2 of the License, or (at your
+# option) any later version.
+#
+# HDTV is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HDTV; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+
+
+import os
+import subprocess
+import sys
+
+import pytest
+import ROOT
+
+import hdtv.dummy
+import hdtv.histogram
+import hdtv.session
+import hdtv.spectrum
+from hdtv.marker import Marker
+
+testspectrum = os.path.join(os.path.curdir, "tests", "share", "osiris_bg.spc")
+
+
+@pytest.fixture
+def session():
+    session = hdtv.session.Session(headless=True)
+    yield session
+    session.Clear()
+
+
+def test_null_viewport():
+    viewport = hdtv.dummy.NullViewer().GetViewport()
+    assert not viewport
+    # Calls are noops
+    viewport.LockUpdate()
+    viewport.SetStatusText("headless")
+    viewport.UnlockUpdate()
+
+
+def test_headless_draw():
+    viewport = hdtv.dummy.NullViewport()
+    hist = ROOT.TH1D("headless", "headless", 10, 0.0, 10.0)
+    spec = hdtv.spectrum.Spectrum(hdtv.histogram.Histogram(hist))
+    spec.Draw(viewport)
+    spec.Show()
+    spec.Hide()
+    assert spec.hist.displayObj is None
+
+    marker = Marker("X", 5.0)
+    marker.Draw(viewport)
+    marker.Show()
+    marker.dashed = True
+    assert marker.displayObj is None
+
+
+def test_headless_session(session):
+    assert isinstance(session.window.viewer, hdtv.dummy.NullViewer)
+    assert isinstance(session.viewport, hdtv.dummy.NullViewport)
+
+    spec = hdtv.spectrum.Spectrum(hdtv.histogram.FileHistogram(testspectrum))
+    sid = session.Insert(spec)
+    session.ActivateObject(sid)
+    assert spec.hist.displayObj is None
+
+    session.SetMarker("region", 1450)
+    session.SetMarker("region", 1470)
+    session.SetMarker("peak", 1460)
+    session.ExecuteFit()
+    session.StoreFit()
+    fits = list(session.dict[sid].dict.values())
+    assert len(fits) == 1
+    assert len(fits[0].peaks) == 1
+
+
+def test_headless_cmdline(tmp_path):
+    batchfile = tmp_path / "headless.hdtv"
+    batchfile.write_text(
+        "\n".join(
+            [
+                "spectrum get " + os.path.abspath(testspectrum),
+                "fit marker region set 1450",
+                "fit marker region set 1470",
+                "fit marker peak set 1460",
+                "fit execute",
+                "fit store",
+                "fit list",
+                ":import ROOT",
+                ":print('batch mode:', bool(ROOT.gROOT.IsBatch()))",
+                "exit",
+            ]
+        )
+    )
+    # No X server must be needed
+    env = dict(os.environ)
+    env.pop("DISPLAY", None)
+    proc = subprocess.run(
+        [sys.executable, "-m", "hdtv.app", "--headless", "-b", str(batchfile)],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+        timeout=600,
+    )
+    assert proc.returncode == 0, proc.stdout
+    assert "Loaded " + os.path.abspath(testspectrum) in proc.stdout
+    assert "Storing workFit with ID 0" in proc.stdout
+    assert "Fits in Spectrum 0" in proc.stdout
+    assert "batch mode: True" in proc.stdout
@@ -48,13 +48,17 @@ import hdtv.plugins.fitmap
 import hdtv.plugins.config
 import hdtv.plugins.dblookup
 import hdtv.plugins.fittex
+import hdtv.plugins.fitexport
 import hdtv.plugins.matInterface
 import hdtv.plugins.rootInterface
 import hdtv.plugins.run
 import hdtv.plugins.fitlist
 import hdtv.plugins.printing
+import hdtv.plugins.sessionInterface
+import hdtv.plugins.sortInterface
 
 cmdlist = [
+    "calibration efficiency apply",
     "calibration efficiency fit",
     "calibration efficiency list",
     "calibration efficiency plot",
@@ -86,6 +90,10 @@ cmdlist = [
     "cut marker",
     "cut show",
     "cut store",
+    "db ddep clear",
+    "db ddep fetch",
+    "db ddep import",
+    "db ddep list",
     "db info",
     "db list",
     "db lookup",
@@ -94,6 +102,7 @@ cmdlist = [
     "fit clear",
     "fit delete",
     "fit execute",
+    "fit export",
     "fit focus",
     "fit function peak activate",
     "fit getlists",
@@ -115,6 +124,7 @@ cmdlist = [
     "fit store",
     "fit tex",
     "fit write",
+    "map",
     # "matrix delete",
     "matrix get",
     "matrix list",
@@ -122,11 +132,15 @@ cmdlist = [
     "matrix view",
     "nuclide",
     "print",
+    "profile",
     "root cut delete",
     "root cut view",
     "root get",
     "root matrix get",
     "root matrix view",
+    "session load",
+    "session save",
+    "sort listmode",
     "spectrum activate",
     "spectrum add",
     "spectrum calbin",
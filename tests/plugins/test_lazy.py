@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+# HDTV - A ROOT-based spectrum analysis software
+#  Copyright (C) 2006-2009  The HDTV development team (see file AUTHORS)
+#
+# This file is part of HDTV.
+#
+# HDTV is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 2 of the License, or (at your
+# option) any later version.
+#
+# HDTV is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HDTV; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+
+import sys
+import textwrap
+
+import pytest
+
+from tests.helpers.utils import hdtvcmd
+
+import hdtv.cmdline
+import hdtv.options
+import hdtv.plugins
+
+PLUGIN = """
+import hdtv.cmdline
+import hdtv.options
+import hdtv.ui
+
+hdtv.options.RegisterOption("{name}.answer", hdtv.options.Option(default=42))
+
+
+def Hello(args):
+    hdtv.ui.msg("Hello from {name}")
+
+
+hdtv.cmdline.AddCommand("{name} hello", Hello)
+hdtv.cmdline.AddCommand("{name} world", Hello)
+"""
+
+
+@pytest.fixture
+def lazy_plugin(tmp_path, monkeypatch, request):
+    name = "lazytest" + request.node.name.split("_")[-1]
+    (tmp_path / (name + ".py")).write_text(textwrap.dedent(PLUGIN.format(name=name)))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    plugin = hdtv.cmdline.AddLazyPlugin(name, [name])
+    hdtv.options.RegisterLoader(name + ".", plugin.Load)
+    yield name
+    sys.modules.pop(name, None)
+    for title in (name + " hello", name + " world"):
+        try:
+            hdtv.cmdline.RemoveCommand(title)
+        except RuntimeError:
+            pass
+
+
+def test_lazy_command(lazy_plugin):
+    assert lazy_plugin not in sys.modules
+    f, ferr = hdtvcmd(lazy_plugin + " hello")
+    assert ferr == ""
+    assert "Hello from " + lazy_plugin in f
+    assert lazy_plugin in sys.modules
+    f, ferr = hdtvcmd(lazy_plugin + " world")
+    assert "Hello from " + lazy_plugin in f
+
+
+def test_lazy_option(lazy_plugin):
+    assert hdtv.options.Get(lazy_plugin + ".answer") == 42
+    assert lazy_plugin in sys.modules
+
+
+def test_lazy_import(lazy_plugin):
+    # Importing the plugin directly replaces the stubs
+    __import__(lazy_plugin)
+    f, ferr = hdtvcmd(lazy_plugin + " hello")
+    assert ferr == ""
+    assert "Hello from " + lazy_plugin in f
+
+
+def test_lazy_manifest():
+    for (module, manifest) in hdtv.plugins.lazy_plugins.items():
+        assert module not in hdtv.plugins.core_plugins
+        assert manifest["commands"]
+
+
+def test_core_cut_hotkeys():
+    # The cut hotkeys are needed for matrices opened by lazy plugins
+    # ("root matrix get", "sort listmode"), so they must load eagerly
+    assert "hdtv.plugins.matInterface" in hdtv.plugins.core_plugins
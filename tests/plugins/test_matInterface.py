@@ -19,7 +19,10 @@
 # along with HDTV; if not, write to the Free Software Foundation,
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
 
+import math
+
 import pytest
+import ROOT
 
 from tests.helpers.utils import redirect_stdout, hdtvcmd
 
@@ -30,6 +33,8 @@ monkey_patch_ui()
 import hdtv.cmdline
 import hdtv.options
 import hdtv.session
+from hdtv.histogram import OpenMatrix, SymHisto2D
+from hdtv.specreader import SpecReader
 
 import __main__
 
@@ -54,6 +59,87 @@ def prepare():
     spectra.Clear()
 
 
+def symmetric_th2(n=20):
+    hist = ROOT.TH2D("sym", "sym", n, -0.5, n - 0.5, n, -0.5, n - 0.5)
+    for i in range(n):
+        for j in range(i, n):
+            content = (i + 1) * (j + 1) + (i + j) % 3
+            hist.SetBinContent(i + 1, j + 1, content)
+            hist.SetBinContent(j + 1, i + 1, content)
+    return hist
+
+
+def test_sym_matrix():
+    hist = symmetric_th2()
+    n = hist.GetNbinsX()
+    sym = ROOT.SymMatrix(hist)
+    assert not sym.Failed()
+    assert sym.GetSize() == n * (n + 1) // 2
+
+    full = ROOT.RMatrix(hist, ROOT.RMatrix.PROJ_X)
+    cuts = list()
+    for matrix in (sym, full):
+        matrix.ResetRegions()
+        matrix.AddCutRegion(matrix.FindCutBin(3.0), matrix.FindCutBin(5.0))
+        matrix.AddBgRegion(matrix.FindCutBin(10.0), matrix.FindCutBin(11.0))
+        cuts.append(matrix.Cut("cut", "cut"))
+    for b in range(1, n + 1):
+        assert cuts[0].GetBinContent(b) == pytest.approx(cuts[1].GetBinContent(b))
+
+    proj = sym.Projection("prx", "prx")
+    prx = hist.ProjectionX("prx_full")
+    for b in range(1, n + 1):
+        assert proj.GetBinContent(b) == pytest.approx(prx.GetBinContent(b))
+
+
+def test_sym_matrix_not_square():
+    hist = ROOT.TH2D("asym", "asym", 20, -0.5, 19.5, 10, -0.5, 9.5)
+    with pytest.raises(RuntimeError):
+        SymHisto2D(hist)
+
+
+def test_sym_matrix_triangular_file(tmp_path):
+    hist = symmetric_th2()
+    fname = str(tmp_path / "sym.mtx")
+    assert ROOT.MFileHist.WriteTH2(hist, fname, "le4t") == ROOT.MFileHist.ERR_SUCCESS
+
+    histo = OpenMatrix(fname, sym=True)
+    assert isinstance(histo, SymHisto2D)
+    prx = hist.ProjectionX("prx_full")
+    for b in range(1, hist.GetNbinsX() + 1):
+        assert histo.xproj.hist.GetBinContent(b) == pytest.approx(prx.GetBinContent(b))
+
+
+def test_lc_matrix_threads(tmp_path):
+    nx, ny = 300, 200
+    hist = ROOT.TH2D("lc", "lc", nx, -0.5, nx - 0.5, ny, -0.5, ny - 0.5)
+    for j in range(ny):
+        for i in range(0, nx, 1 + j % 5):
+            # Includes values that are rounded and large steps
+            content = ((i * 7 + j * 13) % 31 - 10) * (1000 if i % 11 == 0 else 1)
+            hist.SetBinContent(i + 1, j + 1, content + (0.5 if j % 3 == 0 else 0))
+
+    files = dict()
+    for threads in (1, 4):
+        fname = str(tmp_path / ("t%d.mtx" % threads))
+        SpecReader.WriteMatrix(hist, fname, "lc", threads)
+        tname = str(tmp_path / ("t%d.tmtx" % threads))
+        assert ROOT.MatOp.Transpose(fname, tname, threads) == ROOT.MatOp.ERR_SUCCESS
+        with open(fname, "rb") as f, open(tname, "rb") as t:
+            files[threads] = (f.read(), t.read())
+    assert files[1] == files[4]
+
+    mhist = ROOT.MFileHist()
+    assert mhist.Open(str(tmp_path / "t4.tmtx")) == ROOT.MFileHist.ERR_SUCCESS
+    transpose = mhist.ToTH2D("t", "t", 0)
+    assert (transpose.GetNbinsX(), transpose.GetNbinsY()) == (ny, nx)
+    for (i, j) in [(0, 0), (12, 3), (295, 199), (22, 0), (8, 6), (5, 6)]:
+        # mfile rounds halves away from zero
+        content = hist.GetBinContent(i + 1, j + 1)
+        expected = math.copysign(math.floor(abs(content) + 0.5), content)
+        assert transpose.GetBinContent(j + 1, i + 1) == expected
+
+
 @pytest.mark.skip(reason="need example matrix")
 def test_cmd_matrix_get_sym(matrix):
     raise NotImplementedError
@@ -20,6 +20,7 @@
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
 
 import os
+import shutil
 
 import pytest
 from tests.helpers.utils import redirect_stdout, hdtvcmd, isclose, setup_io
@@ -136,3 +137,41 @@ def test_root_to_root_conversion_for_unconventional_binning():
 def get_spec(specid):
     s = hdtv.plugins.specInterface.spec_interface
     return s.spectra.dict.get([x for x in list(s.spectra.dict) if x.major == specid][0])
+
+
+def test_file_pool(tmp_path):
+    pool = hdtv.rfile_utils.FilePool(maxfiles=2)
+    fnames = []
+    for i in range(3):
+        fname = tmp_path / ("binning%d.root" % i)
+        shutil.copy(os.path.join("tests", "share", "binning.root"), str(fname))
+        fnames.append(str(fname))
+
+    rfile = pool.Open(fnames[0])
+    assert pool.Open(fnames[0]) is rfile
+    names = [name for (name, classname) in pool.Keys(rfile)]
+    assert {"h", "h2"} <= set(names)
+    assert len(names) == len(set(names))
+    # The key index is cached
+    assert pool.Keys(rfile) is pool.Keys(rfile)
+
+    # Pinned files are not evicted
+    pool.Pin(rfile)
+    others = [pool.Open(fname) for fname in fnames[1:]]
+    assert rfile.IsOpen()
+    assert not others[0].IsOpen()
+    pool.Release(rfile)
+    assert pool.Open(fnames[0]) is rfile
+
+    # Files changed on disk are re-opened
+    rfile = pool.Open(fnames[2])
+    os.utime(fnames[2], ns=(0, 0))
+    assert pool.Open(fnames[2]) is not rfile
+    pool.Clear()
+
+
+def test_root_get_pattern():
+    objs = hdtv.rfile_utils.Get(".", None, "tests/share/binning.root/h*")
+    names = [obj.GetName() for obj in objs]
+    assert {"h", "h2"} <= set(names)
+    assert len(names) == len(set(names))
@@ -19,13 +19,19 @@
 # along with HDTV; if not, write to the Free Software Foundation,
 # Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
 
+import os
+import sys
+
 import pytest
 
-from tests.helpers.utils import redirect_stdout, hdtvcmd
+from tests.helpers.utils import redirect_stdout, hdtvcmd, setup_io
 
+import hdtv.batch
 import hdtv.cmdline
+import hdtv.options
 import hdtv.plugins.run
 import hdtv.plugins.ls
+import hdtv.plugins.config
 
 
 @pytest.mark.parametrize(
@@ -44,3 +50,133 @@ def test_cmd_run(script, contains):
 def test_cmd_run_fail(script):
     f, ferr = hdtvcmd("run " + script)
     assert "No such file" in ferr
+
+
+# Stands in for a headless hdtv session executing a --map job: writes a
+# table and a fit list for each "file" line, and fails on "fail"
+FAKE_JOB = """
+import sys
+names = []
+for script in sys.argv[1:]:
+    with open(script) as f:
+        names += f.read().split()
+for name in names:
+    print("processing", name)
+    if name.endswith("fail"):
+        sys.exit(1)
+with open("fits.txt", "a") as f:
+    f.write("# name value\\n")
+    for name in names:
+        f.write("%d %s\\n" % (len(name), name))
+with open("fits.xml", "w") as f:
+    f.write('<hdtv version="1.5">')
+    for name in names:
+        f.write('<fit name="%s"/>' % name)
+    f.write("</hdtv>")
+"""
+
+
+def test_map(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        hdtv.batch,
+        "WorkerCommand",
+        lambda scripts: [sys.executable, "-c", FAKE_JOB] + scripts,
+    )
+    template = tmp_path / "template.hdtv"
+    template.write_text("$stem")
+    files = ["a.spc", "bb.spc", "ccc.spc", "fail.spc", "eeeee.spc"]
+    outdir = str(tmp_path / "out")
+
+    jobs = hdtv.batch.Map(str(template), files, outdir, jobs=2, chunk=2)
+    assert [job.files for job in jobs] == [files[0:2], files[2:4], files[4:]]
+    assert [job.returncode for job in jobs] == [0, 1, 0]
+    with open(jobs[1].log) as f:
+        assert "processing fail" in f.read()
+
+    merged = hdtv.batch.MergeOutputs(jobs, outdir)
+    assert sorted(os.path.basename(fname) for fname in merged) == [
+        "fits.txt",
+        "fits.xml",
+    ]
+    with open(os.path.join(outdir, "fits.txt")) as f:
+        assert f.read() == "# name value\n1 a\n2 bb\n5 eeeee\n"
+    with open(os.path.join(outdir, "fits.xml")) as f:
+        assert f.read().count("<fit ") == 3
+
+
+def test_map_relative_outdir(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        hdtv.batch,
+        "WorkerCommand",
+        lambda scripts: [sys.executable, "-c", FAKE_JOB] + scripts,
+    )
+    template = tmp_path / "template.hdtv"
+    template.write_text("$stem")
+    monkeypatch.chdir(tmp_path)
+
+    jobs = hdtv.batch.Map(str(template), ["a.spc", "bb.spc"], "out", jobs=1, chunk=2)
+    assert [job.returncode for job in jobs] == [0]
+    assert len(jobs[0].scripts) == 2
+    assert all(os.path.isabs(script) for script in jobs[0].scripts)
+    with open(jobs[0].log) as f:
+        assert "processing bb" in f.read()
+
+    hdtv.batch.MergeOutputs(jobs, "out")
+    with open(os.path.join("out", "fits.txt")) as f:
+        assert f.read() == "# name value\n1 a\n2 bb\n"
+
+
+def test_cmdfile_missing_counted():
+    errors = hdtv.cmdline.command_line.fErrors
+    (f, ferr) = setup_io(2)
+    with redirect_stdout(f, ferr):
+        hdtv.cmdline.command_line.ExecCmdfile("tests/share/doesnotexist.hdtv")
+    assert "ERROR" in ferr.getvalue()
+    assert hdtv.cmdline.command_line.fErrors == errors + 1
+
+
+def test_failed_abort_counted():
+    errors = hdtv.cmdline.command_line.fErrors
+    hdtvcmd("config set nosuchoption 1")
+    assert hdtv.cmdline.command_line.fErrors == errors + 1
+    # --help also aborts, but is no failure
+    hdtvcmd("ls --help")
+    assert hdtv.cmdline.command_line.fErrors == errors + 1
+
+
+def test_map_instantiate():
+    script = hdtv.batch.Instantiate(
+        "spectrum get $file\nfit write ${stem}.xml\n$$5", "/data/run1.spc", 3, "/s"
+    )
+    assert script == "spectrum get /data/run1.spc\nfit write run1.xml\n$5"
+
+
+def test_failed_commands_counted():
+    errors = hdtv.cmdline.command_line.fErrors
+    f, ferr = hdtvcmd("thisisnotacommand")
+    assert "ERROR" in ferr
+    assert hdtv.cmdline.command_line.fErrors == errors + 1
+
+
+def test_cmd_profile():
+    f, ferr = hdtvcmd("profile -n 5 ls")
+    assert ferr == ""
+    assert "function calls" in f
+    assert "cumulative" in f
+
+
+@pytest.mark.parametrize("mode", ["inline", "summary"])
+def test_command_timing(mode):
+    hdtv.options.Set("cli.timing", mode)
+    try:
+        hdtv.cmdline.command_timer.Clear()
+        f, ferr = hdtvcmd("ls", "ls")
+        assert ferr == ""
+        assert ("ls: " in f) == (mode == "inline")
+        (calls, wall, cpu, rss) = hdtv.cmdline.command_timer.records["ls"]
+        assert calls == 2
+        assert wall >= 0.0 and cpu >= 0.0 and rss >= 0
+        assert " ls " in str(hdtv.cmdline.command_timer.Summary())
+    finally:
+        hdtv.options.Reset("cli.timing")
+        hdtv.cmdline.command_timer.Clear()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+# HDTV - A ROOT-based spectrum analysis software
+#  Copyright (C) 2006-2009  The HDTV development team (see file AUTHORS)
+#
+# This file is part of HDTV.
+#
+# HDTV is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 2 of the License, or (at your
+# option) any later version.
+#
+# HDTV is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HDTV; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+
+import os
+
+import numpy as np
+import pytest
+
+from tests.helpers.utils import hdtvcmd
+from tests.helpers.fixtures import temp_file
+
+from hdtv.util import monkey_patch_ui
+
+monkey_patch_ui()
+
+import hdtv.cmdline
+import hdtv.options
+import hdtv.session
+import hdtv.snapshot
+
+import __main__
+
+try:
+    __main__.spectra = hdtv.session.Session()
+except RuntimeError:
+    pass
+
+from hdtv.plugins.specInterface import spec_interface
+from hdtv.plugins.fitInterface import fit_interface
+import hdtv.plugins.calInterface
+import hdtv.plugins.sessionInterface
+
+spectra = __main__.spectra
+
+testspectrum = os.path.join(os.path.curdir, "tests", "share", "osiris_bg.spc")
+
+
+@pytest.fixture(autouse=True)
+def prepare():
+    fit_interface.ResetFitterParameters()
+    hdtv.options.Set("table", "classic")
+    hdtv.options.Set("uncertainties", "short")
+    for ID in spectra.ids:
+        spectra.Pop(ID)
+    yield
+    for ID in spectra.ids:
+        spectra.Pop(ID)
+    fit_interface.ResetFitterParameters()
+
+
+def test_snapshot_arrays(temp_file):
+    arrays = {
+        "a": np.arange(10, dtype=np.float64),
+        "b": np.ones((3, 5), dtype=np.uint16),
+        "empty": np.zeros(0),
+    }
+    hdtv.snapshot.Write(temp_file, {"answer": 42}, dict(arrays))
+    snapshot = hdtv.snapshot.Snapshot(temp_file)
+    assert snapshot.header["answer"] == 42
+    for (name, array) in arrays.items():
+        assert np.array_equal(snapshot.Array(name), array)
+        assert snapshot.Array(name).dtype == array.dtype
+
+
+def test_cmd_session_save_load(temp_file):
+    spec_interface.LoadSpectra(testspectrum)
+    spec_interface.LoadSpectra(testspectrum)
+    hdtvcmd("calibration position set 0.5 2")
+    hdtvcmd(
+        "fit marker peak set 580",
+        "fit marker background set 520",
+        "fit marker background set 550",
+        "fit marker region set 570",
+        "fit marker region set 615",
+        "fit execute",
+        "fit store",
+    )
+    spec = spectra.dict[spectra.activeID]
+    fitstr = str(spec.dict[spec.ids[0]])
+    (contents, errors) = spec.hist.GetArrays()
+
+    f, ferr = hdtvcmd("session save -F {}".format(temp_file))
+    assert ferr == ""
+    assert "Saved 2 spectra" in f
+
+    hdtvcmd("spectrum delete all")
+    f, ferr = hdtvcmd("session load {}".format(temp_file))
+    assert ferr == ""
+    assert "Restored 2 spectra with 1 fits" in f
+
+    restored = spectra.dict[spectra.activeID]
+    assert restored.name == spec.name
+    assert list(restored.cal.GetCoeffs()) == [0.5, 2]
+    assert np.array_equal(restored.hist.GetArrays()[0], contents)
+    assert len(restored.dict) == 1
+    assert str(restored.dict[restored.ids[0]]) == fitstr
+    assert restored.hist.hist.GetBinContent(600) == contents[600]
+
+
+def test_cmd_session_load_invalid(temp_file):
+    with open(temp_file, "w") as f:
+        f.write("not a snapshot")
+    f, ferr = hdtvcmd("session load {}".format(temp_file))
+    assert "not a hdtv session snapshot" in ferr
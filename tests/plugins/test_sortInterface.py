@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+# HDTV - A ROOT-based spectrum analysis software
+#  Copyright (C) 2006-2019  The HDTV development team (see file AUTHORS)
+#
+# This file is part of HDTV.
+#
+# HDTV is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 2 of the License, or (at your
+# option) any later version.
+#
+# HDTV is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License
+# for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HDTV; if not, write to the Free Software Foundation,
+# Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA
+
+import os
+
+import numpy as np
+import pytest
+
+from tests.helpers.utils import hdtvcmd
+
+from hdtv.util import monkey_patch_ui
+
+monkey_patch_ui()
+
+import hdtv.cmdline
+import hdtv.options
+import hdtv.session
+import hdtv.sorter
+
+import __main__
+
+try:
+    __main__.spectra = hdtv.session.Session()
+except RuntimeError:
+    pass
+
+import hdtv.plugins.specInterface
+import hdtv.plugins.sortInterface
+
+spectra = __main__.spectra
+
+
+@pytest.fixture(autouse=True)
+def prepare():
+    hdtv.options.Set("table", "classic")
+    hdtv.options.Set("uncertainties", "short")
+    spectra.Clear()
+    yield
+    spectra.Clear()
+
+
+@pytest.fixture
+def listmode(tmp_path):
+    """
+    Events of 3 detectors, with the energies of detector 1 doubled
+    """
+    dtype = hdtv.sorter.ParseLayout("detector:u2,_:u2,energy:u2,time:u8")
+    rng = np.random.default_rng(42)
+    n = 50000
+    events = np.zeros(n, dtype=dtype)
+    events["detector"] = rng.integers(0, 3, n)
+    events["energy"] = rng.integers(0, 500, n)
+    events["time"] = np.cumsum(rng.integers(0, 20, n))
+    fname = str(tmp_path / "events.lmd")
+    with open(fname, "wb") as f:
+        f.write(b"HEAD")
+        f.write(events.tobytes())
+    callist = str(tmp_path / "events.cal")
+    with open(callist, "w") as f:
+        f.write("1: 0.0 0.5\n")
+    return (fname, callist, events)
+
+
+def expected(events, window, nbins, mbins):
+    detector = events["detector"].astype(int)
+    energy = np.where(detector == 1, 0.5, 1.0) * events["energy"]
+    time = events["time"].astype(int)
+    spectra = np.zeros((3, nbins), dtype=int)
+    np.add.at(spectra, (detector, np.floor(energy + 0.5).astype(int)), 1)
+    matrix = np.zeros((mbins, mbins), dtype=int)
+    bins = np.floor(energy / (nbins / mbins) + 0.5).astype(int)
+    for i in range(len(events)):
+        j = i + 1
+        while j < len(events) and time[j] - time[i] <= window:
+            if detector[i] != detector[j]:
+                matrix[bins[i], bins[j]] += 1
+                matrix[bins[j], bins[i]] += 1
+            j += 1
+    return (spectra, matrix)
+
+
+@pytest.mark.parametrize("processes", [1, 3])
+def test_sorter(listmode, processes):
+    (fname, callist, events) = listmode
+    sorter = hdtv.sorter.Sorter(
+        "detector:u2,_:u2,energy:u2,time:u8",
+        cals={1: [0.0, 0.5]},
+        nbins=512,
+        window=8,
+        mbins=128,
+        header=4,
+        chunk=7000,
+    )
+    result = sorter.Sort(fname, processes)
+    (spectra, matrix) = expected(events, 8, 512, 128)
+    assert result.events == len(events)
+    assert result.detectors == [0, 1, 2]
+    assert np.array_equal(result.spectra, spectra)
+    assert np.array_equal(result.matrix, matrix)
+    assert result.coincidences == matrix.sum() // 2
+
+
+def test_sorter_layout():
+    with pytest.raises(hdtv.sorter.SortError):
+        hdtv.sorter.ParseLayout("detector:u2,energy:u2")
+    with pytest.raises(hdtv.sorter.SortError):
+        hdtv.sorter.ParseLayout("detector:i2,energy:u2,time:u8")
+    with pytest.raises(hdtv.sorter.SortError):
+        hdtv.sorter.ParseLayout("detector:u2,energy,time:u8")
+    assert hdtv.sorter.ParseLayout("detector:u2,energy:u2,time:u8").itemsize == 12
+
+
+def test_cmd_sort_listmode(listmode):
+    (fname, callist, events) = listmode
+    f, ferr = hdtvcmd(
+        "sort listmode -l detector:u2,_:u2,energy:u2,time:u8 -H 4 -c {} "
+        "-n 512 -w 8 -m 128 -j 1 {}".format(callist, fname)
+    )
+    assert ferr == ""
+    assert "Sorted 50000 events" in f
+    (expected_spectra, matrix) = expected(events, 8, 512, 128)
+    # 3 spectra and the projection of the matrix
+    assert len(spectra.dict) == 4
+    for d in range(3):
+        [spec] = [s for s in spectra.dict.values() if s.name == "events_d%d" % d]
+        (contents, errors) = spec.hist.GetArrays()
+        assert np.array_equal(contents[1:-1], expected_spectra[d])
+    proj = spectra.dict[spectra.activeID]
+    (contents, errors) = proj.hist.GetArrays()
+    assert np.array_equal(contents[1:-1], matrix.sum(axis=0))
+    assert proj.cal.Ch2E(1.0) == 4.0
+
+
+def test_cmd_sort_listmode_write(listmode, tmp_path):
+    (fname, callist, events) = listmode
+    output = str(tmp_path / "sorted")
+    f, ferr = hdtvcmd(
+        "sort listmode -l detector:u2,_:u2,energy:u2,time:u8 -H 4 -n 512 "
+        "-w 8 -m 128 -j 1 -o {} {}".format(output, fname)
+    )
+    assert ferr == ""
+    for d in range(3):
+        assert os.path.exists("{}_d{}.spc".format(output, d))
+    assert os.path.exists(output + ".mtx")
+    assert len(spectra.dict) == 0
+
+
+def test_cmd_sort_listmode_invalid(tmp_path):
+    fname = str(tmp_path / "invalid.lmd")
+    with open(fname, "wb") as f:
+        f.write(b"12345")
+    f, ferr = hdtvcmd("sort listmode {}".format(fname))
+    assert "not a multiple of the record size" in ferr
@@ -38,6 +38,7 @@ monkey_patch_ui()
 import hdtv.cmdline
 import hdtv.options
 import hdtv.session
+import hdtv.util
 
 import __main__
 
@@ -232,6 +233,59 @@ def test_cmd_spectrum_activate_multi(numspecs):
         assert "" == f
 
 
+def test_manager_ids():
+    from hdtv.drawable import Drawable, DrawableManager
+    from hdtv.util import ID
+
+    manager = DrawableManager()
+    for _ in range(5):
+        manager.Insert(Drawable())
+    manager.Pop(ID(1))
+    manager.Pop(ID(3))
+    assert manager.ids == [ID(0), ID(2), ID(4)]
+    assert manager.GetFreeID() == ID(1)
+    manager.Insert(Drawable(), ID(1))
+    assert manager.GetFreeID() == ID(3)
+
+    manager._iteratorID = ID(4)
+    assert manager.nextID == ID(0)
+    assert manager.nextID == ID(1)
+    assert manager.prevID == ID(0)
+    assert manager.prevID == ID(4)
+    assert manager.firstID == ID(0)
+    assert manager.lastID == ID(4)
+
+    ids = ID.ParseIds("1-3,7", manager)
+    assert ids == [ID(1), ID(2)]
+
+    manager.Clear()
+    assert manager.ids == []
+    assert manager.GetFreeID() == ID(0)
+
+    # Spectra next to the projections and cuts of matrices, which share
+    # their major
+    mixed = [ID(0, 1000), ID(0, 1010), ID(0), ID(1), ID(0, 1001), ID(1, 1000)]
+    for i in mixed:
+        manager.Insert(Drawable(), i)
+    assert manager.ids == [
+        ID(0),
+        ID(0, 1000),
+        ID(0, 1001),
+        ID(0, 1010),
+        ID(1),
+        ID(1, 1000),
+    ]
+    for i in mixed:
+        assert manager.ids[manager.sortedIDs.index(i)] == i
+    manager._iteratorID = ID(0, 1010)
+    assert manager.nextID == ID(1)
+    assert manager.prevID == ID(0, 1010)
+    manager.Pop(ID(0, 1010))
+    manager.Pop(ID(0))
+    assert manager.ids == [ID(0, 1000), ID(0, 1001), ID(1), ID(1, 1000)]
+    manager.Clear()
+
+
 def test_cmd_spectrum_info():
     assert len(s.spectra.dict) == 0
     hdtvcmd("spectrum get {}".format(testspectrum))
@@ -283,6 +337,17 @@ def test_cmd_spectrum_rebin(ngroup):
         assert get_spec(0).hist.hist.GetNbinsX() == 8192 // ngroup
 
 
+def test_cmd_spectrum_rebin_positions():
+    hdtvcmd("spectrum get {}".format(testspectrum))
+    spec = get_spec(0)
+    pos = hdtv.util.Position(100.0, fixedInCal=True, cal=spec.cal)
+    assert pos.pos_uncal == pytest.approx(100.0)
+
+    # The calibration is changed in place, the cached channel must follow
+    hdtvcmd("spectrum rebin -c 0 2")
+    assert pos.pos_uncal == pytest.approx(50.0)
+
+
 @pytest.mark.parametrize("binsize", [1, 0.5, 1.1])
 def test_cmd_spectrum_calbin_binsize(binsize):
     assert len(s.spectra.dict) == 0